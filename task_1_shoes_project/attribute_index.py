@@ -0,0 +1,298 @@
+import bisect
+from collections.abc import Sequence
+from itertools import islice
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+from events import ChangeEvent, ChangeKind
+
+# Ширина интервала гистограммы цен, ₽
+PRICE_BUCKET_WIDTH = 5000
+
+# Индексируемые атрибуты в порядке, в котором их возвращает attribute_keys
+ATTRIBUTES = ("shoe_type", "category", "manufacturer", "color", "size", "price")
+
+# Номера установленных битов для каждого значения байта
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+# Основные цвета и их синонимы; формы других родов и чисел добавляются автоматически
+BASE_COLORS = {
+    "черный": ("black",),
+    "белый": ("white",),
+    "красный": ("red",),
+    "синий": ("blue",),
+    "голубой": ("light blue",),
+    "коричневый": ("brown",),
+    "бежевый": ("beige",),
+    "розовый": ("pink",),
+    "серый": ("gray", "grey"),
+    "зеленый": ("green",),
+    "желтый": ("yellow",),
+    "оранжевый": ("orange",),
+    "фиолетовый": ("purple", "violet"),
+}
+
+
+def _color_forms(base: str) -> Tuple[str, ...]:
+    """Формы прилагательного цвета: черный -> черная, черное, черные"""
+    if base.endswith("ий"):
+        endings = ("яя", "ее", "ие")
+    else:
+        endings = ("ая", "ое", "ые")
+    return tuple(base[:-2] + ending for ending in endings)
+
+
+COLOR_ALIASES = {
+    alias: base
+    for base, synonyms in BASE_COLORS.items()
+    for alias in _color_forms(base) + synonyms
+}
+
+
+def normalize_color(color: str) -> str:
+    """Приводит название цвета к единому виду ("Чёрные " -> "черный")"""
+    color = " ".join(color.lower().replace("ё", "е").split())
+    return COLOR_ALIASES.get(color, color)
+
+
+# Полуразмер k содержит размеры на расстоянии не больше SIZE_KEY_RADIUS от k
+SIZE_KEY_RADIUS = 0.25
+
+
+def size_key(size: float) -> float:
+    """Размер, округленный до половины: индекс хранит полуразмеры"""
+    return round(size * 2) / 2
+
+
+def price_bucket(price: float) -> int:
+    """Нижняя граница интервала гистограммы, в который попадает цена"""
+    return int(price // PRICE_BUCKET_WIDTH) * PRICE_BUCKET_WIDTH
+
+
+def attribute_keys(shoe) -> Tuple[Hashable, ...]:
+    """Значения индексируемых атрибутов обуви"""
+    return (shoe.shoe_type, shoe.category, shoe.manufacturer.lower(), normalize_color(shoe.color),
+            size_key(shoe.size), price_bucket(shoe.price))
+
+
+def iter_positions(bitmap: int) -> Iterator[int]:
+    """Позиции установленных битов по возрастанию"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index * 8
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+class BitmapPositions(Sequence):
+    """Позиции установленных битов карты как последовательность только для чтения.
+
+    len() - число битов (без перебора), перебор и срезы с шагом вперед
+    останавливаются, как только набрано нужное количество позиций.
+    Список всех позиций строится только при произвольном доступе по индексу.
+    """
+
+    __slots__ = ("bitmap", "_count", "_positions")
+
+    def __init__(self, bitmap: int):
+        self.bitmap = bitmap
+        self._count: Optional[int] = None
+        self._positions: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self.bitmap.bit_count()
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        if self._positions is not None:
+            return iter(self._positions)
+        return iter_positions(self.bitmap)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and self._positions is None:
+            start, stop, step = index.indices(len(self))
+            if step > 0:
+                return list(islice(iter_positions(self.bitmap), start, stop, step))
+        if self._positions is None:
+            self._positions = list(iter_positions(self.bitmap))
+        return self._positions[index]
+
+
+class AttributeIndex:
+    """Битовые индексы атрибутов обуви.
+
+    Для каждого значения атрибута хранится битовая карта позиций в модели
+    (целое число Python: бит i установлен, если пара на позиции i имеет
+    это значение). Фильтр - пересечение карт, а количество по каждому
+    значению фасета - число битов в пересечении его карты с кандидатами,
+    поэтому записи коллекции при подсчете не перебираются.
+    """
+
+    def __init__(self, shoes: List = ()):
+        self.count = 0
+        self._bitmaps: Dict[str, Dict[Hashable, int]] = {name: {} for name in ATTRIBUTES}
+        self._prices: List[float] = []
+        self._sizes: List[float] = []  # Точные размеры: проверяются в крайних полуразмерах диапазона
+        self._size_keys: List[float] = []  # Отсортированные полуразмеры для запросов по диапазону
+        self._build(shoes)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def attach(self, shoes: List) -> bool:
+        """Проверяет, что прочитанный с диска индекс соответствует коллекции модели.
+
+        Содержимое уже сверено IndexCache по контрольной сумме записей,
+        здесь остается проверка числа записей.
+        """
+        return len(shoes) == self.count
+
+    def _build(self, shoes: List) -> None:
+        """Строит карты пакетно: биты собираются в bytearray, а не сдвигами больших чисел"""
+        buffers: Dict[str, Dict[Hashable, bytearray]] = {name: {} for name in ATTRIBUTES}
+        length = (len(shoes) + 7) // 8
+        for position, shoe in enumerate(shoes):
+            byte_index, mask = position >> 3, 1 << (position & 7)
+            for name, key in zip(ATTRIBUTES, attribute_keys(shoe)):
+                buffer = buffers[name].get(key)
+                if buffer is None:
+                    buffer = buffers[name][key] = bytearray(length)
+                buffer[byte_index] |= mask
+            self._prices.append(shoe.price)
+            self._sizes.append(shoe.size)
+        for name, values in buffers.items():
+            self._bitmaps[name] = {key: int.from_bytes(buffer, "little") for key, buffer in values.items()}
+        self._size_keys = sorted(self._bitmaps["size"])
+        self.count = len(shoes)
+
+    # ========== Обновление индекса ==========
+
+    def apply_events(self, events: List[ChangeEvent]) -> None:
+        """Обработчик событий модели (см. ShoesModel.events)"""
+        for event in events:
+            if event.kind == ChangeKind.ADDED:
+                self.on_added(event.new)
+            elif event.kind == ChangeKind.REMOVED:
+                self.on_removed(event.index, event.old)
+            else:
+                self.on_updated(event.index, event.old, event.new)
+
+    def _set(self, position: int, shoe) -> None:
+        bit = 1 << position
+        for name, key in zip(ATTRIBUTES, attribute_keys(shoe)):
+            values = self._bitmaps[name]
+            if key not in values:
+                values[key] = 0
+                if name == "size":
+                    bisect.insort(self._size_keys, key)
+            values[key] |= bit
+
+    def _clear(self, position: int, shoe) -> None:
+        bit = 1 << position
+        for name, key in zip(ATTRIBUTES, attribute_keys(shoe)):
+            values = self._bitmaps[name]
+            bitmap = values[key] & ~bit
+            if bitmap:
+                values[key] = bitmap
+            else:
+                del values[key]
+                if name == "size":
+                    del self._size_keys[bisect.bisect_left(self._size_keys, key)]
+
+    def on_added(self, shoe) -> None:
+        """Индексирует пару, добавленную в конец модели"""
+        self._set(self.count, shoe)
+        self._prices.append(shoe.price)
+        self._sizes.append(shoe.size)
+        self.count += 1
+
+    def on_removed(self, position: int, shoe) -> None:
+        """Удаляет пару с позиции position, сдвигая следующие позиции на одну"""
+        self._clear(position, shoe)
+        low_mask = (1 << position) - 1
+        for values in self._bitmaps.values():
+            for key, bitmap in values.items():
+                if bitmap >> position:
+                    values[key] = (bitmap & low_mask) | ((bitmap >> (position + 1)) << position)
+        del self._prices[position]
+        del self._sizes[position]
+        self.count -= 1
+
+    def on_updated(self, position: int, old_shoe, new_shoe) -> None:
+        """Переиндексирует пару на позиции position"""
+        self._clear(position, old_shoe)
+        self._set(position, new_shoe)
+        self._prices[position] = new_shoe.price
+        self._sizes[position] = new_shoe.size
+
+    # ========== Запросы ==========
+
+    @property
+    def all(self) -> int:
+        """Карта всех позиций"""
+        return (1 << self.count) - 1
+
+    def bitmap(self, attribute: str, key: Hashable) -> int:
+        """Карта позиций с заданным значением атрибута"""
+        return self._bitmaps[attribute].get(key, 0)
+
+    def size_range(self, min_size: Optional[float], max_size: Optional[float]) -> int:
+        """Карта позиций с размером в диапазоне [min_size, max_size].
+
+        Полуразмер k содержит размеры из [k - 0.25, k + 0.25]. Полуразмеры,
+        целиком попавшие в диапазон, находятся двоичным поиском и берутся
+        целиком; точные размеры проверяются только в крайних полуразмерах.
+        """
+        low = float("-inf") if min_size is None else min_size
+        high = float("inf") if max_size is None else max_size
+        keys = self._size_keys
+        start = bisect.bisect_left(keys, low - SIZE_KEY_RADIUS)
+        end = bisect.bisect_right(keys, high + SIZE_KEY_RADIUS)
+        bitmaps = self._bitmaps["size"]
+        sizes = self._sizes
+        result = 0
+        edge = bytearray((self.count + 7) // 8)
+        for key in keys[start:end]:
+            bitmap = bitmaps[key]
+            if low <= key - SIZE_KEY_RADIUS and key + SIZE_KEY_RADIUS <= high:
+                result |= bitmap
+                continue
+            for position in iter_positions(bitmap):
+                if low <= sizes[position] <= high:
+                    edge[position >> 3] |= 1 << (position & 7)
+        return result | int.from_bytes(edge, "little")
+
+    def price_range(self, min_price: Optional[float], max_price: Optional[float]) -> int:
+        """Карта позиций с ценой в диапазоне [min_price, max_price].
+
+        Интервалы гистограммы, целиком попавшие в диапазон, берутся
+        целиком; цены проверяются только в крайних интервалах.
+        """
+        low = float("-inf") if min_price is None else min_price
+        high = float("inf") if max_price is None else max_price
+        prices = self._prices
+        result = 0
+        edge = bytearray((self.count + 7) // 8)
+        for bucket, bitmap in self._bitmaps["price"].items():
+            bucket_end = bucket + PRICE_BUCKET_WIDTH
+            if bucket_end <= low or bucket > high:
+                continue
+            if low <= bucket and bucket_end <= high:
+                result |= bitmap
+                continue
+            for position in iter_positions(bitmap):
+                if low <= prices[position] <= high:
+                    edge[position >> 3] |= 1 << (position & 7)
+        return result | int.from_bytes(edge, "little")
+
+    def facet_counts(self, candidates: int) -> Dict[str, Dict[Hashable, int]]:
+        """Количество кандидатов по каждому значению каждого атрибута"""
+        counts = {}
+        for name, values in self._bitmaps.items():
+            counts[name] = {}
+            for key, bitmap in values.items():
+                count = (bitmap & candidates).bit_count()
+                if count:
+                    counts[name][key] = count
+        return counts
@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, List, Optional
+
+
+class ChangeKind(Enum):
+    """Типы изменений коллекции"""
+    ADDED = "added"
+    REMOVED = "removed"
+    UPDATED = "updated"
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    """Изменение одной записи коллекции.
+
+    index - позиция записи в момент изменения: события пакета применяются
+    по порядку, как если бы подписчик повторял изменения модели.
+    """
+    kind: ChangeKind
+    index: int
+    old: Optional[Any] = None
+    new: Optional[Any] = None
+
+
+Subscriber = Callable[[List[ChangeEvent]], None]
+
+
+class EventBus:
+    """Шина событий изменения модели.
+
+    По умолчанию подписчик получает каждое событие сразу после изменения
+    (списком из одного события), в том числе внутри пакета: индексы, к
+    которым модель обращается внутри batch_changes, не отстают от данных.
+    Подписчики с immediate=False (история, экспорт) получают одно событие
+    для одиночного изменения или все события пакета (см. batch) одним вызовом.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._immediate: List[Subscriber] = []
+        self._pending: List[ChangeEvent] = []
+        self._batch_depth = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Есть ли подписчики (без них события можно не создавать)"""
+        return bool(self._subscribers or self._immediate)
+
+    def subscribe(self, subscriber: Subscriber, immediate: bool = True) -> Callable[[], None]:
+        """Подписывает обработчик и возвращает функцию отписки"""
+        subscribers = self._immediate if immediate else self._subscribers
+        subscribers.append(subscriber)
+
+        def unsubscribe():
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    def publish(self, event: ChangeEvent) -> None:
+        """Отправляет событие подписчикам (или откладывает до конца пакета)"""
+        for subscriber in tuple(self._immediate):
+            subscriber([event])
+        if not self._subscribers:
+            return
+        if self._batch_depth:
+            self._pending.append(event)
+        else:
+            self._dispatch([event])
+
+    @contextmanager
+    def batch(self):
+        """Собирает события внутри блока и доставляет их одним списком"""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                events, self._pending = self._pending, []
+                self._dispatch(events)
+
+    def _dispatch(self, events: List[ChangeEvent]) -> None:
+        for subscriber in tuple(self._subscribers):
+            subscriber(events)
@@ -0,0 +1,248 @@
+import argparse
+import csv
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from json_codec import DECODE_ERRORS, JsonCodec
+from shoes_model import CATEGORIES_BY_VALUE, SHOE_TYPES_BY_VALUE, Shoe, ShoesModel
+
+# Содержимое пары в порядке полей Shoe: (тип, категория, цвет, цена, производитель, размер)
+Content = Tuple[str, str, str, float, str, float]
+
+FEED_FIELDS = ("shoe_type", "category", "color", "price", "manufacturer", "size")
+
+_codec = JsonCodec()
+
+# Обращение к Enum.value медленное, а содержимое считается для каждой пары каталога
+_TYPE_VALUES = {shoe_type: value for value, shoe_type in SHOE_TYPES_BY_VALUE.items()}
+_CATEGORY_VALUES = {category: value for value, category in CATEGORIES_BY_VALUE.items()}
+
+
+def shoe_content(shoe: Shoe) -> Content:
+    """Содержимое пары каталога (сравнивается с записью фида)"""
+    return (_TYPE_VALUES[shoe.shoe_type], _CATEGORY_VALUES[shoe.category], shoe.color,
+            shoe.price, shoe.manufacturer, shoe.size)
+
+
+def identity(content: Content) -> Tuple:
+    """Товар без цены: пара того же товара с другой ценой - это обновление, а не новая пара"""
+    return content[:3] + content[4:]
+
+
+@dataclass
+class SyncSummary:
+    """Итог синхронизации с фидом поставщика"""
+    total: int = 0
+    unchanged: int = 0
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    dry_run: bool = False
+    applied: bool = False
+    seconds: float = 0.0
+
+    def summary(self, limit: int = 20) -> str:
+        """Текстовый отчет; из ошибок показываются первые limit"""
+        if self.applied:
+            status = "изменения применены"
+        elif self.dry_run:
+            status = "проверка без применения"
+        else:
+            status = "изменения не применены из-за ошибок в фиде"
+        lines = [
+            f"Записей в фиде: {self.total}, без изменений: {self.unchanged}",
+            f"Добавлено: {self.inserted}, обновлено: {self.updated}, удалено: {self.removed} ({status})",
+            f"Время: {self.seconds:.2f} с",
+        ]
+        if self.errors:
+            lines.append(f"Ошибки ({len(self.errors)}):")
+            lines.extend(f"  строка {number}: {message}" for number, message in self.errors[:limit])
+            if len(self.errors) > limit:
+                lines.append(f"  ... и еще {len(self.errors) - limit}")
+        return "\n".join(lines)
+
+
+# ========== Чтение фида ==========
+
+def read_feed(filename: str) -> Iterator[Tuple[int, Any]]:
+    """Читает фид и выдает пары (номер строки, запись).
+
+    JSON Lines (.jsonl) и CSV читаются построчно, поэтому фид любого
+    размера не загружается в память целиком; JSON-массив (.json, как файл
+    каталога) разбирается сразу.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        with open(filename, "rb") as file:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    yield number, line
+    elif extension == ".csv":
+        with open(filename, encoding="utf-8-sig", newline="") as file:
+            reader = csv.DictReader(file)
+            missing = [name for name in FEED_FIELDS if name not in (reader.fieldnames or ())]
+            if missing:
+                raise ValueError(f"В CSV нет колонок: {', '.join(missing)}")
+            for row in reader:
+                yield reader.line_num, row
+    else:
+        with open(filename, "rb") as file:
+            records = _codec.loads(file.read())
+        if not isinstance(records, list):
+            raise ValueError("Ожидается JSON-массив записей обуви")
+        yield from enumerate(records, 1)
+
+
+def _number(value: Any) -> float:
+    """Число из JSON или строка с числом из CSV (true/false и null не числа)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("Цена и размер должны быть числами")
+    try:
+        return float(value)
+    except (ValueError, OverflowError):
+        raise ValueError("Цена и размер должны быть числами") from None
+
+
+def parse_record(raw: Any) -> Content:
+    """Проверяет запись фида и возвращает содержимое пары; при ошибке - ValueError"""
+    if isinstance(raw, bytes):
+        try:
+            raw = _codec.loads(raw)
+        except DECODE_ERRORS:
+            raise ValueError("Некорректный JSON") from None
+    if not isinstance(raw, dict):
+        raise ValueError("Ожидается объект с полями обуви")
+    missing = [name for name in FEED_FIELDS if name not in raw]
+    if missing:
+        raise ValueError(f"Не указано поле {missing[0]!r}")
+    shoe_type, category = raw["shoe_type"], raw["category"]
+    color, manufacturer = raw["color"], raw["manufacturer"]
+    # Значения проверяются по типу: null не должен стать цветом "None", а список - ключом словаря
+    if not isinstance(shoe_type, str) or shoe_type not in SHOE_TYPES_BY_VALUE:
+        raise ValueError(f"Неизвестный тип обуви: {shoe_type!r}")
+    if not isinstance(category, str) or category not in CATEGORIES_BY_VALUE:
+        raise ValueError(f"Неизвестная категория: {category!r}")
+    if not isinstance(color, str) or not isinstance(manufacturer, str):
+        raise ValueError("Цвет и производитель должны быть строками")
+    color, manufacturer = color.strip(), manufacturer.strip()
+    if not color or not manufacturer:
+        raise ValueError("Цвет и производитель обязательны")
+    price, size = _number(raw["price"]), _number(raw["size"])
+    if not math.isfinite(price) or not math.isfinite(size):
+        raise ValueError("Цена и размер должны быть конечными числами")
+    if price <= 0 or size <= 0:
+        raise ValueError("Цена и размер должны быть положительными")
+    return shoe_type, category, color, price, manufacturer, size
+
+
+def _make_shoe(content: Content) -> Shoe:
+    shoe_type, category, color, price, manufacturer, size = content
+    return Shoe(SHOE_TYPES_BY_VALUE[shoe_type], CATEGORIES_BY_VALUE[category], color,
+                price, manufacturer, size)
+
+
+# ========== Сравнение и применение ==========
+
+def sync_catalog(model: ShoesModel, feed: Iterable[Tuple[int, Any]],
+                 dry_run: bool = False, allow_errors: bool = False) -> SyncSummary:
+    """Приводит каталог модели к полному фиду поставщика, меняя только отличающиеся пары.
+
+    Для каждой пары каталога считается хеш содержимого, и записи фида по
+    мере чтения сопоставляются с ними: совпавшие пары не трогаются, а в
+    памяти остаются только отличия. Пара того же товара (все поля, кроме
+    цены) с новой ценой обновляется на месте, остальные отличия - это
+    добавления и удаления. Освободившиеся позиции занимают новые пары
+    (удаление и добавление превращается в обновление), а лишние позиции
+    заполняются парами из конца каталога, поэтому индексы и хранилище
+    не сдвигают позиции всего каталога, а порядок пар после синхронизации
+    может измениться. Все изменения применяются в одном batch_changes:
+    одно сохранение и одна рассылка событий.
+
+    Если в фиде есть ошибочные записи, каталог не меняется (с allow_errors
+    они пропускаются, но тогда пары, которые они описывали, будут удалены).
+    dry_run только считает отличия.
+    """
+    started = time.perf_counter()
+    summary = SyncSummary(dry_run=dry_run)
+    with model.batch_changes():
+        shoes = model.shoes
+        # Хеш содержимого -> позиции каталога с таким хешем (одинаковых пар может быть несколько)
+        positions_by_hash: Dict[int, List[int]] = {}
+        for position, shoe in enumerate(shoes):
+            positions_by_hash.setdefault(hash(shoe_content(shoe)), []).append(position)
+
+        incoming: List[Content] = []
+        for number, raw in feed:
+            summary.total += 1
+            try:
+                content = parse_record(raw)
+            except ValueError as e:
+                summary.errors.append((number, str(e)))
+                continue
+            candidates = positions_by_hash.get(hash(content))
+            # Совпадение хеша проверяется сравнением содержимого
+            match = next((i for i, position in enumerate(candidates or ())
+                          if shoe_content(shoes[position]) == content), None)
+            if match is None:
+                incoming.append(content)
+            else:
+                del candidates[match]
+                summary.unchanged += 1
+
+        # Оставшиеся пары каталога: обновляются, если в фиде есть тот же товар, иначе удаляются
+        leftover: Dict[Tuple, List[int]] = {}
+        for candidates in positions_by_hash.values():
+            for position in candidates:
+                leftover.setdefault(identity(shoe_content(shoes[position])), []).append(position)
+        updates: List[Tuple[int, Content]] = []
+        inserts: List[Content] = []
+        for content in incoming:
+            same_item = leftover.get(identity(content))
+            if same_item:
+                updates.append((same_item.pop(), content))
+            else:
+                inserts.append(content)
+        removals = sorted(position for positions in leftover.values() for position in positions)
+
+        summary.updated, summary.inserted, summary.removed = len(updates), len(inserts), len(removals)
+        if dry_run or (summary.errors and not allow_errors):
+            summary.seconds = time.perf_counter() - started
+            return summary
+
+        for position, content in updates:
+            model.update_shoe(position, _make_shoe(content))
+        # Удаленная пара уступает место новой без сдвига позиций
+        while removals and inserts:
+            model.update_shoe(removals.pop(), _make_shoe(inserts.pop()))
+        # Лишние позиции (по убыванию) заполняются последней парой каталога и удаляются с конца
+        for position in reversed(removals):
+            last = len(shoes) - 1
+            if position != last:
+                model.update_shoe(position, shoes[last])
+            model.remove_shoe(last)
+        for content in inserts:
+            model.add_shoe(_make_shoe(content))
+        summary.applied = True
+    summary.seconds = time.perf_counter() - started
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Синхронизация каталога обуви с фидом поставщика")
+    parser.add_argument("feed", help="полный фид поставщика: .jsonl, .csv или .json")
+    parser.add_argument("--data", default="shoes_data.json", help="файл данных каталога")
+    parser.add_argument("--dry-run", action="store_true", help="только показать отличия")
+    parser.add_argument("--allow-errors", action="store_true",
+                        help="применить фид, пропустив ошибочные записи")
+    args = parser.parse_args()
+
+    model = ShoesModel(args.data)
+    summary = sync_catalog(model, read_feed(args.feed), args.dry_run, args.allow_errors)
+    print(summary.summary())
+
+
+if __name__ == "__main__":
+    main()
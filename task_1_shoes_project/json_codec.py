@@ -0,0 +1,82 @@
+import gzip
+import json
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # Необязательная зависимость: без нее используется стандартный json
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Необязательная зависимость для сжатия zstd
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Ошибки, означающие поврежденный файл (orjson.JSONDecodeError - подкласс json.JSONDecodeError)
+DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError, EOFError, gzip.BadGzipFile)
+if zstandard is not None:
+    DECODE_ERRORS += (zstandard.ZstdError,)
+
+# Сжатие выбирается по расширению файла, если не задано явно
+COMPRESSION_BY_EXTENSION = {".gz": "gzip", ".zst": "zstd"}
+
+
+class JsonCodec:
+    """Кодек JSON-файлов данных: быстрый сериализатор, компактный режим, сжатие.
+
+    Если установлен orjson, он используется для чтения и записи, иначе -
+    стандартный модуль json. Сжатые файлы при чтении распознаются по
+    сигнатуре, поэтому кодек читает любой из вариантов.
+    """
+
+    def __init__(self, compact: bool = False, indent: int = 2,
+                 compression: Optional[str] = None, use_fast: bool = True):
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"Неизвестный тип сжатия: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("Для сжатия zstd установите пакет zstandard")
+        self.compact = compact
+        self.indent = indent
+        self.compression = compression
+        self.use_fast = use_fast and orjson is not None
+
+    @classmethod
+    def for_filename(cls, filename: str, **kwargs) -> 'JsonCodec':
+        """Создает кодек со сжатием, соответствующим расширению файла"""
+        compression = None
+        for extension, name in COMPRESSION_BY_EXTENSION.items():
+            if filename.lower().endswith(extension):
+                compression = name
+        return cls(compression=compression, **kwargs)
+
+    def dumps(self, data: Any) -> bytes:
+        """Сериализует данные в байты файла"""
+        if self.use_fast and (self.compact or self.indent == 2):
+            options = 0 if self.compact else orjson.OPT_INDENT_2
+            raw = orjson.dumps(data, option=options)
+        elif self.compact:
+            raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        else:
+            raw = json.dumps(data, ensure_ascii=False, indent=self.indent).encode("utf-8")
+
+        if self.compression == "gzip":
+            return gzip.compress(raw, compresslevel=6)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(raw)
+        return raw
+
+    def loads(self, payload: bytes) -> Any:
+        """Разбирает байты файла (сжатые или нет)"""
+        if payload.startswith(GZIP_MAGIC):
+            payload = gzip.decompress(payload)
+        elif payload.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise ValueError("Файл сжат zstd: установите пакет zstandard")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+
+        if self.use_fast:
+            return orjson.loads(payload)
+        return json.loads(payload.decode("utf-8"))
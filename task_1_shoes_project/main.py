@@ -17,13 +17,13 @@ def initialize_sample_data(model: ShoesModel):
     ]
 
     # Очищаем текущие данные и добавляем тестовые
-    model.shoes = sample_shoes
-    model.save_to_file()
+    model.replace_shoes(sample_shoes)
 
 
 if __name__ == "__main__":
     # Инициализация компонентов MVC
-    model = ShoesModel("shoes_data.json")
+    # Данные загружаются в фоне: меню доступно сразу, а действия с каталогом дождутся загрузки
+    model = ShoesModel("shoes_data.json", background=True, persist_indexes=True)
     controller = ShoesController(model)
     view = ShoesView(controller)
 
@@ -32,7 +32,6 @@ if __name__ == "__main__":
 
     # Запуск приложения
     print("Загрузка данных об обуви...")
-    print(f"Загружено {model.get_total_count()} пар обуви")
 
     # Запуск главного меню
     view.display_main_menu()
@@ -56,12 +55,12 @@ def initialize_sample_data(model: ShoesModel):
     ]
 
     # Очищаем текущие данные и добавляем тестовые
-    model.shoes = sample_shoes
-    model.save_to_file()
+    model.replace_shoes(sample_shoes)
 
 if __name__ == "__main__":
     # Инициализация компонентов MVC
-    model = ShoesModel("shoes_data.json")
+    # Данные загружаются в фоне: меню доступно сразу, а действия с каталогом дождутся загрузки
+    model = ShoesModel("shoes_data.json", background=True, persist_indexes=True)
     controller = ShoesController(model)
     view = ShoesView(controller)
 
@@ -70,7 +69,6 @@ if __name__ == "__main__":
 
     # Запуск приложения
     print("Загрузка данных об обуви...")
-    print(f"Загружено {model.get_total_count()} пар обуви")
 
     # Запуск главного меню
     view.display_main_menu()
\ No newline at end of file
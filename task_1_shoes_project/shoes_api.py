@@ -0,0 +1,325 @@
+import argparse
+import hashlib
+import re
+import threading
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from json_codec import DECODE_ERRORS, JsonCodec
+from shoes_controller import ShoesController
+from shoes_model import CATEGORIES_BY_VALUE, SHOE_TYPES_BY_VALUE, ShoesModel
+
+DEFAULT_ROLE = "customer"
+ROLE_HEADER = "X-User-Role"
+DEFAULT_PAGE_SIZE = 100
+MAX_BATCH_OPERATIONS = 1000
+
+SHOE_PATH = re.compile(r"^/shoes/(\d+)$")
+
+# Параметры запроса, которые передаются в фильтры find_shoes / facets
+FLOAT_FILTERS = ("min_size", "max_size", "min_price", "max_price")
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая возвращается клиенту с кодом статуса"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ShoesApi:
+    """JSON API каталога обуви поверх ShoesController, независимое от транспорта.
+
+    handle() принимает метод, путь с параметрами и тело запроса и
+    возвращает (статус, данные, версия). Версия - поколение модели в
+    момент ответа, из нее HTTP-сервер строит ETag. Запросы выполняются
+    под общей блокировкой, потому что модель не потокобезопасна.
+    """
+
+    def __init__(self, controller: ShoesController):
+        self.controller = controller
+        self.model = controller.model
+        self._lock = threading.RLock()
+
+    @property
+    def version(self) -> int:
+        """Текущая версия данных каталога"""
+        return self.model.generation
+
+    def handle(self, method: str, target: str, body: Any = None,
+               user_role: str = DEFAULT_ROLE) -> Tuple[int, Any, int]:
+        """Выполняет запрос и возвращает (статус, данные, версия данных)"""
+        with self._lock:
+            try:
+                status, payload = self._dispatch(method, target, body, user_role)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception:
+                traceback.print_exc()
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Внутренняя ошибка сервера"}
+            return int(status), payload, self.model.generation
+
+    def _dispatch(self, method: str, target: str, body: Any, user_role: str) -> Tuple[HTTPStatus, Any]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if path == "/shoes":
+            if method == "GET":
+                return self._list_shoes(query, user_role)
+            if method == "POST":
+                return self._add_shoe(body, user_role)
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Метод не поддерживается")
+
+        match = SHOE_PATH.match(path)
+        if match:
+            index = int(match.group(1))
+            if method == "GET":
+                return self._result(self.controller.get_shoe_details(index, user_role),
+                                    "view_all", user_role, HTTPStatus.NOT_FOUND, lambda shoe: shoe.to_dict())
+            if method == "DELETE":
+                return self._result(self.controller.remove_shoe(index, user_role),
+                                    "remove", user_role, HTTPStatus.NOT_FOUND, lambda message: {"message": message})
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Метод не поддерживается")
+
+        if path == "/statistics" and method == "GET":
+            return self._result(self.controller.get_statistics(user_role), "view_stats", user_role,
+                                HTTPStatus.BAD_REQUEST, lambda stats: stats)
+        if path == "/facets" and method == "GET":
+            page, page_size = self._pagination(query)
+            ok, result = self.controller.facets(**self._filters(query), page=page, page_size=page_size,
+                                                user_role=user_role)
+            return self._result((ok, result), "filter", user_role, HTTPStatus.BAD_REQUEST, self._render_facets)
+        if path == "/batch" and method == "POST":
+            return self._batch(body, user_role)
+        raise ApiError(HTTPStatus.NOT_FOUND, "Ресурс не найден")
+
+    def _result(self, result: Tuple[bool, Any], action: str, user_role: str,
+                failure_status: HTTPStatus, render: Callable[[Any], Any]) -> Tuple[HTTPStatus, Any]:
+        """Переводит ответ контроллера (успех, данные) в статус и тело ответа"""
+        ok, value = result
+        if ok:
+            return HTTPStatus.OK, render(value)
+        if not self.controller.has_permission(user_role, action):
+            raise ApiError(HTTPStatus.FORBIDDEN, value)
+        raise ApiError(failure_status, value)
+
+    @staticmethod
+    def _render_facets(data: Dict) -> Dict:
+        """Готовит ответ facets к JSON: обувь - словарями, размеры - строковыми ключами"""
+        facets = dict(data["facets"], size={str(size): count for size, count in data["facets"]["size"].items()})
+        return dict(data, results=[shoe.to_dict() for shoe in data["results"]], facets=facets)
+
+    @staticmethod
+    def _pagination(query: Dict[str, str]) -> Tuple[int, int]:
+        try:
+            page = int(query.get("page", 1))
+            page_size = int(query.get("page_size", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "page и page_size должны быть целыми числами") from None
+        if page < 1 or page_size < 1:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Номер и размер страницы должны быть положительными")
+        return page, page_size
+
+    @staticmethod
+    def _filters(query: Dict[str, str]) -> Dict[str, Any]:
+        """Разбирает фильтры из параметров запроса"""
+        filters: Dict[str, Any] = {}
+        try:
+            if "type" in query:
+                filters["shoe_type"] = SHOE_TYPES_BY_VALUE[query["type"]]
+            if "category" in query:
+                filters["category"] = CATEGORIES_BY_VALUE[query["category"]]
+        except KeyError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Неизвестное значение {e}") from None
+        for name in ("manufacturer", "color"):
+            if name in query:
+                filters[name] = query[name]
+        for name in FLOAT_FILTERS:
+            if name in query:
+                try:
+                    filters[name] = float(query[name])
+                except ValueError:
+                    raise ApiError(HTTPStatus.BAD_REQUEST, f"Параметр {name} должен быть числом") from None
+        return filters
+
+    def _list_shoes(self, query: Dict[str, str], user_role: str) -> Tuple[HTTPStatus, Any]:
+        page, page_size = self._pagination(query)
+        filters = self._filters(query)
+        if "sort" in query:
+            descending = query.get("order", "asc") == "desc"
+            ok, shoes = self.controller.get_sorted_shoes(query["sort"], descending, filters, user_role)
+            if not ok:
+                action = "filter" if filters else "view_all"
+                forbidden = not self.controller.has_permission(user_role, action)
+                raise ApiError(HTTPStatus.FORBIDDEN if forbidden else HTTPStatus.BAD_REQUEST, shoes)
+        elif filters:
+            ok, shoes = self.controller.find_shoes(**filters, user_role=user_role)
+            if not ok:
+                raise ApiError(HTTPStatus.FORBIDDEN, shoes)
+        else:
+            ok, shoes = self.controller.get_all_shoes(user_role)
+            if not ok:
+                raise ApiError(HTTPStatus.FORBIDDEN, shoes)
+        start = (page - 1) * page_size
+        return HTTPStatus.OK, {
+            "items": [shoe.to_dict() for shoe in shoes[start:start + page_size]],
+            "total": len(shoes),
+            "page": page,
+            "page_size": page_size,
+        }
+
+    def _add_shoe(self, body: Any, user_role: str) -> Tuple[HTTPStatus, Any]:
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Ожидается JSON-объект с полями обуви")
+        try:
+            arguments = (SHOE_TYPES_BY_VALUE[body["shoe_type"]], CATEGORIES_BY_VALUE[body["category"]],
+                         str(body["color"]), float(body["price"]), str(body["manufacturer"]),
+                         float(body["size"]))
+        except KeyError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Не указано или неизвестно значение {e}") from None
+        except (TypeError, ValueError):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Цена и размер должны быть числами") from None
+
+        ok, message = self.controller.add_shoe(*arguments, user_role=user_role)
+        if not ok:
+            status = HTTPStatus.BAD_REQUEST
+            if not self.controller.has_permission(user_role, "add"):
+                status = HTTPStatus.FORBIDDEN
+            raise ApiError(status, message)
+        return HTTPStatus.CREATED, {"message": message, "index": self.model.get_total_count() - 1}
+
+    def _batch(self, body: Any, user_role: str) -> Tuple[HTTPStatus, Any]:
+        """Выполняет список операций за один запрос; изменения сохраняются один раз"""
+        operations = body.get("operations") if isinstance(body, dict) else body
+        if not isinstance(operations, list):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Ожидается список операций")
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                           f"Не больше {MAX_BATCH_OPERATIONS} операций в пакете")
+
+        results: List[Dict] = []
+        with self.model.batch_changes():
+            for operation in operations:
+                if not isinstance(operation, dict) or "path" not in operation:
+                    results.append({"status": int(HTTPStatus.BAD_REQUEST),
+                                    "body": {"error": "Операция должна содержать path"}})
+                    continue
+                method = str(operation.get("method", "GET")).upper()
+                path = str(operation["path"])
+                if urlsplit(path).path.rstrip("/") == "/batch":
+                    results.append({"status": int(HTTPStatus.BAD_REQUEST),
+                                    "body": {"error": "Вложенные пакеты не поддерживаются"}})
+                    continue
+                try:
+                    status, payload = self._dispatch(method, path, operation.get("body"), user_role)
+                except ApiError as e:
+                    status, payload = e.status, {"error": str(e)}
+                results.append({"status": int(status), "body": payload})
+        return HTTPStatus.OK, {"results": results}
+
+
+class ShoesRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP/1.1: соединения переиспользуются (keep-alive), GET поддерживает ETag"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ShoesApi/1.0"
+    timeout = 30  # Простаивающее keep-alive соединение закрывается через 30 секунд
+    # Заголовки и тело уходят отдельными записями: без TCP_NODELAY ответ ждет подтверждения
+    disable_nagle_algorithm = True
+    error_content_type = "application/json; charset=utf-8"
+    error_message_format = '{"error": "%(code)d %(message)s"}'
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method: str) -> None:
+        api: ShoesApi = self.server.api
+        codec: JsonCodec = self.server.codec
+
+        body = None
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Тело нельзя отделить от следующего запроса, поэтому соединение закрывается
+            self.close_connection = True
+            self._send(HTTPStatus.BAD_REQUEST, codec.dumps({"error": "Некорректный Content-Length"}))
+            return
+        if length:
+            try:
+                body = codec.loads(self.rfile.read(length))
+            except DECODE_ERRORS:
+                self._send(HTTPStatus.BAD_REQUEST, codec.dumps({"error": "Некорректный JSON"}))
+                return
+
+        # Запрос выполняется до проверки If-None-Match: роль и права проверяются всегда,
+        # и 304 получает только тот, кому тот же ответ был бы отдан с кодом 200
+        role = self.headers.get(ROLE_HEADER, DEFAULT_ROLE)
+        status, payload, version = api.handle(method, self.path, body, role)
+        etag = self._etag(version, self.path, role) if method == "GET" and status == HTTPStatus.OK else None
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self._send(HTTPStatus.NOT_MODIFIED, b"", etag=etag)
+            return
+        self._send(status, codec.dumps(payload), etag=etag)
+
+    @staticmethod
+    def _etag(version: int, target: str, role: str) -> str:
+        """Валидатор ответа: версия данных и хеш пути с параметрами и роли"""
+        digest = hashlib.blake2b(f"{role}\n{target}".encode("utf-8"), digest_size=8).hexdigest()
+        return f'"{version}-{digest}"'
+
+    def _send(self, status: int, payload: bytes, etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+
+def create_server(controller: ShoesController, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """Создает HTTP-сервер JSON API (запуск - serve_forever())"""
+    server = ThreadingHTTPServer((host, port), ShoesRequestHandler)
+    server.daemon_threads = True
+    server.api = ShoesApi(controller)
+    server.codec = JsonCodec(compact=True)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON API каталога обуви")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data", default="shoes_data.json", help="файл данных каталога")
+    args = parser.parse_args()
+
+    server = create_server(ShoesController(ShoesModel(args.data)), args.host, args.port)
+    print(f"JSON API каталога обуви: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
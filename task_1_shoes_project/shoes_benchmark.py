@@ -0,0 +1,192 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from shoes_model import ShoesModel, Shoe, ShoeType, ShoeCategory
+from shoes_controller import ShoesController
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+COLORS = ["черный", "белый", "красный", "синий", "коричневый", "бежевый",
+          "розовый", "серый", "зеленый", "желтый"]
+MANUFACTURERS = ["Nike", "Adidas", "Puma", "Gucci", "Timberland", "Zara",
+                 "Geox", "HomeWear", "Ecco", "Reebok", "Asics", "Salomon"]
+
+
+def generate_shoes(count: int, seed: int = 42) -> List[Shoe]:
+    """Генерирует воспроизводимый набор обуви"""
+    rng = random.Random(seed)
+    shoe_types = list(ShoeType)
+    categories = list(ShoeCategory)
+    return [
+        Shoe(
+            rng.choice(shoe_types),
+            rng.choice(categories),
+            rng.choice(COLORS),
+            round(rng.uniform(500, 30000), 2),
+            rng.choice(MANUFACTURERS),
+            rng.randrange(70, 96) / 2,
+        )
+        for _ in range(count)
+    ]
+
+
+def write_dataset(filename: str, shoes: List[Shoe]) -> None:
+    """Записывает набор обуви в файл в формате модели"""
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump([shoe.to_dict() for shoe in shoes], file, ensure_ascii=False, indent=4)
+
+
+def measure(func: Callable[[], object], repeat: int, items: int = 1) -> Dict:
+    """Замеряет задержки, пропускную способность и пиковую память операции"""
+    latencies = []
+    result_size = None
+    gc.collect()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+        if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+            # Методы контроллера возвращают (успех, данные): размер - у данных
+            _, result = result
+        if hasattr(result, "__len__") and not isinstance(result, str):
+            result_size = len(result)
+
+    # Память замеряется отдельным прогоном, чтобы tracemalloc не искажал время
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "repeat": repeat,
+        "items_per_call": items,
+        "result_size": result_size,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 4),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 4),
+        "throughput_per_s": round(repeat * items / total, 2) if total else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def measure_dataset_memory(filename: str, count: int) -> Dict:
+    """Замеряет память, которую удерживает загруженный набор данных"""
+    gc.collect()
+    tracemalloc.start()
+    model = ShoesModel(filename)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return {
+        "records": count,
+        "retained_bytes": retained,
+        "bytes_per_record": round(retained / count, 1) if count else None,
+        "load_peak_bytes": peak,
+    }
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Вычисляет перцентиль по отсортированному списку"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_benchmarks(count: int, repeat: int, add_samples: int, seed: int) -> Dict:
+    """Запускает все замеры на наборе заданного размера"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "shoes_data.json")
+        write_dataset(filename, generate_shoes(count, seed))
+        results["dataset_memory"] = measure_dataset_memory(filename, count)
+
+        model = ShoesModel(filename)
+        controller = ShoesController(model)
+        role = "admin"
+
+        def load():
+            model.shoes = []
+            model.load_from_file()
+            return model.shoes
+
+        results["load_from_file"] = measure(load, repeat, count)
+        results["save_to_file"] = measure(model.save_to_file, repeat, count)
+
+        records = model.storage.load()
+        results["decode_from_dict"] = measure(
+            lambda: [Shoe.from_dict(record) for record in records], repeat, count)
+        results["decode_load_many"] = measure(lambda: ShoesModel.load_many(records), repeat, count)
+        del records
+
+        new_shoes = iter(generate_shoes(add_samples * 2 + 2, seed + 1))
+        results["add_shoe"] = measure(
+            lambda: controller.add_shoe(*_shoe_args(next(new_shoes)), user_role=role),
+            add_samples)
+
+        results["get_shoes_by_type"] = measure(
+            lambda: controller.get_shoes_by_type(ShoeType.WOMEN, role), repeat)
+        results["get_shoes_by_category"] = measure(
+            lambda: controller.get_shoes_by_category(ShoeCategory.SNEAKERS, role), repeat)
+        results["get_shoes_by_manufacturer"] = measure(
+            lambda: controller.get_shoes_by_manufacturer("nike", role), repeat)
+        results["get_shoes_in_price_range"] = measure(
+            lambda: controller.get_shoes_in_price_range(3000, 8000, role), repeat)
+        results["get_statistics"] = measure(
+            lambda: controller.get_statistics(role), repeat)
+    return results
+
+
+def _shoe_args(shoe: Shoe) -> tuple:
+    """Раскладывает обувь в аргументы ShoesController.add_shoe"""
+    return shoe.shoe_type, shoe.category, shoe.color, shoe.price, shoe.manufacturer, shoe.size
+
+
+def main(argv: List[str] = None) -> None:
+    """Точка входа бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк каталога обуви")
+    parser.add_argument("--scale", choices=SCALES, nargs="+", default=["1k"],
+                        help="Размеры синтетического набора данных")
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов на операцию")
+    parser.add_argument("--add-samples", type=int, default=5,
+                        help="Количество добавлений (каждое перезаписывает файл)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "suite": "shoes",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "scales": {},
+    }
+    for scale in args.scale:
+        report["scales"][scale] = run_benchmarks(SCALES[scale], args.repeat, args.add_samples, args.seed)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,50 @@
-from typing import List, Optional, Tuple
-from shoes_model import ShoesModel, Shoe, ShoeType, ShoeCategory
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple
+from access_control import AccessControl, requires_permission
+from record_view import RecordView
+from shoes_model import SORT_KEYS, ShoesModel, Shoe, ShoeType, ShoeCategory
+
+if TYPE_CHECKING:
+    # Нужен только для аннотации: модуль синхронизации загружается при первом использовании
+    from feed_sync import SyncSummary
+
 
 class ShoesController:
     USER_ROLES = {
-        "admin": ["add", "remove", "view_all", "view_stats", "edit"],
-        "manager": ["add", "view_all", "view_stats"],
+        "admin": ["add", "remove", "view_all", "view_stats", "edit", "filter"],
+        "manager": ["add", "view_all", "view_stats", "filter"],
         "customer": ["view_all", "filter"]
     }
 
+    # Фильтры, которые можно сочетать с сортировкой (параметры find_shoes)
+    SORT_FILTERS = ("shoe_type", "category", "manufacturer", "color",
+                    "min_size", "max_size", "min_price", "max_price")
+
     def __init__(self, model: ShoesModel):
-        self.model = model
+        self._model = model
+        self.access_control = AccessControl(self.USER_ROLES)
+
+    @property
+    def model(self) -> ShoesModel:
+        """Модель; при фоновой загрузке ждет, пока данные будут готовы"""
+        self._model.wait_until_ready()
+        return self._model
+
+    def is_ready(self) -> bool:
+        """Загружены ли данные (не блокирует, в отличие от обращения к model)"""
+        return self._model.is_ready
+
+    def has_permission(self, user_role: str, action: str) -> bool:
+        """Проверяет, есть ли у роли право на действие"""
+        return self.access_control.is_allowed(user_role, action)
+
+    def get_denial_stats(self) -> Dict[str, int]:
+        """Получает количество отказов в доступе по действиям"""
+        return self.access_control.get_denial_stats()
 
+    @requires_permission("add")
     def add_shoe(self, shoe_type: ShoeType, category: ShoeCategory, color: str,
                  price: float, manufacturer: str, size: float, user_role: str = "customer") -> Tuple[bool, str]:
         """Добавляет новую пару обуви"""
-        if user_role not in ["admin", "manager"]:
-            return False, "Доступ запрещен: недостаточно прав"
-
         try:
             shoe = Shoe(shoe_type, category, color, price, manufacturer, size)
             self.model.add_shoe(shoe)
@@ -24,50 +52,116 @@ class ShoesController:
         except ValueError as e:
             return False, f"Ошибка при добавлении: {str(e)}"
 
+    @requires_permission("remove", "Доступ запрещен: только администратор может удалять")
     def remove_shoe(self, index: int, user_role: str = "customer") -> Tuple[bool, str]:
         """Удаляет обувь по индексу"""
-        if user_role != "admin":
-            return False, "Доступ запрещен: только администратор может удалять"
-
         removed_shoe = self.model.remove_shoe(index)
         if removed_shoe:
             return True, f"Обувь удалена: {removed_shoe}"
         return False, "Обувь с таким индексом не найдена"
 
-    def get_all_shoes(self, user_role: str = "customer") -> Tuple[bool, List[Shoe] | str]:
-        """Получает весь список обуви"""
-        if user_role not in self.USER_ROLES:
-            return False, "Доступ запрещен: неизвестная роль"
-
-        if "view_all" not in self.USER_ROLES[user_role]:
-            return False, "Доступ запрещен: недостаточно прав"
+    @requires_permission("edit", "Доступ запрещен: только администратор может синхронизировать каталог")
+    def sync_feed(self, filename: str, dry_run: bool = False, allow_errors: bool = False,
+                  user_role: str = "customer") -> "Tuple[bool, SyncSummary | str]":
+        """Синхронизирует каталог с фидом поставщика; возвращает сводку изменений или текст ошибки"""
+        try:
+            return True, self.model.sync_feed(filename, dry_run, allow_errors)
+        except OSError as e:
+            return False, f"Не удалось прочитать фид: {e}"
+        except ValueError as e:
+            return False, str(e)
 
-        shoes = self.model.shoes
-        if not shoes:
-            return True, []
-        return True, shoes
+    @requires_permission("view_all")
+    def get_all_shoes(self, user_role: str = "customer") -> Tuple[bool, RecordView | str]:
+        """Получает весь каталог как представление только для чтения (без копирования)"""
+        return True, self.model.view_all()
 
-    def get_shoes_by_type(self, shoe_type: ShoeType) -> List[Shoe]:
+    @requires_permission("filter")
+    def get_shoes_by_type(self, shoe_type: ShoeType, user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
         """Получает обувь по типу"""
-        return self.model.get_shoes_by_type(shoe_type)
+        return True, self.model.get_shoes_by_type(shoe_type)
 
-    def get_shoes_by_category(self, category: ShoeCategory) -> List[Shoe]:
+    @requires_permission("filter")
+    def get_shoes_by_category(self, category: ShoeCategory, user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
         """Получает обувь по категории"""
-        return self.model.get_shoes_by_category(category)
+        return True, self.model.get_shoes_by_category(category)
 
-    def get_shoes_by_manufacturer(self, manufacturer: str) -> List[Shoe]:
+    @requires_permission("filter")
+    def get_shoes_by_manufacturer(self, manufacturer: str, user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
         """Получает обувь по производителю"""
-        return self.model.get_shoes_by_manufacturer(manufacturer)
+        return True, self.model.get_shoes_by_manufacturer(manufacturer)
 
-    def get_shoes_in_price_range(self, min_price: float, max_price: float) -> List[Shoe]:
+    @requires_permission("filter")
+    def get_shoes_in_price_range(self, min_price: float, max_price: float, user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
         """Получает обувь в диапазоне цен"""
-        return self.model.get_shoes_in_price_range(min_price, max_price)
+        return True, self.model.get_shoes_in_price_range(min_price, max_price)
+
+    @requires_permission("filter")
+    def get_shoes_in_size_range(self, min_size: float, max_size: float, user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
+        """Получает обувь в диапазоне размеров"""
+        return True, self.model.get_shoes_in_size_range(min_size, max_size)
+
+    @requires_permission("filter")
+    def get_shoes_by_color(self, color: str, user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
+        """Получает обувь по цвету"""
+        return True, self.model.get_shoes_by_color(color)
+
+    @requires_permission("filter")
+    def find_shoes(self, shoe_type: Optional[ShoeType] = None, category: Optional[ShoeCategory] = None,
+                   manufacturer: Optional[str] = None, color: Optional[str] = None,
+                   min_size: Optional[float] = None, max_size: Optional[float] = None,
+                   min_price: Optional[float] = None, max_price: Optional[float] = None,
+                   user_role: str = "customer") -> Tuple[bool, Sequence[Shoe] | str]:
+        """Получает обувь по любому сочетанию фильтров"""
+        return True, self.model.find_shoes(shoe_type=shoe_type, category=category, manufacturer=manufacturer,
+                                           color=color, min_size=min_size, max_size=max_size,
+                                           min_price=min_price, max_price=max_price)
+
+    @requires_permission("filter")
+    def facets(self, shoe_type: Optional[ShoeType] = None, category: Optional[ShoeCategory] = None,
+               manufacturer: Optional[str] = None, color: Optional[str] = None,
+               min_size: Optional[float] = None, max_size: Optional[float] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               page: int = 1, page_size: int = 20, user_role: str = "customer") -> Tuple[bool, dict | str]:
+        """Возвращает страницу отфильтрованной обуви вместе с фасетами и гистограммой цен"""
+        if page < 1 or page_size < 1:
+            return False, "Номер и размер страницы должны быть положительными"
+        shoes, counts = self.model.facet_search(
+            shoe_type=shoe_type, category=category, manufacturer=manufacturer, color=color,
+            min_size=min_size, max_size=max_size, min_price=min_price, max_price=max_price)
+        start = (page - 1) * page_size
+        return True, {
+            "results": shoes[start:start + page_size],
+            "total": len(shoes),
+            "page": page,
+            "page_size": page_size,
+            "facets": counts,
+        }
 
+    @requires_permission("view_all")
+    def get_sorted_shoes(self, sort_by: str = "price", descending: bool = False,
+                         filters: Optional[Dict] = None,
+                         user_role: str = "customer") -> Tuple[bool, RecordView | str]:
+        """Получает обувь, отсортированную по цене, размеру или производителю.
+
+        filters - необязательные фильтры из SORT_FILTERS, например
+        {"color": "черный", "min_size": 42}. Возвращает представление,
+        страница берется срезом без пересортировки каталога.
+        """
+        if sort_by not in SORT_KEYS:
+            return False, f"Сортировка возможна по: {', '.join(SORT_KEYS)}"
+        filters = filters or {}
+        unknown = set(filters) - set(self.SORT_FILTERS)
+        if unknown:
+            return False, f"Неизвестные фильтры: {', '.join(sorted(unknown))}"
+        if filters and not self.has_permission(user_role, "filter"):
+            self.access_control.record_denial("filter")
+            return False, "Доступ запрещен: недостаточно прав для фильтрации"
+        return True, self.model.sorted_shoes(sort_by, descending, **filters)
+
+    @requires_permission("view_stats")
     def get_statistics(self, user_role: str = "customer") -> Tuple[bool, dict | str]:
         """Получает статистику по обуви"""
-        if user_role not in ["admin", "manager"]:
-            return False, "Доступ запрещен: недостаточно прав"
-
         stats = {
             "total_count": self.model.get_total_count(),
             "average_price": self.model.get_average_price(),
@@ -76,7 +170,8 @@ class ShoesController:
         }
         return True, stats
 
-    def get_shoe_details(self, index: int) -> Tuple[bool, Optional[Shoe] | str]:
+    @requires_permission("view_all")
+    def get_shoe_details(self, index: int, user_role: str = "customer") -> Tuple[bool, Optional[Shoe] | str]:
         """Получает детали обуви по индексу"""
         shoe = self.model.get_shoe_at_index(index)
         if shoe:
@@ -1,6 +1,16 @@
-import json
-from typing import List, Dict, Optional
+import gc
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Dict, Optional, Sequence, Tuple
 from enum import Enum
+from attribute_index import PRICE_BUCKET_WIDTH, AttributeIndex, BitmapPositions, iter_positions, normalize_color
+from events import ChangeEvent, ChangeKind, EventBus
+from index_cache import BackgroundLoader, IndexCache, records_checksum
+from json_codec import JsonCodec
+from record_view import LazyPositions, RecordView
+from sort_index import OrderIndex, collation_key
+from shoes_storage import ShoesStorage, create_storage
 
 class ShoeType(Enum):
     MEN = "мужская"
@@ -17,13 +27,16 @@ class ShoeCategory(Enum):
 
 
 class Shoe:
+    # Без __dict__ у каждого объекта: каталог хранит сотни тысяч экземпляров
+    __slots__ = ("shoe_type", "category", "color", "price", "manufacturer", "size")
+
     def __init__(self, shoe_type: ShoeType, category: ShoeCategory, color: str,
                  price: float, manufacturer: str, size: float):
         self.shoe_type = shoe_type
         self.category = category
-        self.color = color
+        self.color = sys.intern(color)
         self.price = price
-        self.manufacturer = manufacturer
+        self.manufacturer = sys.intern(manufacturer)
         self.size = size
 
     def to_dict(self) -> Dict:
@@ -55,56 +68,365 @@ class Shoe:
                 f"производитель: {self.manufacturer}, цена: {self.price}₽")
 
 
+# Таблицы значение -> элемент перечисления для быстрого разбора при загрузке
+SHOE_TYPES_BY_VALUE = {shoe_type.value: shoe_type for shoe_type in ShoeType}
+CATEGORIES_BY_VALUE = {category.value: category for category in ShoeCategory}
+
+# Ключи сортировки каталога: вычисляются один раз для каждой записи (см. OrderIndex)
+SORT_KEYS = {
+    "price": lambda shoe: shoe.price,
+    "size": lambda shoe: shoe.size,
+    "manufacturer": lambda shoe: collation_key(shoe.manufacturer),
+}
+
+# Если под фильтр попадает меньше этой доли каталога, найденные позиции сортируются
+# напрямую; иначе упорядочение перебирается с проверкой по битовой карте
+SORT_CANDIDATES_SHARE = 1 / 8
+
+
 class ShoesModel:
-    def __init__(self, filename: str = "shoes_data.json"):
-        self.filename = filename
+    def __init__(self, filename: str = "shoes_data.json", storage: Optional[ShoesStorage] = None,
+                 codec: Optional[JsonCodec] = None, background: bool = False,
+                 persist_indexes: bool = False):
+        self.storage = storage if storage is not None else create_storage(filename, codec)
+        self.filename = self.storage.filename
         self.shoes: List[Shoe] = []
-        self.load_from_file()
+        self.events = EventBus()
+        self._batch_depth = 0
+        self._has_unsaved_changes = False
+        self._attribute_index: Optional[AttributeIndex] = None
+        self._unsubscribe_index = None
+        self._order_indexes: Dict[str, Tuple[OrderIndex, Callable[[], None]]] = {}
+        # Список, по которому построены индексы (замена self.shoes напрямую их сбрасывает)
+        self._indexed_shoes = self.shoes
+        # Изменения коллекции и построение индекса не должны пересекаться (индекс греется в фоне)
+        self._lock = threading.RLock()
+        # Версия данных: увеличивается при каждом изменении коллекции
+        self.generation = 0
+        # Построенный индекс сохраняется рядом с файлом данных для теплого старта
+        self.index_cache = IndexCache(self.filename) if persist_indexes else None
+        self._data_checksum: Optional[str] = None
+        self._loaded_generation = 0
+        self.loader: Optional[BackgroundLoader] = None
+        if background:
+            # Меню показывается сразу, а данные и индекс готовятся в фоновом потоке
+            self.loader = BackgroundLoader(self.load_from_file, "shoes-loader",
+                                           then=self.warm_indexes).start()
+        else:
+            self.load_from_file()
 
     def load_from_file(self) -> None:
-        """Загружает данные об обуви из файла"""
+        """Загружает данные об обуви из хранилища"""
+        shoes = self.load_many(self.storage.load())
+        if self.index_cache is not None:
+            self._data_checksum = records_checksum(shoes)
+        with self._lock:
+            self.shoes = shoes
+            self.generation += 1
+            self._loaded_generation = self.generation
+            self._drop_indexes()
+
+    @property
+    def is_ready(self) -> bool:
+        """Загружены ли данные (без фоновой загрузки - всегда)"""
+        return self.loader is None or self.loader.is_ready
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Ждет окончания фоновой загрузки; False, если не дождались за timeout"""
+        return self.loader is None or self.loader.wait(timeout)
+
+    def warm_indexes(self) -> None:
+        """Заранее готовит битовые индексы, чтобы первый фильтр не ждал построения"""
+        self.attribute_index
+
+    @staticmethod
+    def load_many(records: Iterable[Dict]) -> List[Shoe]:
+        """Пакетно создает обувь из словарей формата Shoe.to_dict().
+
+        Результат совпадает с Shoe.from_dict, но объекты собираются без
+        вызова __init__, а перечисления берутся из заранее построенных
+        таблиц. Сборщик мусора на время загрузки отключается.
+        """
+        new = object.__new__
+        intern = sys.intern
+        shoe_types = SHOE_TYPES_BY_VALUE
+        categories = CATEGORIES_BY_VALUE
+        shoes = []
+        append = shoes.append
+
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
         try:
-            with open(self.filename, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                for shoe_data in data:
-                    self.shoes.append(Shoe.from_dict(shoe_data))
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.shoes = []
+            for data in records:
+                try:
+                    shoe_type = shoe_types[data["shoe_type"]]
+                    category = categories[data["category"]]
+                except KeyError as e:
+                    raise ValueError(f"Неизвестное значение {e} в записи обуви") from None
+
+                shoe = new(Shoe)
+                shoe.shoe_type = shoe_type
+                shoe.category = category
+                shoe.color = intern(data["color"])
+                shoe.price = data["price"]
+                shoe.manufacturer = intern(data["manufacturer"])
+                shoe.size = data["size"]
+                append(shoe)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        return shoes
 
     def save_to_file(self) -> None:
-        """Сохраняет данные об обуви в файл"""
-        shoes_data = [shoe.to_dict() for shoe in self.shoes]
-        with open(self.filename, 'w', encoding='utf-8') as file:
-            json.dump(shoes_data, file, ensure_ascii=False, indent=4)
+        """Полностью сохраняет данные об обуви в хранилище"""
+        with self._lock:
+            if self.shoes is not self._indexed_shoes:
+                # Коллекцию заменили напрямую (model.shoes = ...): индексы построены по старому списку
+                self._drop_indexes()
+            self.storage.save_all([shoe.to_dict() for shoe in self.shoes])
+            self.generation += 1
+
+    def replace_shoes(self, shoes: Iterable[Shoe]) -> None:
+        """Заменяет весь каталог и сохраняет его; индексы будут построены заново"""
+        with self._lock:
+            self.shoes = list(shoes)
+            self._drop_indexes()
+            self.save_to_file()
+
+    def _persist(self) -> None:
+        """Сохраняет изменение способом, который поддерживает хранилище"""
+        if self._batch_depth:
+            # Внутри batch_changes сохранение выполняется один раз в конце блока
+            self._has_unsaved_changes = True
+        elif self.storage.incremental:
+            self.storage.commit()
+        else:
+            self.save_to_file()
+
+    def _publish(self, kind: ChangeKind, index: int, old: Optional[Shoe], new: Optional[Shoe]) -> None:
+        """Отправляет событие изменения, если на модель кто-то подписан"""
+        if self.events.has_subscribers:
+            self.events.publish(ChangeEvent(kind, index, old, new))
+
+    @contextmanager
+    def batch_changes(self):
+        """Группирует изменения: одно сохранение и одна рассылка событий на весь блок"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                with self.events.batch():
+                    yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._has_unsaved_changes:
+                    self._has_unsaved_changes = False
+                    self._persist()
 
     def add_shoe(self, shoe: Shoe) -> None:
         """Добавляет новую пару обуви"""
-        self.shoes.append(shoe)
-        self.save_to_file()
+        with self._lock:
+            self.shoes.append(shoe)
+            self.generation += 1
+            self.storage.on_added(len(self.shoes) - 1, shoe.to_dict())
+            self._persist()
+            self._publish(ChangeKind.ADDED, len(self.shoes) - 1, None, shoe)
 
     def remove_shoe(self, index: int) -> Optional[Shoe]:
         """Удаляет обувь по индексу"""
-        if 0 <= index < len(self.shoes):
-            removed_shoe = self.shoes.pop(index)
-            self.save_to_file()
-            return removed_shoe
+        with self._lock:
+            if 0 <= index < len(self.shoes):
+                removed_shoe = self.shoes.pop(index)
+                self.generation += 1
+                self.storage.on_removed(index)
+                self._persist()
+                self._publish(ChangeKind.REMOVED, index, removed_shoe, None)
+                return removed_shoe
         return None
 
-    def get_shoes_by_type(self, shoe_type: ShoeType) -> List[Shoe]:
+    def update_shoe(self, index: int, shoe: Shoe) -> bool:
+        """Заменяет обувь по индексу"""
+        with self._lock:
+            if 0 <= index < len(self.shoes):
+                old_shoe = self.shoes[index]
+                self.shoes[index] = shoe
+                self.generation += 1
+                self.storage.on_updated(index, shoe.to_dict())
+                self._persist()
+                self._publish(ChangeKind.UPDATED, index, old_shoe, shoe)
+                return True
+        return False
+
+    def sync_feed(self, filename: str, dry_run: bool = False, allow_errors: bool = False):
+        """Синхронизирует каталог с полным фидом поставщика (см. feed_sync.sync_catalog)"""
+        from feed_sync import read_feed, sync_catalog
+
+        return sync_catalog(self, read_feed(filename), dry_run, allow_errors)
+
+    def _at_positions(self, positions: Sequence[int]) -> RecordView:
+        """Представление обуви по найденным позициям (без копирования записей)"""
+        return RecordView(self.shoes, positions, self)
+
+    def view_all(self) -> RecordView:
+        """Живое представление всего каталога только для чтения"""
+        return RecordView(self.shoes)
+
+    def get_shoes_by_type(self, shoe_type: ShoeType) -> Sequence[Shoe]:
         """Получает обувь по типу"""
-        return [shoe for shoe in self.shoes if shoe.shoe_type == shoe_type]
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_by_type(shoe_type.value))
+        return self.find_shoes(shoe_type=shoe_type)
 
-    def get_shoes_by_category(self, category: ShoeCategory) -> List[Shoe]:
+    def get_shoes_by_category(self, category: ShoeCategory) -> Sequence[Shoe]:
         """Получает обувь по категории"""
-        return [shoe for shoe in self.shoes if shoe.category == category]
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_by_category(category.value))
+        return self.find_shoes(category=category)
 
-    def get_shoes_by_manufacturer(self, manufacturer: str) -> List[Shoe]:
+    def get_shoes_by_manufacturer(self, manufacturer: str) -> Sequence[Shoe]:
         """Получает обувь по производителю"""
-        return [shoe for shoe in self.shoes if shoe.manufacturer.lower() == manufacturer.lower()]
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_by_manufacturer(manufacturer))
+        return self.find_shoes(manufacturer=manufacturer)
 
-    def get_shoes_in_price_range(self, min_price: float, max_price: float) -> List[Shoe]:
+    def get_shoes_in_price_range(self, min_price: float, max_price: float) -> Sequence[Shoe]:
         """Получает обувь в диапазоне цен"""
-        return [shoe for shoe in self.shoes if min_price <= shoe.price <= max_price]
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_in_price_range(min_price, max_price))
+        return self.find_shoes(min_price=min_price, max_price=max_price)
+
+    def get_shoes_in_size_range(self, min_size: float, max_size: float) -> Sequence[Shoe]:
+        """Получает обувь в диапазоне размеров"""
+        return self.find_shoes(min_size=min_size, max_size=max_size)
+
+    def get_shoes_by_color(self, color: str) -> Sequence[Shoe]:
+        """Получает обувь по цвету (с учетом формы слова: "черные" = "черный")"""
+        return self.find_shoes(color=color)
+
+    @property
+    def attribute_index(self) -> AttributeIndex:
+        """Битовые индексы атрибутов: строятся (или читаются с диска) при первом обращении
+        и обновляются по событиям"""
+        index = self._attribute_index
+        if index is None:
+            with self._lock:
+                if self._attribute_index is None:
+                    self._attribute_index = self._load_or_build_index()
+                    self._unsubscribe_index = self.events.subscribe(self._attribute_index.apply_events)
+                index = self._attribute_index
+        return index
+
+    def _load_or_build_index(self) -> AttributeIndex:
+        """Берет индекс из файла (если данные не менялись с загрузки) или строит его"""
+        unchanged = self.index_cache is not None and self.generation == self._loaded_generation
+        if unchanged:
+            index = self.index_cache.load("attributes", self._data_checksum)
+            if index is not None and index.attach(self.shoes):
+                return index
+        index = AttributeIndex(self.shoes)
+        if unchanged:
+            self.index_cache.save("attributes", self._data_checksum, index)
+        return index
+
+    def _drop_attribute_index(self) -> None:
+        """Сбрасывает битовые индексы (они будут построены заново при запросе)"""
+        if self._attribute_index is not None:
+            self._unsubscribe_index()
+            self._attribute_index = None
+
+    def _order_index(self, sort_by: str) -> OrderIndex:
+        """Упорядочение по ключу sort_by: строится при первой сортировке и обновляется по событиям"""
+        entry = self._order_indexes.get(sort_by)
+        if entry is None:
+            with self._lock:
+                entry = self._order_indexes.get(sort_by)
+                if entry is None:
+                    index = OrderIndex(self.shoes, SORT_KEYS[sort_by])
+                    entry = self._order_indexes[sort_by] = (
+                        index, self.events.subscribe(index.apply_events))
+        return entry[0]
+
+    def _drop_order_indexes(self) -> None:
+        """Сбрасывает упорядочения (они будут построены заново при сортировке)"""
+        for _, unsubscribe in self._order_indexes.values():
+            unsubscribe()
+        self._order_indexes.clear()
+
+    def _drop_indexes(self) -> None:
+        """Сбрасывает все индексы после замены списка обуви целиком"""
+        self._indexed_shoes = self.shoes
+        self._drop_attribute_index()
+        self._drop_order_indexes()
+
+    def sorted_shoes(self, sort_by: str = "price", descending: bool = False, **filters) -> RecordView:
+        """Обувь, отсортированная по ключу из SORT_KEYS, с необязательными фильтрами find_shoes.
+
+        Возвращает представление: страница - это срез, количество известно сразу.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Неизвестный ключ сортировки: {sort_by}")
+        order = self._order_index(sort_by)
+        if all(value is None for value in filters.values()):
+            return RecordView(self.shoes, order.positions(descending), self)
+
+        candidates = self._match(**filters)
+        count = candidates.bit_count()
+        if count < len(self.shoes) * SORT_CANDIDATES_SHARE:
+            positions = order.sort_positions(iter_positions(candidates), descending)
+        else:
+            members = candidates.to_bytes((len(self.shoes) + 7) // 8, "little")
+            positions = LazyPositions(
+                order.select(lambda position: members[position >> 3] >> (position & 7) & 1, descending),
+                count)
+        return RecordView(self.shoes, positions, self)
+
+    def _match(self, shoe_type: Optional[ShoeType] = None, category: Optional[ShoeCategory] = None,
+               manufacturer: Optional[str] = None, color: Optional[str] = None,
+               min_size: Optional[float] = None, max_size: Optional[float] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None) -> int:
+        """Битовая карта позиций, подходящих под все заданные фильтры"""
+        index = self.attribute_index
+        candidates = index.all
+        filters = (("shoe_type", shoe_type), ("category", category),
+                   ("manufacturer", manufacturer.lower() if manufacturer else None),
+                   ("color", normalize_color(color) if color else None))
+        for attribute, key in filters:
+            if key is not None:
+                candidates &= index.bitmap(attribute, key)
+        if min_size is not None or max_size is not None:
+            candidates &= index.size_range(min_size, max_size)
+        if min_price is not None or max_price is not None:
+            candidates &= index.price_range(min_price, max_price)
+        return candidates
+
+    def find_shoes(self, **filters) -> RecordView:
+        """Находит обувь по любому сочетанию фильтров (см. _match) без полного перебора.
+
+        Возвращает представление: количество известно сразу, а записи
+        достаются по мере чтения.
+        """
+        return self._at_positions(BitmapPositions(self._match(**filters)))
+
+    def facet_search(self, **filters) -> Tuple[RecordView, Dict[str, Dict]]:
+        """Фильтрует обувь и считает фасеты по пересечению битовых карт.
+
+        Фильтры те же, что у find_shoes. Возвращает подходящую обувь и
+        количество по типам, категориям, производителям, цветам, размерам
+        и интервалам цен.
+        """
+        index = self.attribute_index
+        candidates = self._match(**filters)
+        counts = index.facet_counts(candidates)
+        shoes = self._at_positions(BitmapPositions(candidates))
+        return shoes, {
+            "shoe_type": {key.value: count for key, count in counts["shoe_type"].items()},
+            "category": {key.value: count for key, count in counts["category"].items()},
+            "manufacturer": counts["manufacturer"],
+            "color": counts["color"],
+            "size": dict(sorted(counts["size"].items())),
+            "price": {f"{bucket}-{bucket + PRICE_BUCKET_WIDTH}": count
+                      for bucket, count in sorted(counts["price"].items())},
+        }
 
     def get_average_price(self) -> float:
         """Вычисляет среднюю цену обуви"""
@@ -0,0 +1,242 @@
+import os
+import sqlite3
+import stat
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from json_codec import JsonCodec, DECODE_ERRORS
+
+
+# Маска прав процесса (читается один раз: os.umask меняет ее для всех потоков)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(filename: str) -> int:
+    """Права для файла, заменяющего filename: как у него, а для нового - как у open()"""
+    # mkstemp создает временный файл с правами 0600, и замена не должна их менять
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _row_bytes(values: tuple) -> int:
+    """Объем данных строки SQLite: текст в UTF-8, числа по 8 байт (без служебных страниц)"""
+    return sum(len(value.encode("utf-8")) if isinstance(value, str) else 8
+               for value in values if value is not None)
+
+
+class ShoesStorage(ABC):
+    """Базовый интерфейс хранилища обуви.
+
+    Хранилище работает со словарями в формате Shoe.to_dict(), поэтому не
+    зависит от классов модели. Позиция записи совпадает с индексом обуви
+    в ShoesModel.shoes.
+    """
+
+    # Умеет ли хранилище отвечать на запросы фильтрации само
+    supports_queries = False
+    # Применяет ли хранилище изменения построчно (иначе - полная перезапись)
+    incremental = False
+    # Сколько байт данных записало хранилище (для метрик, см. metrics.instrument_model)
+    bytes_written = 0
+
+    @abstractmethod
+    def load(self) -> List[Dict]:
+        """Загружает всю обувь"""
+
+    @abstractmethod
+    def save_all(self, records: List[Dict]) -> None:
+        """Полностью перезаписывает хранилище"""
+
+    def on_added(self, position: int, record: Dict) -> None:
+        """Вызывается после добавления обуви в модель"""
+
+    def on_removed(self, position: int) -> None:
+        """Вызывается после удаления обуви из модели"""
+
+    def on_updated(self, position: int, record: Dict) -> None:
+        """Вызывается после замены обуви на позиции position"""
+
+    def commit(self) -> None:
+        """Фиксирует построчные изменения (для инкрементальных хранилищ)"""
+
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища"""
+
+
+class JsonShoesStorage(ShoesStorage):
+    """Хранилище обуви в одном JSON-файле (по умолчанию)"""
+
+    def __init__(self, filename: str, codec: Optional[JsonCodec] = None):
+        self.filename = filename
+        # Отступ 2 (по умолчанию у кодека): такой файл orjson пишет сам, без запасного пути через json
+        self.codec = codec if codec is not None else JsonCodec.for_filename(filename)
+
+    def load(self) -> List[Dict]:
+        try:
+            with open(self.filename, 'rb') as file:
+                return self.codec.loads(file.read())
+        except (FileNotFoundError,) + DECODE_ERRORS:
+            return []
+
+    def save_all(self, records: List[Dict]) -> None:
+        """Сохраняет обувь через временный файл и атомарную замену"""
+        payload = self.codec.dumps(records)
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".shoes_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, _file_mode(self.filename))
+            os.replace(tmp_path, self.filename)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.bytes_written += len(payload)
+
+
+class SqliteShoesStorage(ShoesStorage):
+    """Хранилище обуви в SQLite (WAL и индексы по полям фильтрации).
+
+    Строка хранит позицию пары в модели, чтобы запросы возвращали
+    позиции без пересчета. Поэтому удаление сдвигает позиции всех
+    следующих строк: O(n) записей на удаление (кроме последней пары).
+    Добавление и изменение затрагивают одну строку.
+    """
+
+    supports_queries = True
+    incremental = True
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Создает таблицу и индексы, если их еще нет"""
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS shoes (
+                    id INTEGER PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    shoe_type TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    color TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    manufacturer TEXT NOT NULL,
+                    manufacturer_key TEXT NOT NULL,
+                    size REAL NOT NULL
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_shoes_position ON shoes(position);
+                CREATE INDEX IF NOT EXISTS idx_shoes_type ON shoes(shoe_type, position);
+                CREATE INDEX IF NOT EXISTS idx_shoes_category ON shoes(category, position);
+                CREATE INDEX IF NOT EXISTS idx_shoes_manufacturer ON shoes(manufacturer_key, position);
+                CREATE INDEX IF NOT EXISTS idx_shoes_price ON shoes(price);
+            """)
+
+    def load(self) -> List[Dict]:
+        rows = self.connection.execute("""
+            SELECT shoe_type, category, color, price, manufacturer, size
+            FROM shoes ORDER BY position
+        """)
+        return [
+            {
+                "shoe_type": row[0],
+                "category": row[1],
+                "color": row[2],
+                "price": row[3],
+                "manufacturer": row[4],
+                "size": row[5],
+            }
+            for row in rows
+        ]
+
+    def save_all(self, records: List[Dict]) -> None:
+        with self.connection:
+            self.connection.execute("DELETE FROM shoes")
+            for position, record in enumerate(records):
+                self._insert(position, record)
+
+    def on_added(self, position: int, record: Dict) -> None:
+        self._insert(position, record)
+
+    def on_removed(self, position: int) -> None:
+        self.connection.execute("DELETE FROM shoes WHERE position = ?", (position,))
+        # Сдвиг в два шага, чтобы не нарушить уникальный индекс по позиции
+        self.connection.execute(
+            "UPDATE shoes SET position = -position WHERE position > ?", (position,))
+        self.connection.execute(
+            "UPDATE shoes SET position = -position - 1 WHERE position < 0")
+
+    def on_updated(self, position: int, record: Dict) -> None:
+        row = (record["shoe_type"], record["category"], record["color"], record["price"],
+               record["manufacturer"], record["manufacturer"].lower(), record["size"], position)
+        self.connection.execute("""
+            UPDATE shoes SET shoe_type = ?, category = ?, color = ?, price = ?,
+                             manufacturer = ?, manufacturer_key = ?, size = ?
+            WHERE position = ?
+        """, row)
+        self.bytes_written += _row_bytes(row)
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+
+    def _insert(self, position: int, record: Dict) -> None:
+        """Вставляет запись обуви"""
+        row = (position, record["shoe_type"], record["category"], record["color"],
+               record["price"], record["manufacturer"], record["manufacturer"].lower(),
+               record["size"])
+        self.connection.execute("""
+            INSERT INTO shoes (position, shoe_type, category, color, price,
+                               manufacturer, manufacturer_key, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, row)
+        self.bytes_written += _row_bytes(row)
+
+    # ========== Запросы ==========
+
+    def _positions(self, sql: str, params: tuple) -> List[int]:
+        return [row[0] for row in self.connection.execute(sql, params)]
+
+    def find_by_type(self, shoe_type: str) -> List[int]:
+        """Позиции обуви указанного типа"""
+        return self._positions(
+            "SELECT position FROM shoes WHERE shoe_type = ? ORDER BY position", (shoe_type,))
+
+    def find_by_category(self, category: str) -> List[int]:
+        """Позиции обуви указанной категории"""
+        return self._positions(
+            "SELECT position FROM shoes WHERE category = ? ORDER BY position", (category,))
+
+    def find_by_manufacturer(self, manufacturer: str) -> List[int]:
+        """Позиции обуви производителя (без учета регистра)"""
+        return self._positions(
+            "SELECT position FROM shoes WHERE manufacturer_key = ? ORDER BY position",
+            (manufacturer.lower(),))
+
+    def find_in_price_range(self, min_price: float, max_price: float) -> List[int]:
+        """Позиции обуви в диапазоне цен"""
+        return self._positions(
+            "SELECT position FROM shoes WHERE price BETWEEN ? AND ? ORDER BY position",
+            (min_price, max_price))
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def create_storage(filename: str, codec: Optional[JsonCodec] = None) -> ShoesStorage:
+    """Выбирает хранилище по расширению файла (JSON по умолчанию)"""
+    if filename.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteShoesStorage(filename)
+    return JsonShoesStorage(filename, codec)
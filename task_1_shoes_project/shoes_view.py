@@ -8,7 +8,7 @@ class ShoesView:
 
     def set_user_role(self, role: str):
         """Устанавливает роль текущего пользователя"""
-        valid_roles = ["admin", "manager", "customer"]
+        valid_roles = list(self.controller.USER_ROLES)
         if role in valid_roles:
             self.current_user_role = role
             print(f"Роль пользователя установлена: {role}")
@@ -21,6 +21,8 @@ class ShoesView:
         print("СИСТЕМА УПРАВЛЕНИЯ КАТАЛОГОМ ОБУВИ")
         print("=" * 50)
         print(f"Текущая роль: {self.current_user_role}")
+        if not self.controller.is_ready():
+            print("Данные загружаются в фоне...")
 
     def display_all_shoes(self):
         """Отображает весь каталог обуви"""
@@ -87,7 +89,10 @@ class ShoesView:
         print("2. По категории (кроссовки, сапоги и т.д.)")
         print("3. По производителю")
         print("4. По цене (диапазон)")
-        print("5. Назад")
+        print("5. По размеру (диапазон)")
+        print("6. По цвету")
+        print("7. Сортировать каталог")
+        print("8. Назад")
 
         choice = input("Выберите опцию: ")
 
@@ -99,6 +104,12 @@ class ShoesView:
             self.display_shoes_by_manufacturer()
         elif choice == "4":
             self.display_shoes_by_price_range()
+        elif choice == "5":
+            self.display_shoes_by_size_range()
+        elif choice == "6":
+            self.display_shoes_by_color()
+        elif choice == "7":
+            self.display_sorted_shoes()
 
     def display_shoes_by_type(self):
         """Отображает обувь по типу"""
@@ -109,7 +120,10 @@ class ShoesView:
         try:
             choice = int(input("Ваш выбор: ")) - 1
             shoe_type = list(ShoeType)[choice]
-            shoes = self.controller.get_shoes_by_type(shoe_type)
+            success, shoes = self.controller.get_shoes_by_type(shoe_type, self.current_user_role)
+            if not success:
+                print(f"Ошибка: {shoes}")
+                return
 
             if shoes:
                 print(f"\n{shoe_type.value} обувь:")
@@ -129,7 +143,10 @@ class ShoesView:
         try:
             choice = int(input("Ваш выбор: ")) - 1
             category = list(ShoeCategory)[choice]
-            shoes = self.controller.get_shoes_by_category(category)
+            success, shoes = self.controller.get_shoes_by_category(category, self.current_user_role)
+            if not success:
+                print(f"Ошибка: {shoes}")
+                return
 
             if shoes:
                 print(f"\n{category.value}:")
@@ -143,7 +160,10 @@ class ShoesView:
     def display_shoes_by_manufacturer(self):
         """Отображает обувь по производителю"""
         manufacturer = input("\nВведите название производителя: ")
-        shoes = self.controller.get_shoes_by_manufacturer(manufacturer)
+        success, shoes = self.controller.get_shoes_by_manufacturer(manufacturer, self.current_user_role)
+        if not success:
+            print(f"Ошибка: {shoes}")
+            return
 
         if shoes:
             print(f"\nОбувь производителя '{manufacturer}':")
@@ -161,7 +181,10 @@ class ShoesView:
             if min_price > max_price:
                 min_price, max_price = max_price, min_price
 
-            shoes = self.controller.get_shoes_in_price_range(min_price, max_price)
+            success, shoes = self.controller.get_shoes_in_price_range(min_price, max_price, self.current_user_role)
+            if not success:
+                print(f"Ошибка: {shoes}")
+                return
 
             if shoes:
                 print(f"\nОбувь в диапазоне цен {min_price}₽ - {max_price}₽:")
@@ -172,6 +195,73 @@ class ShoesView:
         except ValueError:
             print("Неверный формат цены")
 
+    def display_shoes_by_size_range(self):
+        """Отображает обувь по диапазону размеров"""
+        try:
+            min_size = float(input("\nМинимальный размер: "))
+            max_size = float(input("Максимальный размер: "))
+
+            if min_size > max_size:
+                min_size, max_size = max_size, min_size
+
+            success, shoes = self.controller.get_shoes_in_size_range(min_size, max_size, self.current_user_role)
+            if not success:
+                print(f"Ошибка: {shoes}")
+                return
+
+            if shoes:
+                print(f"\nОбувь размеров {min_size} - {max_size}:")
+                for i, shoe in enumerate(shoes, 1):
+                    print(f"{i}. {shoe}")
+            else:
+                print(f"Обуви размеров {min_size} - {max_size} нет в наличии")
+        except ValueError:
+            print("Неверный формат размера")
+
+    def display_shoes_by_color(self):
+        """Отображает обувь по цвету"""
+        color = input("\nВведите цвет: ")
+        success, shoes = self.controller.get_shoes_by_color(color, self.current_user_role)
+        if not success:
+            print(f"Ошибка: {shoes}")
+            return
+
+        if shoes:
+            print(f"\nОбувь цвета '{color}':")
+            for i, shoe in enumerate(shoes, 1):
+                print(f"{i}. {shoe}")
+        else:
+            print(f"Обуви цвета '{color}' нет в наличии")
+
+    def display_sorted_shoes(self, page_size: int = 20):
+        """Отображает каталог, отсортированный по цене, размеру или производителю"""
+        sort_keys = {"1": "price", "2": "size", "3": "manufacturer"}
+        print("\nСортировать по:")
+        print("1. Цене")
+        print("2. Размеру")
+        print("3. Производителю")
+        sort_by = sort_keys.get(input("Выберите опцию: "))
+        if sort_by is None:
+            print("Неверный выбор")
+            return
+        descending = input("По убыванию? (y/n): ").lower() == 'y'
+
+        success, result = self.controller.get_sorted_shoes(sort_by, descending,
+                                                           user_role=self.current_user_role)
+        if not success:
+            print(f"Ошибка: {result}")
+            return
+        if not result:
+            print("Каталог пуст")
+            return
+
+        # Страница берется срезом готового упорядочения, весь каталог не пересортировывается
+        for start in range(0, len(result), page_size):
+            for i, shoe in enumerate(result[start:start + page_size], start + 1):
+                print(f"{i}. {shoe}")
+            if start + page_size < len(result) and input("Показать еще? (y/n): ").lower() != 'y':
+                break
+
     def display_statistics(self):
         """Отображает статистику"""
         success, result = self.controller.get_statistics(self.current_user_role)
@@ -219,7 +309,7 @@ class ShoesView:
         """Отображает детали конкретной обуви"""
         try:
             index = int(input("\nВведите номер обуви для просмотра деталей: ")) - 1
-            success, result = self.controller.get_shoe_details(index)
+            success, result = self.controller.get_shoe_details(index, self.current_user_role)
 
             if success:
                 shoe = result
@@ -248,11 +338,15 @@ class ShoesView:
             print("2. Фильтровать каталог")
             print("3. Просмотреть детали обуви")
 
-            if self.current_user_role in ["admin", "manager"]:
+            can_add = self.controller.has_permission(self.current_user_role, "add")
+            can_view_stats = self.controller.has_permission(self.current_user_role, "view_stats")
+            can_remove = self.controller.has_permission(self.current_user_role, "remove")
+
+            if can_add:
                 print("4. Добавить обувь")
+            if can_view_stats:
                 print("5. Просмотреть статистику")
-
-            if self.current_user_role == "admin":
+            if can_remove:
                 print("6. Удалить обувь")
 
             print("7. Сменить роль пользователя")
@@ -266,11 +360,11 @@ class ShoesView:
                 self.display_filter_options()
             elif choice == "3":
                 self.display_shoe_details()
-            elif choice == "4" and self.current_user_role in ["admin", "manager"]:
+            elif choice == "4" and can_add:
                 self.display_add_shoe_form()
-            elif choice == "5" and self.current_user_role in ["admin", "manager"]:
+            elif choice == "5" and can_view_stats:
                 self.display_statistics()
-            elif choice == "6" and self.current_user_role == "admin":
+            elif choice == "6" and can_remove:
                 self.display_remove_shoe_form()
             elif choice == "7":
                 print("\nДоступные роли:")
@@ -0,0 +1,118 @@
+import bisect
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+from events import ChangeEvent, ChangeKind
+
+# На первом уровне ё не отличается от е, как в словарях
+_PRIMARY = str.maketrans({"ё": "е"})
+
+
+def collation_key(text: str) -> Tuple[str, str, str]:
+    """Ключ сортировки строк по правилам русского алфавита.
+
+    Строки сравниваются по трем уровням (как в Unicode Collation для ru):
+    буквы без учета регистра и с ё = е, затем ё после е, затем регистр
+    (строчные раньше прописных). Простое сравнение строк ставит ё после я,
+    а прописные раньше строчных.
+    """
+    folded = text.casefold()
+    return folded.translate(_PRIMARY), folded, text.swapcase()
+
+
+class _ReversedPositions(Sequence):
+    """Позиции упорядочения в обратном порядке без копирования"""
+
+    __slots__ = ("_order",)
+
+    def __init__(self, order: List[int]):
+        self._order = order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            order = self._order
+            return [order[-1 - i] for i in range(len(order))[index]]
+        if index < 0:
+            index += len(self._order)
+        if not 0 <= index < len(self._order):
+            raise IndexError("индекс вне диапазона")
+        return self._order[-1 - index]
+
+    def __iter__(self) -> Iterator[int]:
+        return reversed(self._order)
+
+
+class OrderIndex:
+    """Упорядочение позиций модели по ключу сортировки.
+
+    Ключ каждой записи вычисляется один раз и хранится по позиции, а
+    список позиций держится отсортированным по (ключ, позиция): при
+    добавлении и изменении запись вставляется двоичным поиском, поэтому
+    отсортированная страница берется срезом без пересортировки всей
+    коллекции. Удаление сдвигает последующие позиции, как в модели.
+    """
+
+    def __init__(self, records: Iterable, key: Callable[[Any], Any]):
+        self.key = key
+        self._keys = [key(record) for record in records]
+        keys = self._keys
+        # sorted устойчива, поэтому при равных ключах позиции идут по возрастанию
+        self._order = sorted(range(len(keys)), key=keys.__getitem__)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _sort_key(self, position: int) -> Tuple[Any, int]:
+        return self._keys[position], position
+
+    # ========== Обновление индекса ==========
+
+    def apply_events(self, events: List[ChangeEvent]) -> None:
+        """Обработчик событий модели"""
+        for event in events:
+            if event.kind == ChangeKind.ADDED:
+                self.on_added(event.new)
+            elif event.kind == ChangeKind.REMOVED:
+                self.on_removed(event.index)
+            else:
+                self.on_updated(event.index, event.new)
+
+    def _locate(self, position: int) -> int:
+        """Место позиции в упорядочении"""
+        return bisect.bisect_left(self._order, self._sort_key(position), key=self._sort_key)
+
+    def on_added(self, record) -> None:
+        """Вставляет запись, добавленную в конец модели"""
+        position = len(self._keys)
+        self._keys.append(self.key(record))
+        bisect.insort(self._order, position, key=self._sort_key)
+
+    def on_removed(self, position: int) -> None:
+        """Удаляет запись с позиции position, сдвигая следующие позиции на одну"""
+        del self._order[self._locate(position)]
+        del self._keys[position]
+        if position < len(self._keys):
+            self._order = [p - 1 if p > position else p for p in self._order]
+
+    def on_updated(self, position: int, record) -> None:
+        """Переставляет запись на позиции position по новому ключу"""
+        del self._order[self._locate(position)]
+        self._keys[position] = self.key(record)
+        bisect.insort(self._order, position, key=self._sort_key)
+
+    # ========== Запросы ==========
+
+    def positions(self, descending: bool = False) -> Sequence:
+        """Все позиции в порядке сортировки (без копирования)"""
+        return _ReversedPositions(self._order) if descending else self._order
+
+    def select(self, accepts: Callable[[int], bool], descending: bool = False) -> Iterator[int]:
+        """Позиции, прошедшие проверку accepts, в порядке сортировки (по мере перебора)"""
+        order = reversed(self._order) if descending else self._order
+        return (position for position in order if accepts(position))
+
+    def sort_positions(self, positions: Iterable[int], descending: bool = False) -> List[int]:
+        """Сортирует небольшой набор позиций по сохраненным ключам"""
+        return sorted(positions, key=self._sort_key, reverse=descending)
@@ -0,0 +1,146 @@
+import csv
+import json
+
+import pytest
+
+from feed_sync import FEED_FIELDS, shoe_content, sync_catalog
+from main import initialize_sample_data
+from shoes_model import Shoe, ShoeCategory, ShoeType, ShoesModel
+
+NEW_SHOES = [
+    {"shoe_type": "мужская", "category": "кроссовки", "color": "синий", "price": 5000,
+     "manufacturer": "Puma", "size": 43},
+    {"shoe_type": "женская", "category": "сапоги", "color": "черный", "price": 6999,
+     "manufacturer": "Ecco", "size": 38},
+    {"shoe_type": "женская", "category": "сапоги", "color": "черный", "price": 6999,
+     "manufacturer": "Ecco", "size": 39},
+]
+
+
+@pytest.fixture(params=["json", "db"])
+def model(request, tmp_path):
+    model = ShoesModel(str(tmp_path / f"shoes.{request.param}"))
+    initialize_sample_data(model)
+    yield model
+    model.storage.close()
+
+
+def _records(model):
+    return [dict(zip(FEED_FIELDS, shoe_content(shoe))) for shoe in model.shoes]
+
+
+def _feed(records):
+    return list(enumerate(records, 1))
+
+
+def _catalog(model):
+    return sorted(shoe_content(shoe) for shoe in model.shoes)
+
+
+def _expected(records):
+    return sorted(tuple(float(value) if name in ("price", "size") else value
+                        for name, value in zip(FEED_FIELDS, record.values())) for record in records)
+
+
+def _check_saved(model, records):
+    assert _catalog(model) == _expected(records)
+    reloaded = ShoesModel(model.filename)
+    assert _catalog(reloaded) == _expected(records)
+    reloaded.storage.close()
+    # Повторный прогон того же фида ничего не меняет
+    summary = sync_catalog(model, _feed(records))
+    assert summary.unchanged == len(records)
+    assert (summary.inserted, summary.updated, summary.removed) == (0, 0, 0)
+
+
+def test_identical_feed_changes_nothing(model):
+    before = list(model.shoes)
+    summary = sync_catalog(model, _feed(_records(model)))
+    assert summary.applied and (summary.total, summary.unchanged) == (6, 6)
+    assert (summary.inserted, summary.updated, summary.removed) == (0, 0, 0)
+    assert all(old is new for old, new in zip(before, model.shoes))
+
+
+def test_price_change_updates_the_pair_in_place(model):
+    records = _records(model)
+    records[2]["price"] = 7500
+    others = [shoe for index, shoe in enumerate(model.shoes) if index != 2]
+
+    summary = sync_catalog(model, _feed(records))
+    assert (summary.unchanged, summary.updated, summary.inserted, summary.removed) == (5, 1, 0, 0)
+    assert model.shoes[2].price == 7500.0 and model.shoes[2].manufacturer == "Timberland"
+    assert [shoe for index, shoe in enumerate(model.shoes) if index != 2] == others
+    _check_saved(model, records)
+
+
+@pytest.mark.parametrize("kept, added", [(4, 3), (3, 1), (6, 0), (0, 2)])
+def test_inserts_and_removals(model, kept, added):
+    records = _records(model)[:kept] + NEW_SHOES[:added]
+    summary = sync_catalog(model, _feed(records))
+    assert summary.applied
+    assert (summary.unchanged, summary.inserted, summary.removed) == (kept, added, 6 - kept)
+    _check_saved(model, records)
+
+
+def test_identical_pairs_are_counted_separately(model):
+    twin = Shoe(ShoeType.MEN, ShoeCategory.SNEAKERS, "черный", 4999.99, "Nike", 42.5)
+    model.add_shoe(twin)
+    records = _records(model)
+    assert records[0] == records[-1]
+
+    summary = sync_catalog(model, _feed(records[:-1]))
+    assert (summary.unchanged, summary.removed) == (6, 1)
+    assert len(model.shoes) == 6
+
+    summary = sync_catalog(model, _feed(records + [records[0]]))
+    assert (summary.unchanged, summary.inserted) == (6, 2)
+    assert _catalog(model).count(shoe_content(twin)) == 3
+    _check_saved(model, records + [records[0]])
+
+
+def test_errors_block_the_sync_unless_allowed(model):
+    records = _records(model)[1:] + NEW_SHOES[:1]
+    feed = _feed(records) + [(7, {"shoe_type": "мужская"}), (8, dict(NEW_SHOES[1], price="дорого"))]
+    before = _catalog(model)
+
+    summary = sync_catalog(model, feed)
+    assert not summary.applied and [number for number, _ in summary.errors] == [7, 8]
+    assert (summary.inserted, summary.removed) == (1, 1)
+    assert _catalog(model) == before
+
+    summary = sync_catalog(model, feed, allow_errors=True)
+    assert summary.applied and len(summary.errors) == 2
+    _check_saved(model, records)
+
+
+def test_dry_run_only_counts_differences(model):
+    records = _records(model)[2:] + NEW_SHOES
+    records[0]["price"] = 100
+    before = _catalog(model)
+
+    summary = sync_catalog(model, _feed(records), dry_run=True)
+    assert summary.dry_run and not summary.applied
+    assert (summary.unchanged, summary.updated, summary.inserted, summary.removed) == (3, 1, 3, 2)
+    assert _catalog(model) == before
+    reloaded = ShoesModel(model.filename)
+    assert _catalog(reloaded) == before
+    reloaded.storage.close()
+
+
+@pytest.mark.parametrize("extension", ["jsonl", "csv", "json"])
+def test_sync_feed_reads_feed_files(model, tmp_path, extension):
+    records = _records(model)[1:] + NEW_SHOES[:2]
+    filename = tmp_path / f"feed.{extension}"
+    with open(filename, "w", encoding="utf-8", newline="") as file:
+        if extension == "jsonl":
+            file.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        elif extension == "csv":
+            writer = csv.DictWriter(file, FEED_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            json.dump(records, file, ensure_ascii=False)
+
+    summary = model.sync_feed(str(filename))
+    assert (summary.total, summary.inserted, summary.removed) == (7, 2, 1)
+    _check_saved(model, records)
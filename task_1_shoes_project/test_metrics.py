@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from main import initialize_sample_data
+from metrics import MetricsRegistry, instrument_controller, instrument_model
+from shoes_controller import ShoesController
+from shoes_model import Shoe, ShoeCategory, ShoeType, ShoesModel
+
+
+@pytest.mark.parametrize("extension", ["json", "db"])
+def test_model_metrics_count_saves_and_commits(tmp_path, extension):
+    model = ShoesModel(str(tmp_path / f"shoes.{extension}"))
+    initialize_sample_data(model)
+    registry = MetricsRegistry()
+    instrument_model(model, registry)
+
+    model.add_shoe(Shoe(ShoeType.MEN, ShoeCategory.SNEAKERS, "белый", 3999.0, "Adidas", 41.0))
+    model.remove_shoe(0)
+    metrics = registry.to_dict()
+    if extension == "db":
+        # Построчное хранилище фиксирует изменения без полной перезаписи файла
+        commit = metrics["ShoesModel.commit"]
+        assert commit["calls"] == 2 and 0 < commit["bytes_written"] < os.path.getsize(model.filename)
+        assert "ShoesModel.save_to_file" not in metrics
+    else:
+        save = metrics["ShoesModel.save_to_file"]
+        assert save["calls"] == 2
+        assert save["bytes_written"] > os.path.getsize(model.filename)
+    model.storage.close()
+
+
+def test_controller_metrics_count_record_views(tmp_path):
+    model = ShoesModel(str(tmp_path / "shoes.json"))
+    initialize_sample_data(model)
+    controller = ShoesController(model)
+    registry = MetricsRegistry()
+    instrument_controller(controller, registry)
+
+    ok, shoes = controller.get_all_shoes()
+    assert ok and len(shoes) == 6
+    assert registry.to_dict()["ShoesController.get_all_shoes"]["result_items"] == 6
@@ -0,0 +1,95 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from main import initialize_sample_data
+from shoes_api import create_server
+from shoes_controller import ShoesController
+from shoes_model import ShoesModel
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = ShoesModel(str(tmp_path / "shoes.json"))
+    initialize_sample_data(model)
+    server = create_server(ShoesController(model), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    payload = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode("utf-8")
+    connection.request(method, path, body=payload, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, response.headers, json.loads(data) if data else None
+
+
+def test_etag_returns_304_until_the_catalog_changes(server):
+    status, headers, page = _request(server, "GET", "/shoes?page_size=2")
+    assert status == 200 and page["total"] == 6 and len(page["items"]) == 2
+    etag = headers["ETag"]
+
+    status, _, body = _request(server, "GET", "/shoes?page_size=2", headers={"If-None-Match": etag})
+    assert status == 304 and body is None
+
+    # Другой путь или роль - другой валидатор
+    _, other_path, _ = _request(server, "GET", "/shoes?page_size=3")
+    _, other_role, _ = _request(server, "GET", "/shoes?page_size=2", headers={"X-User-Role": "admin"})
+    assert other_path["ETag"] != etag and other_role["ETag"] != etag
+
+    status, _, _ = _request(server, "DELETE", "/shoes/0", headers={"X-User-Role": "admin"})
+    assert status == 200
+    status, headers, page = _request(server, "GET", "/shoes?page_size=2", headers={"If-None-Match": etag})
+    assert status == 200 and page["total"] == 5 and headers["ETag"] != etag
+
+
+def test_role_is_checked_before_if_none_match(server):
+    _, headers, _ = _request(server, "GET", "/statistics", headers={"X-User-Role": "admin"})
+    status, _, body = _request(server, "GET", "/statistics",
+                               headers={"X-User-Role": "customer", "If-None-Match": headers["ETag"]})
+    assert status == 403 and "error" in body
+
+
+def test_error_statuses(server):
+    assert _request(server, "DELETE", "/shoes/0")[0] == 403
+    assert _request(server, "DELETE", "/shoes/99", headers={"X-User-Role": "admin"})[0] == 404
+    assert _request(server, "PUT", "/shoes")[0] == 405
+    assert _request(server, "GET", "/nowhere")[0] == 404
+    assert _request(server, "GET", "/shoes?min_price=abc")[0] == 400
+    assert _request(server, "POST", "/shoes", b"{not json", {"X-User-Role": "admin"})[0] == 400
+    assert _request(server, "POST", "/shoes", {"color": "red"}, {"X-User-Role": "admin"})[0] == 400
+
+
+def test_invalid_content_length_is_rejected(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    connection.putrequest("POST", "/shoes")
+    connection.putheader("Content-Length", "abc")
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    assert "error" in json.loads(response.read())
+    connection.close()
+
+
+def test_batch_applies_operations_in_one_request(server):
+    new_shoe = {"shoe_type": "мужская", "category": "кроссовки", "color": "синий",
+                "price": 5000, "manufacturer": "Puma", "size": 43}
+    status, _, body = _request(server, "POST", "/batch", {"operations": [
+        {"method": "POST", "path": "/shoes", "body": new_shoe},
+        {"method": "DELETE", "path": "/shoes/0"},
+        {"path": "/statistics"},
+        {"method": "POST", "path": "/batch"},
+        {"method": "GET"},
+    ]}, {"X-User-Role": "admin"})
+    assert status == 200
+    assert [result["status"] for result in body["results"]] == [201, 200, 200, 400, 400]
+    assert body["results"][2]["body"]["total_count"] == 6
+    assert _request(server, "GET", "/shoes")[2]["total"] == 6
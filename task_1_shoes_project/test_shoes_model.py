@@ -0,0 +1,92 @@
+import os
+import stat
+
+import shoes_storage
+from main import initialize_sample_data
+from shoes_model import Shoe, ShoeCategory, ShoeType, ShoesModel
+
+
+def _model(tmp_path, extension="json"):
+    model = ShoesModel(str(tmp_path / f"shoes.{extension}"))
+    model.add_shoe(Shoe(ShoeType.MEN, ShoeCategory.SNEAKERS, "белый", 3999.0, "Adidas", 41.0))
+    return model
+
+
+def test_sample_data_replaces_built_indexes(tmp_path):
+    model = _model(tmp_path)
+    # Индексы построены по старому каталогу до замены
+    assert len(model.get_shoes_by_type(ShoeType.MEN)) == 1
+    assert len(model.sorted_shoes("price")) == 1
+
+    initialize_sample_data(model)
+
+    assert len(model.get_shoes_by_type(ShoeType.MEN)) == 3
+    assert len(model.get_shoes_by_type(ShoeType.WOMEN)) == 3
+    assert [shoe.price for shoe in model.sorted_shoes("price")] == sorted(shoe.price for shoe in model.shoes)
+    assert len(ShoesModel(model.filename).shoes) == 6
+
+
+def test_direct_assignment_is_detected_on_save(tmp_path):
+    model = _model(tmp_path)
+    assert len(model.get_shoes_by_category(ShoeCategory.SNEAKERS)) == 1
+
+    model.shoes = [Shoe(ShoeType.WOMEN, ShoeCategory.BOOTS, "черный", 6999.0, "Ecco", 38.0)]
+    model.save_to_file()
+
+    assert len(model.get_shoes_by_category(ShoeCategory.SNEAKERS)) == 0
+    assert len(model.get_shoes_by_category(ShoeCategory.BOOTS)) == 1
+
+
+def test_persisted_index_is_checked_against_content(tmp_path):
+    filename = str(tmp_path / "shoes.db")
+    model = ShoesModel(filename, persist_indexes=True)
+    model.add_shoe(Shoe(ShoeType.MEN, ShoeCategory.SNEAKERS, "белый", 3999.0, "Adidas", 41.0))
+    model = ShoesModel(filename, persist_indexes=True)
+    model.warm_indexes()
+
+    # Изменение того же размера остается в журнале -wal, пока соединение открыто
+    writer = ShoesModel(filename)
+    writer.update_shoe(0, Shoe(ShoeType.WOMEN, ShoeCategory.BOOTS, "черный", 6999.0, "Ecco", 38.0))
+
+    reloaded = ShoesModel(filename, persist_indexes=True)
+    assert len(reloaded.find_shoes(category=ShoeCategory.SNEAKERS)) == 0
+    assert len(reloaded.find_shoes(category=ShoeCategory.BOOTS)) == 1
+
+
+def test_size_range_checks_exact_sizes_between_half_sizes(tmp_path):
+    model = ShoesModel(str(tmp_path / "shoes.json"))
+    for size in (40.9, 41.0, 41.2, 41.25, 41.3, 41.5, 41.8, 42.0):
+        model.add_shoe(Shoe(ShoeType.MEN, ShoeCategory.SNEAKERS, "белый", 3999.0, "Adidas", size))
+
+    def sizes(low, high):
+        return sorted(shoe.size for shoe in model.find_shoes(min_size=low, max_size=high))
+
+    assert sizes(41.0, 41.4) == [41.0, 41.2, 41.25, 41.3]
+    assert sizes(41.1, 42) == [41.2, 41.25, 41.3, 41.5, 41.8, 42.0]
+    assert sizes(41.25, 41.25) == [41.25]
+    assert sizes(41.26, 41.29) == []
+    assert sizes(None, 41.0) == [40.9, 41.0]
+
+    model.remove_shoe(3)  # 41.25
+    model.update_shoe(0, Shoe(ShoeType.MEN, ShoeCategory.SNEAKERS, "белый", 3999.0, "Adidas", 41.35))
+    assert sizes(41.3, 41.4) == [41.3, 41.35]
+
+
+def test_json_save_replaces_file_and_keeps_its_mode(tmp_path):
+    model = _model(tmp_path)
+    # Новый файл получает права как при обычном open(), а не 0600 временного файла
+    assert stat.S_IMODE(os.stat(model.filename).st_mode) == 0o666 & ~shoes_storage._UMASK
+
+    os.chmod(model.filename, 0o640)
+    initialize_sample_data(model)
+    assert stat.S_IMODE(os.stat(model.filename).st_mode) == 0o640
+    assert len(ShoesModel(model.filename).shoes) == 6
+    assert os.listdir(tmp_path) == ["shoes.json"]
+
+
+def test_json_catalog_is_written_with_two_space_indent(tmp_path):
+    model = _model(tmp_path)
+    with open(model.filename, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    # Отступ 2 записывает orjson, если он установлен (отступ 4 шел бы через стандартный json)
+    assert lines[1] == "  {" and lines[2].startswith('    "')
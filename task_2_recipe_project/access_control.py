@@ -0,0 +1,77 @@
+import inspect
+from collections import Counter
+from functools import wraps
+from typing import Callable, Dict, Iterable, FrozenSet
+
+DENIED_MESSAGE = "Доступ запрещен: недостаточно прав"
+UNKNOWN_ROLE_MESSAGE = "Неизвестная роль пользователя"
+
+
+class AccessControl:
+    """Проверка прав доступа по заранее скомпилированной таблице ролей"""
+
+    def __init__(self, roles: Dict[str, Iterable[str]]):
+        # Таблица роль -> права компилируется один раз при создании
+        self._permissions: Dict[str, FrozenSet[str]] = {
+            role: frozenset(permissions) for role, permissions in roles.items()
+        }
+        self.denials: Counter = Counter()
+
+    def is_known_role(self, role: str) -> bool:
+        """Проверяет, существует ли роль"""
+        return role in self._permissions
+
+    def is_allowed(self, role: str, action: str) -> bool:
+        """Проверяет, разрешено ли действие для роли"""
+        permissions = self._permissions.get(role)
+        return permissions is not None and action in permissions
+
+    def get_permissions(self, role: str) -> FrozenSet[str]:
+        """Возвращает набор прав роли"""
+        return self._permissions.get(role, frozenset())
+
+    def record_denial(self, action: str) -> None:
+        """Учитывает отказ в доступе для мониторинга"""
+        self.denials[action] += 1
+
+    def get_denial_stats(self) -> Dict[str, int]:
+        """Возвращает количество отказов по действиям"""
+        return dict(self.denials)
+
+
+def requires_permission(action: str, message: str = DENIED_MESSAGE) -> Callable:
+    """Декоратор метода контроллера, проверяющий право роли на действие.
+
+    Роль берется из аргумента user_role метода, а таблица прав - из
+    атрибута access_control контроллера. Метод возвращает (True, результат),
+    а при отказе - (False, сообщение), поэтому отказ не спутать с пустым
+    результатом поиска или фильтра.
+    """
+    def decorator(method: Callable) -> Callable:
+        parameters = list(inspect.signature(method).parameters.values())
+        names = [parameter.name for parameter in parameters]
+        role_position = names.index("user_role")
+        default_role = parameters[role_position].default
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if "user_role" in kwargs:
+                role = kwargs["user_role"]
+            elif len(args) >= role_position:
+                role = args[role_position - 1]
+            else:
+                role = default_role
+
+            access = self.access_control
+            if access.is_allowed(role, action):
+                return method(self, *args, **kwargs)
+
+            access.record_denial(action)
+            if not access.is_known_role(role):
+                return False, UNKNOWN_ROLE_MESSAGE
+            return False, message
+
+        wrapper.required_permission = action
+        return wrapper
+
+    return decorator
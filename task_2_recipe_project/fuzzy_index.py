@@ -0,0 +1,190 @@
+import heapq
+import math
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from events import ChangeEvent, ChangeKind
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Приводит текст к виду для сравнения: нижний регистр, ё -> е"""
+    return text.lower().replace("ё", "е")
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Множество триграмм текста (каждое слово дополняется пробелами, как в pg_trgm)"""
+    result: Set[str] = set()
+    for word in WORD_RE.findall(normalize(text)):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def recipe_words(recipe) -> Set[str]:
+    """Нормализованные слова названия рецепта и названий ингредиентов (без чисел)"""
+    words = set(WORD_RE.findall(normalize(recipe.name)))
+    for ingredient in recipe.ingredients:
+        words.update(WORD_RE.findall(normalize(ingredient.name)))
+    return {word for word in words if not word.isdigit()}
+
+
+class TrigramIndex:
+    """Триграммный индекс для нечеткого поиска рецептов.
+
+    Индексируется словарь слов из названий рецептов и ингредиентов: для
+    каждого слова хранится множество его триграмм и рецепты, где оно
+    встречается, а для каждой триграммы - список содержащих ее слов.
+    Слова сильно повторяются, поэтому словарь намного меньше коллекции.
+    Кандидаты берутся только из списков самых редких триграмм запроса
+    (префиксная фильтрация), сходство - коэффициент Жаккара по триграммам.
+    """
+
+    def __init__(self, recipes: Iterable = ()):
+        self._next_doc_id = 0
+        self._doc_ids: List[int] = []  # id документа на каждой позиции модели
+        self._recipes: Dict[int, object] = {}
+        self._doc_words: Dict[int, List[int]] = {}
+        self._word_ids: Dict[str, int] = {}
+        self._word_trigrams: List[FrozenSet[str]] = []
+        self._word_docs: List[Set[int]] = []
+        self._postings: Dict[str, List[int]] = {}
+        for recipe in recipes:
+            self.on_added(recipe)
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __getstate__(self) -> Dict:
+        # Рецепты не сохраняются в файл индекса: после чтения индекс привязывается к модели (attach)
+        state = self.__dict__.copy()
+        state["_recipes"] = {}
+        return state
+
+    def attach(self, recipes: List) -> bool:
+        """Привязывает прочитанный с диска индекс к рецептам модели (False, если он им не соответствует).
+
+        Содержимое уже сверено IndexCache по контрольной сумме рецептов,
+        здесь остается проверка числа записей.
+        """
+        if len(recipes) != len(self._doc_ids):
+            return False
+        self._recipes = dict(zip(self._doc_ids, recipes))
+        return True
+
+    # ========== Обновление индекса ==========
+
+    def apply_events(self, events: List[ChangeEvent]) -> None:
+        """Обработчик событий модели (см. RecipeModel.events)"""
+        for event in events:
+            if event.kind == ChangeKind.ADDED:
+                self.on_added(event.new)
+            elif event.kind == ChangeKind.REMOVED:
+                self.on_removed(event.index)
+            else:
+                self.on_updated(event.index, event.new)
+
+    def on_added(self, recipe) -> None:
+        """Индексирует рецепт, добавленный в конец модели"""
+        doc_id = self._next_doc_id
+        self._next_doc_id += 1
+        self._doc_ids.append(doc_id)
+        self._index_document(doc_id, recipe)
+
+    def on_removed(self, position: int) -> None:
+        """Удаляет из индекса рецепт, стоявший на позиции position"""
+        doc_id = self._doc_ids.pop(position)
+        self._unindex_document(doc_id)
+
+    def on_updated(self, position: int, recipe) -> None:
+        """Переиндексирует рецепт на позиции position"""
+        doc_id = self._doc_ids[position]
+        self._unindex_document(doc_id)
+        self._index_document(doc_id, recipe)
+
+    def _word_id(self, word: str) -> int:
+        """id слова в словаре; новое слово добавляется в списки триграмм"""
+        word_id = self._word_ids.get(word)
+        if word_id is None:
+            word_id = self._word_ids[word] = len(self._word_trigrams)
+            grams = trigrams(word)
+            self._word_trigrams.append(grams)
+            self._word_docs.append(set())
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = []
+                posting.append(word_id)
+        return word_id
+
+    def _index_document(self, doc_id: int, recipe) -> None:
+        self._recipes[doc_id] = recipe
+        word_ids = [self._word_id(word) for word in recipe_words(recipe)]
+        for word_id in word_ids:
+            self._word_docs[word_id].add(doc_id)
+        self._doc_words[doc_id] = word_ids
+
+    def _unindex_document(self, doc_id: int) -> None:
+        # Слова остаются в словаре: пустое множество рецептов просто не дает кандидатов
+        del self._recipes[doc_id]
+        for word_id in self._doc_words.pop(doc_id):
+            self._word_docs[word_id].discard(doc_id)
+
+    # ========== Поиск ==========
+
+    def _similar_words(self, word: str, threshold: float) -> Dict[int, float]:
+        """Слова словаря, похожие на word не меньше чем на threshold"""
+        query_grams = trigrams(word)
+        if not query_grams:
+            return {}
+
+        # Для сходства >= threshold слово обязано разделять с запросом не меньше
+        # min_overlap триграмм, а значит встретиться хотя бы в одном из
+        # len(query) - min_overlap + 1 самых редких списков
+        query_size = len(query_grams)
+        min_overlap = max(1, math.ceil(threshold * query_size))
+        postings = self._postings
+        ordered = sorted(query_grams, key=lambda gram: len(postings.get(gram, ())))
+
+        candidates: Set[int] = set()
+        for gram in ordered[:query_size - min_overlap + 1]:
+            candidates.update(postings.get(gram, ()))
+
+        similar = {}
+        for word_id in candidates:
+            word_grams = self._word_trigrams[word_id]
+            overlap = len(query_grams & word_grams)
+            if overlap < min_overlap:
+                continue
+            score = overlap / (query_size + len(word_grams) - overlap)
+            if score >= threshold:
+                similar[word_id] = score
+        return similar
+
+    def search(self, query: str, limit: int = 10, threshold: float = 0.3) -> List[Tuple[object, float]]:
+        """Возвращает до limit рецептов с наибольшим сходством (не ниже threshold).
+
+        Сходство рецепта - среднее по словам запроса от сходства с самым
+        похожим словом рецепта.
+        """
+        query_words = set(WORD_RE.findall(normalize(query)))
+        if not query_words:
+            return []
+
+        totals: Dict[int, float] = {}
+        for query_word in query_words:
+            best: Dict[int, float] = {}
+            for word_id, score in self._similar_words(query_word, threshold).items():
+                for doc_id in self._word_docs[word_id]:
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                totals[doc_id] = totals.get(doc_id, 0.0) + score
+
+        word_count = len(query_words)
+        ranked = heapq.nsmallest(
+            limit,
+            ((-total / word_count, doc_id) for doc_id, total in totals.items()
+             if total / word_count >= threshold))
+        # id документов растут в порядке модели, поэтому при равенстве выше идут ранние рецепты
+        return [(self._recipes[doc_id], round(-score, 3)) for score, doc_id in ranked]
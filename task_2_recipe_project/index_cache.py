@@ -0,0 +1,127 @@
+import hashlib
+import os
+import pickle
+import threading
+import traceback
+from itertools import islice
+from typing import Any, Callable, Iterable, Optional
+from json_codec import JsonCodec
+
+# Версия формата файлов индексов: при изменении структуры индексов старые файлы игнорируются
+INDEX_FORMAT_VERSION = 4
+
+_CHECKSUM_CODEC = JsonCodec(compact=True)
+_CHECKSUM_BATCH = 10_000
+
+
+def records_checksum(records: Iterable) -> str:
+    """Контрольная сумма содержимого загруженных записей (по их to_dict)"""
+    digest = hashlib.blake2b(digest_size=16)
+    records = iter(records)
+    # Пачками через компактный кодек: без промежуточной копии всей коллекции
+    while batch := [record.to_dict() for record in islice(records, _CHECKSUM_BATCH)]:
+        digest.update(_CHECKSUM_CODEC.dumps(batch))
+    return digest.hexdigest()
+
+
+class IndexCache:
+    """Файлы построенных индексов рядом с файлом данных.
+
+    Индекс name для data.json хранится в data.json.name.idx вместе с
+    контрольной суммой содержимого записей, по которым он построен (см.
+    records_checksum). Сумма считается по загруженным записям, а не по
+    байтам файла, поэтому учитываются и изменения, которые еще лежат в
+    журнале SQLite (-wal). При теплом старте индекс читается с диска,
+    только если сумма совпадает с текущей, иначе его нужно построить
+    заново. Файлы индексов - это кэш: их можно удалить в любой момент.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def path(self, name: str) -> str:
+        return f"{self.filename}.{name}.idx"
+
+    def load(self, name: str, checksum: Optional[str]) -> Optional[Any]:
+        """Читает индекс, построенный по записям с суммой checksum (None при промахе)"""
+        if checksum is None:
+            return None
+        try:
+            with open(self.path(name), "rb") as file:
+                version, stored_checksum, index = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Поврежденный или несовместимый файл просто перестраивается
+            return None
+        if version != INDEX_FORMAT_VERSION or stored_checksum != checksum:
+            return None
+        return index
+
+    def save(self, name: str, checksum: Optional[str], index: Any) -> None:
+        """Атомарно записывает индекс (через временный файл и переименование)"""
+        if checksum is None:
+            return
+        path = self.path(name)
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                pickle.dump((INDEX_FORMAT_VERSION, checksum, index), file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError:
+            # Без файла индекса теплый старт просто будет медленнее
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class BackgroundLoader:
+    """Выполняет загрузку в фоновом потоке и сообщает о готовности.
+
+    wait() блокирует вызывающего до конца загрузки; ошибка загрузки
+    пробрасывается из wait(), как если бы загрузка шла в этом потоке.
+    then - необязательная дополнительная работа (например, прогрев
+    индексов), которая выполняется в том же потоке уже после сигнала
+    готовности и никого не задерживает.
+    """
+
+    def __init__(self, target: Callable[[], None], name: str = "background-loader",
+                 then: Optional[Callable[[], None]] = None):
+        self._target = target
+        self._then = then
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> "BackgroundLoader":
+        self._thread.start()
+        return self
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _run(self) -> None:
+        try:
+            self._target()
+        except BaseException as e:
+            self._error = e
+            return
+        finally:
+            self._ready.set()
+        if self._then is not None:
+            try:
+                self._then()
+            except Exception:
+                # Непрогретые индексы просто построятся при первом запросе
+                traceback.print_exc()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ждет окончания загрузки; возвращает False, если не дождались за timeout"""
+        if threading.current_thread() is self._thread:
+            # Сама загрузка обращается к данным, которые она и готовит
+            return True
+        if not self._ready.wait(timeout):
+            return False
+        if self._error is not None:
+            raise self._error
+        return True
@@ -1,3 +1,5 @@
+import argparse
+import time
 from recipe_model import RecipeModel, Recipe, RecipeType, CuisineType, Ingredient
 from recipe_controller import RecipeController
 from recipe_view import RecipeView
@@ -129,26 +131,75 @@ def initialize_sample_recipes(model: RecipeModel):
     sample_recipes = [borscht, carbonara, tiramisu, philadelphia, guacamole]
 
     # Очищаем текущие данные и добавляем тестовые
-    model.recipes = sample_recipes
-    model.save_to_file()
+    model.replace_recipes(sample_recipes)
 
 
 def main():
     """Точка входа в приложение"""
+    parser = argparse.ArgumentParser(description="Кулинарная книга")
+    parser.add_argument("--serve", action="store_true", help="запустить JSON API вместо меню")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="импортировать рецепты из CSV или JSONL и выйти")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="формат файла импорта (по умолчанию - по расширению)")
+    parser.add_argument("--workers", type=int, help="число процессов проверки при импорте")
+    parser.add_argument("--history", action="store_true",
+                        help="записывать версии коллекции в recipes_data.json.history.db")
+    parser.add_argument("--versions", action="store_true", help="показать последние версии и выйти")
+    parser.add_argument("--restore", type=int, metavar="VERSION",
+                        help="восстановить коллекцию из версии и выйти")
+    args = parser.parse_args()
+
+    if args.versions or args.restore is not None:
+        model = RecipeModel("recipes_data.json")
+        model.enable_history()
+        controller = RecipeController(model)
+        if args.restore is not None:
+            success, message = controller.restore_version(args.restore, "admin")
+            print(message if success else f"❌ {message}")
+            return
+        success, versions = controller.get_versions(user_role="admin")
+        for info in versions:
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(info.created))
+            print(f"{info.version:>6}  {created}  {info.label} ({info.changes} изм.)")
+        return
+
+    if args.import_file:
+        model = RecipeModel("recipes_data.json")
+        if args.history:
+            model.enable_history()
+        controller = RecipeController(model)
+        success, result = controller.import_recipes(args.import_file, args.format, args.workers, "admin")
+        print(result.summary() if success else f"❌ {result}")
+        return
+
+    if args.serve:
+        from recipe_api import serve
+
+        model = RecipeModel("recipes_data.json", persist_indexes=True)
+        if args.history:
+            model.enable_history()
+        print(f"📚 Загружено {model.get_total_count()} рецептов")
+        serve(RecipeController(model), args.host, args.port)
+        return
+
     print("=" * 60)
     print("🍽️  ЗАГРУЗКА КУЛИНАРНОЙ КНИГИ")
     print("=" * 60)
 
-    # Инициализация MVC компонентов
-    model = RecipeModel("recipes_data.json")
+    # Инициализация MVC компонентов: рецепты и индексы поиска загружаются в фоне,
+    # меню доступно сразу, а действия с рецептами дождутся окончания загрузки
+    model = RecipeModel("recipes_data.json", background=True, persist_indexes=True)
+    if args.history:
+        model.enable_history()
     controller = RecipeController(model)
     view = RecipeView(controller)
 
     # Инициализация тестовых данных (раскомментировать для первого запуска)
+    # model.wait_until_ready()
     # initialize_sample_recipes(model)
 
-    print(f"📚 Загружено {model.get_total_count()} рецептов")
-
     # Установка роли по умолчанию
     view.set_user_role("admin")  # Для полного доступа при первом запуске
 
@@ -0,0 +1,208 @@
+import bisect
+import json
+import threading
+import time
+from collections.abc import Sized
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Границы корзин гистограммы задержек в секундах
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последняя корзина - +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Добавляет наблюдение"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Возвращает накопленные значения по корзинам (как в Prometheus)"""
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return result
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса: счетчики вызовов, задержки, размеры"""
+
+    def __init__(self, prefix: str = "recipes"):
+        self.prefix = prefix
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.result_items: Dict[str, int] = {}
+        self.bytes_written: Dict[str, int] = {}
+
+    def record_call(self, name: str, seconds: float, result_size: Optional[int] = None,
+                    failed: bool = False) -> None:
+        """Учитывает один вызов операции"""
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if failed:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = Histogram()
+            histogram.observe(seconds)
+            if result_size is not None:
+                self.result_items[name] = self.result_items.get(name, 0) + result_size
+
+    def record_bytes_written(self, name: str, size: int) -> None:
+        """Учитывает количество записанных байт"""
+        with self._lock:
+            self.bytes_written[name] = self.bytes_written.get(name, 0) + size
+
+    def reset(self) -> None:
+        """Сбрасывает все накопленные метрики"""
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+            self.latency.clear()
+            self.result_items.clear()
+            self.bytes_written.clear()
+
+    def to_dict(self) -> Dict:
+        """Возвращает снимок метрик в виде словаря"""
+        with self._lock:
+            return {
+                name: {
+                    "calls": self.calls[name],
+                    "errors": self.errors.get(name, 0),
+                    "latency_sum_seconds": round(self.latency[name].total, 6),
+                    "latency_buckets": dict(self.latency[name].cumulative()),
+                    "result_items": self.result_items.get(name, 0),
+                    "bytes_written": self.bytes_written.get(name, 0),
+                }
+                for name in sorted(self.calls)
+            }
+
+    def to_json(self) -> str:
+        """Экспортирует метрики в JSON"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Экспортирует метрики в текстовом формате Prometheus"""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_calls_total Количество вызовов операции",
+            f"# TYPE {p}_calls_total counter",
+        ]
+        snapshot = self.to_dict()
+        for name, data in snapshot.items():
+            lines.append(f'{p}_calls_total{{operation="{name}"}} {data["calls"]}')
+
+        lines += [f"# HELP {p}_errors_total Количество вызовов, завершившихся исключением",
+                  f"# TYPE {p}_errors_total counter"]
+        for name, data in snapshot.items():
+            lines.append(f'{p}_errors_total{{operation="{name}"}} {data["errors"]}')
+
+        lines += [f"# HELP {p}_latency_seconds Задержка операции",
+                  f"# TYPE {p}_latency_seconds histogram"]
+        for name, data in snapshot.items():
+            for bound, count in data["latency_buckets"].items():
+                lines.append(f'{p}_latency_seconds_bucket{{operation="{name}",le="{bound}"}} {count}')
+            lines.append(f'{p}_latency_seconds_sum{{operation="{name}"}} {data["latency_sum_seconds"]}')
+            lines.append(f'{p}_latency_seconds_count{{operation="{name}"}} {data["calls"]}')
+
+        lines += [f"# HELP {p}_result_items_total Суммарный размер результатов",
+                  f"# TYPE {p}_result_items_total counter"]
+        for name, data in snapshot.items():
+            lines.append(f'{p}_result_items_total{{operation="{name}"}} {data["result_items"]}')
+
+        lines += [f"# HELP {p}_bytes_written_total Записано байт на диск",
+                  f"# TYPE {p}_bytes_written_total counter"]
+        for name, data in snapshot.items():
+            if data["bytes_written"]:
+                lines.append(f'{p}_bytes_written_total{{operation="{name}"}} {data["bytes_written"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _result_size(result) -> Optional[int]:
+    """Определяет размер результата: коллекция (в том числе RecordView) или пара (успех, данные)"""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+        result = result[1]
+    # У ленивого представления len() дочитывает позиции, но они запоминаются и не считаются заново
+    if isinstance(result, Sized) and not isinstance(result, (str, bytes)):
+        return len(result)
+    return None
+
+
+def _timed(registry: MetricsRegistry, name: str, func: Callable,
+           after: Optional[Callable[[], None]] = None) -> Callable:
+    """Оборачивает функцию замером времени и размера результата"""
+    perf_counter = time.perf_counter
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return func(*args, **kwargs)
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            registry.record_call(name, perf_counter() - start, failed=True)
+            raise
+        registry.record_call(name, perf_counter() - start, _result_size(result))
+        if after is not None:
+            after()
+        return result
+
+    wrapper.__wrapped_by_metrics__ = True
+    return wrapper
+
+
+def instrument_controller(controller, registry: MetricsRegistry) -> None:
+    """Подключает сбор метрик ко всем публичным методам контроллера"""
+    prefix = type(controller).__name__
+    for attr_name in dir(type(controller)):
+        if attr_name.startswith("_"):
+            continue
+        method = getattr(controller, attr_name)
+        if not callable(method) or getattr(method, "__wrapped_by_metrics__", False):
+            continue
+        setattr(controller, attr_name, _timed(registry, f"{prefix}.{attr_name}", method))
+
+
+def instrument_model(model, registry: MetricsRegistry) -> None:
+    """Подключает сбор метрик к сохранению и загрузке модели.
+
+    У построчного хранилища (SQLite) изменения сохраняются не через
+    save_to_file, а фиксацией storage.commit, поэтому замеряется и она.
+    Записанные байты берутся из счетчика хранилища (bytes_written):
+    операции достается то, что хранилище записало с прошлого замера.
+    """
+    prefix = type(model).__name__
+    storage = model.storage
+    counted = [storage.bytes_written]
+
+    def bytes_counter(name: str) -> Callable[[], None]:
+        def count_bytes():
+            written = storage.bytes_written
+            registry.record_bytes_written(name, written - counted[0])
+            counted[0] = written
+        return count_bytes
+
+    targets = [(model, "save_to_file", True), (model, "load_from_file", False)]
+    if storage.incremental:
+        targets.append((storage, "commit", True))
+    for owner, attr_name, writes in targets:
+        method = getattr(owner, attr_name)
+        if getattr(method, "__wrapped_by_metrics__", False):
+            continue
+        name = f"{prefix}.{attr_name}"
+        setattr(owner, attr_name, _timed(registry, name, method, bytes_counter(name) if writes else None))
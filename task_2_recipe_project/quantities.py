@@ -0,0 +1,81 @@
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Псевдоним единицы (без точек, в нижнем регистре) -> (код единицы, множитель к базовой)
+UNIT_ALIASES: Dict[str, Tuple[str, float]] = {}
+
+
+def _register(code: str, factor: float, *aliases: str) -> None:
+    for alias in aliases:
+        UNIT_ALIASES[alias] = (code, factor)
+
+
+_register("g", 1, "г", "гр", "грамм", "грамма", "граммов")
+_register("g", 1000, "кг", "килограмм", "килограмма", "килограммов")
+_register("ml", 1, "мл", "миллилитр", "миллилитра", "миллилитров")
+_register("ml", 1000, "л", "литр", "литра", "литров")
+_register("ml", 250, "стакан", "стакана", "стаканов")
+_register("pcs", 1, "шт", "штука", "штуки", "штук")
+_register("tbsp", 1, "ст л", "ст ложка", "ст ложки", "ст ложек",
+          "столовая ложка", "столовые ложки", "столовых ложек")
+_register("tsp", 1, "ч л", "ч ложка", "ч ложки", "ч ложек",
+          "чайная ложка", "чайные ложки", "чайных ложек")
+_register("clove", 1, "зубчик", "зубчика", "зубчиков")
+_register("pinch", 1, "щепотка", "щепотки", "щепоток")
+
+# Как показывать единицы пользователю
+UNIT_LABELS = {"g": "г", "ml": "мл", "pcs": "шт", "tbsp": "ст. л.", "tsp": "ч. л.",
+               "clove": "зубч.", "pinch": "щеп."}
+
+_NUMBER = r"\d+/\d+|\d+(?:[.,]\d+)?(?:\s+\d+/\d+)?"
+QUANTITY_RE = re.compile(rf"^\s*(?P<value>{_NUMBER})(?:\s*[-–]\s*(?P<upper>{_NUMBER}))?\s*(?P<unit>.*?)\s*$")
+
+
+class Quantity(NamedTuple):
+    """Разобранное количество: число в базовой единице и код единицы.
+
+    Для "по вкусу", "для подачи" и подобных value и unit равны None.
+    Неизвестная единица сохраняется как есть ("5 листов" -> 5, "листов").
+    """
+    value: Optional[float]
+    unit: Optional[str]
+
+    def __str__(self) -> str:
+        if self.value is None:
+            return ""
+        return f"{format_number(self.value)} {UNIT_LABELS.get(self.unit, self.unit or '')}".rstrip()
+
+
+UNKNOWN = Quantity(None, None)
+
+
+def format_number(value: float) -> str:
+    """Число без лишних нулей (2.0 -> 2, 0.25 -> 0.25)"""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _parse_number(text: str) -> float:
+    total = 0.0
+    for part in text.replace(",", ".").split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += int(numerator) / int(denominator) if int(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+
+def parse_quantity(raw: str) -> Quantity:
+    """Разбирает строку количества ("200 г", "1/2 ст. ложки", "2-3 шт").
+
+    Для диапазона берется верхняя граница: ее хватит на любой вариант рецепта.
+    """
+    match = QUANTITY_RE.match(raw)
+    if match is None:
+        return UNKNOWN
+    value = _parse_number(match.group("upper") or match.group("value"))
+    unit = " ".join(match.group("unit").lower().replace(".", " ").split())
+    if not unit:
+        return Quantity(value, "pcs")
+    code, factor = UNIT_ALIASES.get(unit, (unit, 1))
+    return Quantity(value * factor, code)
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class QueryCache:
+    """LRU-кэш результатов запросов с ограничением времени жизни.
+
+    Каждая запись помнит поколение модели, для которого была вычислена.
+    Когда поколение меняется (рецепт добавлен, изменен или удален), кэш
+    целиком сбрасывается при следующем обращении.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple]]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, generation: int, compute: Callable[[], Tuple]) -> Tuple:
+        """Возвращает результат из кэша или вычисляет и запоминает его"""
+        now = time.monotonic()
+        with self._lock:
+            if generation != self._generation:
+                if self._entries:
+                    self.invalidations += 1
+                    self._entries.clear()
+                self._generation = generation
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, result = entry
+                if self.ttl_seconds is None or now - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # Вычисление идет вне блокировки, чтобы медленный запрос не задерживал остальные
+        result = compute()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (now, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Возвращает статистику кэша"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,312 @@
+import re
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Iterator, Tuple
+from urllib.parse import parse_qs, urlsplit
+from json_codec import JsonCodec
+from recipe_controller import RecipeController
+from recipe_model import CUISINES_BY_VALUE, RECIPE_TYPES_BY_VALUE
+
+DEFAULT_ROLE = "guest"
+ROLE_HEADER = "X-User-Role"
+
+# Размер порции потокового ответа: строки JSON Lines копятся до этого объема
+STREAM_CHUNK_BYTES = 64 * 1024
+
+RECIPE_PATH = re.compile(r"^/recipes/(\d+)$")
+SIMILAR_PATH = re.compile(r"^/recipes/(\d+)/similar$")
+VERSION_RECIPES_PATH = re.compile(r"^/versions/(\d+)/recipes$")
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которая возвращается клиенту с кодом статуса"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Stream:
+    """Ответ, который отправляется построчно в формате JSON Lines"""
+
+    def __init__(self, rows: Iterable[Dict]):
+        self.rows = rows
+
+
+class RecipeApi:
+    """JSON API кулинарной книги поверх RecipeController, независимое от транспорта.
+
+    handle() возвращает (статус, данные), где данные - либо объект для
+    JSON-ответа, либо Stream для потоковой выдачи списков и экспорта.
+    Stream содержит итератор по снимку коллекции, поэтому большой ответ
+    не собирается в памяти целиком.
+
+    Запросы приходят из пулов потоков, а модель не потокобезопасна
+    (индексы строятся при первом запросе), поэтому обработка идет под
+    общей блокировкой. Строки Stream читаются уже после ее снятия: API
+    только читает данные, а ленивое представление, пережившее изменение
+    модели, вызывает RuntimeError вместо выдачи неверных строк.
+    """
+
+    # Пути, ответы на которые отдаются потоком (обслуживаются отдельным пулом)
+    STREAMING_PATHS = ("/recipes", "/export")
+
+    def __init__(self, controller: RecipeController):
+        self.controller = controller
+        self.model = controller.model
+        self._lock = threading.RLock()
+
+    def is_streaming(self, target: str) -> bool:
+        """Отдается ли ответ на запрос потоком (списки и экспорт могут быть долгими)"""
+        path = urlsplit(target).path.rstrip("/")
+        return path in self.STREAMING_PATHS or VERSION_RECIPES_PATH.match(path) is not None
+
+    def handle(self, method: str, target: str, user_role: str = DEFAULT_ROLE) -> Tuple[int, Any]:
+        """Выполняет запрос и возвращает (статус, данные или Stream)"""
+        with self._lock:
+            try:
+                if method != "GET":
+                    raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Метод не поддерживается")
+                status, payload = self._dispatch(target, user_role)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception:
+                traceback.print_exc()
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Внутренняя ошибка сервера"}
+            return int(status), payload
+
+    def _dispatch(self, target: str, user_role: str) -> Tuple[HTTPStatus, Any]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if path == "/recipes":
+            return HTTPStatus.OK, Stream(self._list_recipes(query, user_role))
+        if path == "/export":
+            return self._export(user_role)
+
+        match = RECIPE_PATH.match(path)
+        if match:
+            ok, recipe = self.controller.get_recipe_details(int(match.group(1)), user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "view_all", HTTPStatus.NOT_FOUND), recipe)
+            return HTTPStatus.OK, recipe.to_dict()
+        match = SIMILAR_PATH.match(path)
+        if match:
+            k = self._int(query, "k", 5)
+            if k < 1:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Параметр k должен быть положительным")
+            ok, similar = self.controller.similar_recipes(int(match.group(1)), k, user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "view_all", HTTPStatus.NOT_FOUND), similar)
+            return HTTPStatus.OK, [dict(recipe.to_dict(), score=score) for recipe, score in similar]
+
+        if path == "/search/fuzzy":
+            limit = self._int(query, "limit", 10)
+            ok, matches = self.controller.fuzzy_search_recipes(query.get("q", ""), limit, user_role)
+            if not ok:
+                raise ApiError(HTTPStatus.FORBIDDEN, matches)
+            return HTTPStatus.OK, [dict(recipe.to_dict(), score=score) for recipe, score in matches]
+        if path == "/facets":
+            ok, result = self.controller.facets(self._filters(query), self._int(query, "page", 1),
+                                                self._int(query, "page_size", 20), user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "filter", HTTPStatus.BAD_REQUEST), result)
+            return HTTPStatus.OK, dict(result, results=[recipe.to_dict() for recipe in result["results"]])
+        if path == "/versions":
+            ok, versions = self.controller.get_versions(self._int(query, "limit", 20), user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "edit", HTTPStatus.NOT_FOUND), versions)
+            return HTTPStatus.OK, [vars(info) for info in versions]
+        match = VERSION_RECIPES_PATH.match(path)
+        if match:
+            ok, recipes = self.controller.get_recipes_at(int(match.group(1)), user_role=user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "edit", HTTPStatus.NOT_FOUND), recipes)
+            return HTTPStatus.OK, Stream(recipe.to_dict() for recipe in recipes)
+        if path == "/statistics":
+            ok, stats = self.controller.get_statistics(user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "stats", HTTPStatus.BAD_REQUEST), stats)
+            return HTTPStatus.OK, stats
+        raise ApiError(HTTPStatus.NOT_FOUND, "Ресурс не найден")
+
+    def _failure_status(self, user_role: str, action: str, default: HTTPStatus) -> HTTPStatus:
+        """Статус неудачного ответа контроллера: 403 при отказе в доступе"""
+        if not self.controller.has_permission(user_role, action):
+            return HTTPStatus.FORBIDDEN
+        return default
+
+    @staticmethod
+    def _int(query: Dict[str, str], name: str, default: int) -> int:
+        try:
+            return int(query.get(name, default))
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Параметр {name} должен быть целым числом") from None
+
+    def _filters(self, query: Dict[str, str]) -> Dict[str, Any]:
+        """Разбирает фильтры facets из параметров запроса"""
+        filters: Dict[str, Any] = {}
+        try:
+            if "cuisine" in query:
+                filters["cuisine"] = CUISINES_BY_VALUE[query["cuisine"]]
+            if "type" in query:
+                filters["recipe_type"] = RECIPE_TYPES_BY_VALUE[query["type"]]
+        except KeyError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Неизвестное значение {e}") from None
+        for name in ("difficulty", "author"):
+            if name in query:
+                filters[name] = query[name]
+        if "max_time" in query:
+            filters["max_cooking_time"] = self._int(query, "max_time", 0)
+        return filters
+
+    def _list_recipes(self, query: Dict[str, str], user_role: str) -> Iterator[Dict]:
+        """Рецепты по поисковому запросу q, отсортированные (sort, order), по фильтрам или все"""
+        filters = self._filters(query)
+        if "q" in query:
+            if filters or "sort" in query:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Поиск q не сочетается с фильтрами и сортировкой")
+            limit = self._int(query, "limit", 0) if "limit" in query else None
+            if limit is not None and limit < 1:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Параметр limit должен быть положительным")
+            ok, recipes = self.controller.search_recipes(query["q"], user_role, limit)
+            if not ok:
+                raise ApiError(HTTPStatus.FORBIDDEN, recipes)
+        elif "sort" in query:
+            # Порядок уже построен индексом: строки идут клиенту без сортировки всей коллекции
+            descending = query.get("order", "asc") == "desc"
+            ok, recipes = self.controller.get_sorted_recipes(query["sort"], descending, filters, user_role)
+            if not ok:
+                action = "filter" if filters else "view_all"
+                raise ApiError(self._failure_status(user_role, action, HTTPStatus.BAD_REQUEST), recipes)
+        elif filters:
+            # Выборка ленивая: первые строки уходят клиенту до конца прохода по коллекции
+            ok, recipes = self.controller.select_recipes(filters, user_role)
+            if not ok:
+                raise ApiError(self._failure_status(user_role, "filter", HTTPStatus.BAD_REQUEST), recipes)
+        else:
+            ok, recipes = self.controller.get_all_recipes(user_role)
+            if not ok:
+                raise ApiError(HTTPStatus.FORBIDDEN, recipes)
+            # Снимок ссылок: изменения модели во время отправки не ломают перебор
+            recipes = tuple(recipes)
+        return (recipe.to_dict() for recipe in recipes)
+
+    def _export(self, user_role: str) -> Tuple[HTTPStatus, Stream]:
+        ok, rows = self.controller.export_recipes(user_role)
+        if not ok:
+            raise ApiError(HTTPStatus.FORBIDDEN, rows)
+        return HTTPStatus.OK, Stream(rows)
+
+
+class RecipeRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP/1.1 с потоковой выдачей (Transfer-Encoding: chunked).
+
+    Соединения обслуживаются отдельными потоками, а сама работа - двумя
+    небольшими пулами: потоковые ответы (списки, экспорт) идут в свой пул,
+    поэтому медленный экспорт не занимает воркеры быстрых запросов.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "RecipeApi/1.0"
+    timeout = 30  # Простаивающее keep-alive соединение закрывается через 30 секунд
+    # Заголовки и тело уходят отдельными записями: без TCP_NODELAY ответ ждет подтверждения
+    disable_nagle_algorithm = True
+    error_content_type = "application/json; charset=utf-8"
+    error_message_format = '{"error": "%(code)d %(message)s"}'
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method: str) -> None:
+        server = self.server
+        pool = server.stream_pool if server.api.is_streaming(self.path) else server.query_pool
+        pool.submit(self._respond, method).result()
+
+    def _respond(self, method: str) -> None:
+        api: RecipeApi = self.server.api
+        codec: JsonCodec = self.server.codec
+        # Тело запроса не используется, но его нужно дочитать, чтобы не сломать keep-alive
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Тело нельзя отделить от следующего запроса, поэтому соединение закрывается
+            self.close_connection = True
+            self._send(HTTPStatus.BAD_REQUEST, codec.dumps({"error": "Некорректный Content-Length"}))
+            return
+        if length:
+            self.rfile.read(length)
+
+        role = self.headers.get(ROLE_HEADER, DEFAULT_ROLE)
+        status, payload = api.handle(method, self.path, role)
+        if not isinstance(payload, Stream):
+            self._send(status, codec.dumps(payload))
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            self._write_stream(payload.rows, codec)
+        except Exception:
+            # Заголовки уже отправлены: ошибка передается последней строкой потока
+            traceback.print_exc()
+            self._write_chunk(codec.dumps({"error": "Внутренняя ошибка сервера"}) + b"\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_stream(self, rows: Iterable[Dict], codec: JsonCodec) -> None:
+        buffer = bytearray()
+        for row in rows:
+            buffer += codec.dumps(row)
+            buffer += b"\n"
+            if len(buffer) >= STREAM_CHUNK_BYTES:
+                self._write_chunk(bytes(buffer))
+                buffer.clear()
+        if buffer:
+            self._write_chunk(bytes(buffer))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+def create_server(controller: RecipeController, host: str = "127.0.0.1", port: int = 8081,
+                  query_workers: int = 4, stream_workers: int = 2) -> ThreadingHTTPServer:
+    """Создает HTTP-сервер JSON API (запуск - serve_forever())"""
+    server = ThreadingHTTPServer((host, port), RecipeRequestHandler)
+    server.daemon_threads = True
+    server.api = RecipeApi(controller)
+    server.codec = JsonCodec(compact=True)
+    server.query_pool = ThreadPoolExecutor(query_workers, thread_name_prefix="recipe-query")
+    server.stream_pool = ThreadPoolExecutor(stream_workers, thread_name_prefix="recipe-stream")
+    return server
+
+
+def serve(controller: RecipeController, host: str = "127.0.0.1", port: int = 8081) -> None:
+    """Запускает сервер и обслуживает запросы до Ctrl+C"""
+    server = create_server(controller, host, port)
+    print(f"🌐 JSON API кулинарной книги: http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.query_pool.shutdown(wait=False)
+        server.stream_pool.shutdown(wait=False)
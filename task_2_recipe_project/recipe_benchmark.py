@@ -0,0 +1,230 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from recipe_model import RecipeModel, Recipe, RecipeType, CuisineType, Ingredient, PersistencePolicy
+from recipe_controller import RecipeController
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+DISHES = ["Борщ", "Суп", "Салат", "Паста", "Пирог", "Рагу", "Плов", "Котлеты",
+          "Блины", "Суши", "Тирамису", "Хачапури", "Гуакамоле", "Омлет", "Соус"]
+ADJECTIVES = ["домашний", "классический", "быстрый", "праздничный", "летний",
+              "острый", "постный", "сырный", "овощной", "мясной"]
+AUTHORS = ["Баба Галя", "Шеф Марко", "Шеф Карлос", "Анна", "Иван Петров",
+           "Мария", "Шеф Кенджи", "Нино", "Ольга", "Дмитрий"]
+INGREDIENTS = ["Свекла", "Картофель", "Морковь", "Лук репчатый", "Чеснок", "Соль",
+               "Черный перец", "Говядина", "Курица", "Яйца", "Мука", "Сахар",
+               "Молоко", "Сливочное масло", "Сметана", "Пармезан", "Рис",
+               "Помидор", "Огурец", "Укроп", "Петрушка", "Сыр", "Авокадо"]
+QUANTITIES = ["1 шт", "2 шт", "3 шт", "100 г", "200 г", "400 г", "1 ст. ложка",
+              "2 ст. ложки", "1 ч. ложка", "200 мл", "по вкусу", "для подачи"]
+DIFFICULTIES = ["Легкий", "Средний", "Сложный", None]
+
+
+def generate_recipes(count: int, seed: int = 42) -> List[Recipe]:
+    """Генерирует воспроизводимый набор рецептов"""
+    rng = random.Random(seed)
+    recipe_types = list(RecipeType)
+    cuisines = list(CuisineType)
+    recipes = []
+    for number in range(count):
+        name = f"{rng.choice(DISHES)} {rng.choice(ADJECTIVES)} №{number}"
+        ingredients = [
+            Ingredient(ingredient_name, rng.choice(QUANTITIES), optional=rng.random() < 0.1)
+            for ingredient_name in rng.sample(INGREDIENTS, rng.randint(5, 14))
+        ]
+        recipes.append(Recipe(
+            name=name,
+            author=rng.choice(AUTHORS),
+            recipe_type=rng.choice(recipe_types),
+            description=f"{name}: " + ", ".join(ing.name.lower() for ing in ingredients) + ".",
+            ingredients=ingredients,
+            cuisine=rng.choice(cuisines),
+            cooking_time=rng.choice([None, rng.randint(5, 240)]),
+            difficulty=rng.choice(DIFFICULTIES),
+        ))
+    return recipes
+
+
+def write_dataset(filename: str, recipes: List[Recipe]) -> None:
+    """Записывает набор рецептов в файл в формате модели"""
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump([recipe.to_dict() for recipe in recipes], file, ensure_ascii=False, indent=2)
+
+
+def measure(func: Callable[[], object], repeat: int, items: int = 1) -> Dict:
+    """Замеряет задержки, пропускную способность и пиковую память операции"""
+    latencies = []
+    result_size = None
+    gc.collect()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+        if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], bool):
+            # Методы контроллера возвращают (успех, данные): размер - у данных
+            _, result = result
+        if hasattr(result, "__len__") and not isinstance(result, str):
+            result_size = len(result)
+
+    # Память замеряется отдельным прогоном, чтобы tracemalloc не искажал время
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "repeat": repeat,
+        "items_per_call": items,
+        "result_size": result_size,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 4),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 4),
+        "throughput_per_s": round(repeat * items / total, 2) if total else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def measure_dataset_memory(filename: str, count: int) -> Dict:
+    """Замеряет память, которую удерживает загруженный набор данных"""
+    gc.collect()
+    tracemalloc.start()
+    model = RecipeModel(filename)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return {
+        "records": count,
+        "retained_bytes": retained,
+        "bytes_per_record": round(retained / count, 1) if count else None,
+        "load_peak_bytes": peak,
+    }
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Вычисляет перцентиль по отсортированному списку"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_benchmarks(count: int, repeat: int, add_samples: int, seed: int,
+                   persistence: PersistencePolicy) -> Dict:
+    """Запускает все замеры на наборе заданного размера"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "recipes_data.json")
+        write_dataset(filename, generate_recipes(count, seed))
+        results["dataset_memory"] = measure_dataset_memory(filename, count)
+
+        model = RecipeModel(filename, persistence=persistence)
+        # Без кэша запросов, чтобы замерять сами операции модели
+        controller = RecipeController(model, cache_size=0)
+        cached_controller = RecipeController(model)
+        role = "admin"
+
+        def load():
+            model.load_from_file()
+            return model.recipes
+
+        results["load_from_file"] = measure(load, repeat, count)
+        results["save_to_file"] = measure(model.save_to_file, repeat, count)
+
+        records = model.storage.load()
+        results["decode_from_dict"] = measure(
+            lambda: [Recipe.from_dict(record) for record in records], repeat, count)
+        results["decode_load_many"] = measure(lambda: RecipeModel.load_many(records), repeat, count)
+        del records
+
+        # Отдельный seed, чтобы номера в названиях не совпали с загруженными рецептами
+        new_recipes = iter(generate_recipes(add_samples + 1, seed + 1))
+        results["add_recipe"] = measure(
+            lambda: controller.add_recipe(**_recipe_kwargs(next(new_recipes)), user_role=role),
+            add_samples)
+
+        results["search_recipes"] = measure(
+            lambda: controller.search_recipes("борщ", role), repeat)
+        results["filter_by_cuisine"] = measure(
+            lambda: controller.filter_by_cuisine(CuisineType.ITALIAN, role), repeat)
+        results["filter_by_type"] = measure(
+            lambda: controller.filter_by_type(RecipeType.SOUP, role), repeat)
+        results["filter_by_author"] = measure(
+            lambda: controller.filter_by_author("шеф", role), repeat)
+        results["filter_by_cooking_time"] = measure(
+            lambda: controller.filter_by_cooking_time(30, role), repeat)
+        results["search_recipes_cached"] = measure(
+            lambda: cached_controller.search_recipes("борщ", role), repeat)
+        results["get_statistics"] = measure(
+            lambda: controller.get_statistics(role), repeat)
+        model.flush()
+    return results
+
+
+def _recipe_kwargs(recipe: Recipe) -> Dict:
+    """Раскладывает рецепт в аргументы RecipeController.add_recipe"""
+    return {
+        "name": recipe.name,
+        "author": recipe.author + " (новый)",
+        "recipe_type": recipe.recipe_type,
+        "description": recipe.description,
+        "ingredients": recipe.ingredients,
+        "cuisine": recipe.cuisine,
+        "cooking_time": recipe.cooking_time,
+        "difficulty": recipe.difficulty,
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    """Точка входа бенчмарка"""
+    parser = argparse.ArgumentParser(description="Бенчмарк кулинарной книги")
+    parser.add_argument("--scale", choices=SCALES, nargs="+", default=["1k"],
+                        help="Размеры синтетического набора данных")
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов на операцию")
+    parser.add_argument("--add-samples", type=int, default=5,
+                        help="Количество добавлений рецептов")
+    parser.add_argument("--persistence", choices=[policy.value for policy in PersistencePolicy],
+                        default=PersistencePolicy.IMMEDIATE.value,
+                        help="Политика сохранения модели при добавлении")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Файл для JSON-отчета (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "suite": "recipes",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "persistence": args.persistence,
+        "scales": {},
+    }
+    for scale in args.scale:
+        report["scales"][scale] = run_benchmarks(SCALES[scale], args.repeat, args.add_samples,
+                                                 args.seed, PersistencePolicy(args.persistence))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
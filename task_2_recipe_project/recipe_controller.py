@@ -1,37 +1,65 @@
-from typing import List, Optional, Tuple, Dict
-from recipe_model import RecipeModel, Recipe, RecipeType, CuisineType, Ingredient
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Dict
+from access_control import AccessControl, requires_permission
+from query_cache import QueryCache
+from recipe_model import (SORT_KEYS, RecipeModel, Recipe, RecipeType, CuisineType, Ingredient,
+                          validate_recipe_fields)
+from record_view import RecordView
+
+if TYPE_CHECKING:
+    # Нужны только для аннотаций: импорт и история загружаются при первом использовании
+    from recipe_history import VersionInfo
+    from recipe_import import ImportReport
 
 
 class RecipeController:
     """Контроллер для управления рецептами"""
 
     USER_ROLES = {
-        "admin": ["add", "edit", "delete", "view_all", "stats", "export"],
-        "editor": ["add", "edit", "view_all", "stats"],
+        "admin": ["add", "edit", "delete", "view_all", "search", "filter", "stats", "export"],
+        "editor": ["add", "edit", "view_all", "search", "filter", "stats"],
         "viewer": ["view_all", "search", "filter"],
-        "guest": ["view_all", "search"]
+        "guest": ["view_all", "search", "filter"]
     }
 
-    def __init__(self, model: RecipeModel):
-        self.model = model
+    FACET_FILTERS = ("cuisine", "recipe_type", "difficulty", "max_cooking_time", "author")
+
+    def __init__(self, model: RecipeModel, cache_size: int = 256,
+                 cache_ttl_seconds: Optional[float] = 300.0):
+        self._model = model
+        self.access_control = AccessControl(self.USER_ROLES)
+        self.query_cache = QueryCache(cache_size, cache_ttl_seconds)
+
+    @property
+    def model(self) -> RecipeModel:
+        """Модель; при фоновой загрузке ждет, пока данные будут готовы"""
+        self._model.wait_until_ready()
+        return self._model
+
+    def is_ready(self) -> bool:
+        """Загружены ли данные (не блокирует, в отличие от обращения к model)"""
+        return self._model.is_ready
+
+    def has_permission(self, user_role: str, action: str) -> bool:
+        """Проверяет, есть ли у роли право на действие"""
+        return self.access_control.is_allowed(user_role, action)
+
+    def get_denial_stats(self) -> Dict[str, int]:
+        """Получает количество отказов в доступе по действиям"""
+        return self.access_control.get_denial_stats()
 
     # ========== CRUD операции ==========
 
+    @requires_permission("add", "Доступ запрещен: недостаточно прав для добавления рецептов")
     def add_recipe(self, name: str, author: str, recipe_type: RecipeType,
                    description: str, ingredients: List[Ingredient],
                    cuisine: CuisineType, youtube_url: Optional[str] = None,
                    google_url: Optional[str] = None, cooking_time: Optional[int] = None,
                    difficulty: Optional[str] = None, user_role: str = "guest") -> Tuple[bool, str]:
         """Добавляет новый рецепт"""
-        if user_role not in ["admin", "editor"]:
-            return False, "Доступ запрещен: недостаточно прав для добавления рецептов"
-
-        # Валидация данных
-        if not name or not author or not description:
-            return False, "Название, автор и описание обязательны"
-
-        if not ingredients:
-            return False, "Добавьте хотя бы один ингредиент"
+        # Валидация данных (те же правила применяет массовый импорт)
+        error = validate_recipe_fields(name, author, description, ingredients)
+        if error:
+            return False, error
 
         # Создаем рецепт
         recipe = Recipe(
@@ -53,17 +81,29 @@ class RecipeController:
         else:
             return False, f"Рецепт с названием '{name}' от автора '{author}' уже существует"
 
+    @requires_permission("add", "Доступ запрещен: недостаточно прав для добавления рецептов")
+    def import_recipes(self, filename: str, file_format: Optional[str] = None,
+                       workers: Optional[int] = None,
+                       user_role: str = "guest") -> "Tuple[bool, ImportReport | str]":
+        """Импортирует рецепты из CSV или JSONL; возвращает отчет ImportReport или текст ошибки"""
+        try:
+            report = self.model.import_file(filename, file_format, workers)
+        except OSError as e:
+            return False, f"Не удалось прочитать файл: {e}"
+        except ValueError as e:
+            return False, str(e)
+        return True, report
+
+    @requires_permission("delete", "Доступ запрещен: только администратор может удалять рецепты")
     def remove_recipe(self, index: int, user_role: str = "guest") -> Tuple[bool, str]:
         """Удаляет рецепт по индексу"""
-        if user_role != "admin":
-            return False, "Доступ запрещен: только администратор может удалять рецепты"
-
         recipe = self.model.remove_recipe(index)
         if recipe:
             return True, f"Рецепт '{recipe.name}' удален"
         return False, "Рецепт с таким индексом не найден"
 
-    def update_recipe(self, index: int, **kwargs) -> Tuple[bool, str]:
+    @requires_permission("edit", "Доступ запрещен: недостаточно прав для редактирования рецептов")
+    def update_recipe(self, index: int, user_role: str = "guest", **kwargs) -> Tuple[bool, str]:
         """Обновляет рецепт"""
         recipe = self.model.get_recipe_by_index(index)
         if not recipe:
@@ -90,69 +130,193 @@ class RecipeController:
 
     # ========== Поиск и фильтрация ==========
 
-    def get_all_recipes(self, user_role: str = "guest") -> Tuple[bool, List[Recipe] | str]:
-        """Получает все рецепты"""
-        if user_role not in self.USER_ROLES:
-            return False, "Неизвестная роль пользователя"
-
-        if "view_all" not in self.USER_ROLES[user_role]:
-            return False, "Доступ запрещен: недостаточно прав"
-
-        recipes = self.model.recipes
-        return True, recipes
-
-    def search_recipes(self, query: str) -> List[Recipe]:
-        """Ищет рецепты по запросу"""
-        return self.model.search_recipes(query)
-
-    def filter_by_cuisine(self, cuisine: CuisineType) -> List[Recipe]:
+    @requires_permission("view_all")
+    def get_all_recipes(self, user_role: str = "guest") -> Tuple[bool, RecordView | str]:
+        """Получает все рецепты как представление только для чтения (без копирования)"""
+        return True, self.model.view_all()
+
+    def _cached(self, key: tuple, compute) -> Tuple[Recipe, ...]:
+        """Возвращает неизменяемый результат запроса из кэша или вычисляет его"""
+        return self.query_cache.get_or_compute(
+            key, self.model.generation, lambda: tuple(compute()))
+
+    @requires_permission("search")
+    def search_recipes(self, query: str, user_role: str = "guest",
+                       limit: Optional[int] = None) -> Tuple[bool, Tuple[Recipe, ...] | str]:
+        """Ищет рецепты по запросу (limit - не больше первых limit рецептов)"""
+        # Поиск не зависит от регистра: "Борщ" и "борщ" делят одну запись кэша
+        return True, self._cached(("search", query.lower(), limit),
+                                  lambda: self.model.search_recipes(query, limit))
+
+    @requires_permission("search")
+    def fuzzy_search_recipes(self, query: str, limit: int = 10,
+                             user_role: str = "guest") -> Tuple[bool, Tuple[Tuple[Recipe, float], ...] | str]:
+        """Ищет рецепты с учетом опечаток, лучшие совпадения идут первыми"""
+        normalized = query.strip().lower()
+        return True, self._cached(("fuzzy", normalized, limit),
+                                  lambda: self.model.fuzzy_search(normalized, limit))
+
+    @requires_permission("filter")
+    def filter_by_cuisine(self, cuisine: CuisineType, user_role: str = "guest") -> Tuple[bool, Tuple[Recipe, ...] | str]:
         """Фильтрует рецепты по кухне"""
-        return self.model.filter_by_cuisine(cuisine)
+        return True, self._cached(("cuisine", cuisine), lambda: self.model.filter_by_cuisine(cuisine))
 
-    def filter_by_type(self, recipe_type: RecipeType) -> List[Recipe]:
+    @requires_permission("filter")
+    def filter_by_type(self, recipe_type: RecipeType, user_role: str = "guest") -> Tuple[bool, Tuple[Recipe, ...] | str]:
         """Фильтрует рецепты по типу"""
-        return self.model.filter_by_type(recipe_type)
+        return True, self._cached(("type", recipe_type), lambda: self.model.filter_by_type(recipe_type))
 
-    def filter_by_author(self, author: str) -> List[Recipe]:
+    @requires_permission("filter")
+    def filter_by_author(self, author: str, user_role: str = "guest") -> Tuple[bool, Tuple[Recipe, ...] | str]:
         """Фильтрует рецепты по автору"""
-        return self.model.filter_by_author(author)
+        return True, self._cached(("author", author.lower()), lambda: self.model.filter_by_author(author))
 
-    def filter_by_cooking_time(self, max_time: int) -> List[Recipe]:
+    @requires_permission("filter")
+    def filter_by_cooking_time(self, max_time: int, user_role: str = "guest") -> Tuple[bool, Tuple[Recipe, ...] | str]:
         """Фильтрует рецепты по времени приготовления"""
-        return self.model.filter_by_cooking_time(max_time)
-
-    def get_recipe_details(self, index: int) -> Tuple[bool, Recipe | str]:
+        return True, self._cached(("cooking_time", max_time),
+                                  lambda: self.model.filter_by_cooking_time(max_time))
+
+    @requires_permission("filter")
+    def facets(self, filters: Optional[Dict] = None, page: int = 1, page_size: int = 20,
+               user_role: str = "guest") -> Tuple[bool, Dict | str]:
+        """Возвращает страницу отфильтрованных рецептов вместе с фасетами.
+
+        filters - словарь с ключами из FACET_FILTERS, например
+        {"cuisine": CuisineType.ITALIAN, "max_cooking_time": 30}.
+        """
+        filters = filters or {}
+        unknown = set(filters) - set(self.FACET_FILTERS)
+        if unknown:
+            return False, f"Неизвестные фильтры: {', '.join(sorted(unknown))}"
+        if page < 1 or page_size < 1:
+            return False, "Номер и размер страницы должны быть положительными"
+
+        key = ("facets",) + tuple(filters.get(name) for name in self.FACET_FILTERS)
+        matches, counts = self.query_cache.get_or_compute(
+            key, self.model.generation, lambda: self._facet_search(filters))
+
+        start = (page - 1) * page_size
+        return True, {
+            "results": matches[start:start + page_size],
+            "total": len(matches),
+            "page": page,
+            "page_size": page_size,
+            "facets": {name: dict(values) for name, values in counts.items()},
+        }
+
+    @requires_permission("filter")
+    def select_recipes(self, filters: Optional[Dict] = None,
+                       user_role: str = "guest") -> Tuple[bool, RecordView | str]:
+        """Возвращает ленивую выборку рецептов по фильтрам (ключи из FACET_FILTERS).
+
+        В отличие от facets, фасеты не считаются, а рецепты проверяются по
+        мере чтения результата: для первой страницы или проверки на пустоту
+        коллекция не проходится целиком.
+        """
+        filters = filters or {}
+        unknown = set(filters) - set(self.FACET_FILTERS)
+        if unknown:
+            return False, f"Неизвестные фильтры: {', '.join(sorted(unknown))}"
+        return True, self.model.select_recipes(**filters)
+
+    @requires_permission("view_all")
+    def get_sorted_recipes(self, sort_by: str = "name", descending: bool = False,
+                           filters: Optional[Dict] = None,
+                           user_role: str = "guest") -> Tuple[bool, RecordView | str]:
+        """Получает рецепты, отсортированные по времени приготовления, названию или автору.
+
+        filters - необязательные фильтры из FACET_FILTERS (нужно право filter).
+        Возвращает представление, страница берется срезом без пересортировки.
+        """
+        if sort_by not in SORT_KEYS:
+            return False, f"Сортировка возможна по: {', '.join(SORT_KEYS)}"
+        filters = filters or {}
+        unknown = set(filters) - set(self.FACET_FILTERS)
+        if unknown:
+            return False, f"Неизвестные фильтры: {', '.join(sorted(unknown))}"
+        if filters and not self.has_permission(user_role, "filter"):
+            self.access_control.record_denial("filter")
+            return False, "Доступ запрещен: недостаточно прав для фильтрации"
+        return True, self.model.sorted_recipes(sort_by, descending, **filters)
+
+    def _facet_search(self, filters: Dict) -> Tuple[Tuple[Recipe, ...], Dict]:
+        matches, counts = self.model.facet_search(**filters)
+        return tuple(matches), counts
+
+    def get_cache_stats(self) -> Dict:
+        """Получает статистику кэша запросов"""
+        return self.query_cache.get_stats()
+
+    @requires_permission("view_all")
+    def get_recipe_details(self, index: int, user_role: str = "guest") -> Tuple[bool, Recipe | str]:
         """Получает детальную информацию о рецепте"""
         recipe = self.model.get_recipe_by_index(index)
         if recipe:
             return True, recipe
         return False, "Рецепт не найден"
 
+    @requires_permission("view_all")
+    def similar_recipes(self, index: int, k: int = 5,
+                        user_role: str = "guest") -> Tuple[bool, Tuple[Tuple[Recipe, float], ...] | str]:
+        """Получает до k рецептов, похожих на рецепт по индексу (самые похожие первыми)"""
+        if k < 1:
+            return False, "Количество похожих рецептов должно быть положительным"
+        similar = self.query_cache.get_or_compute(
+            ("similar", index, k), self.model.generation,
+            lambda: self._similar_recipes(index, k))
+        if similar is None:
+            return False, "Рецепт не найден"
+        return True, similar
+
+    def _similar_recipes(self, index: int, k: int) -> Optional[Tuple[Tuple[Recipe, float], ...]]:
+        similar = self.model.similar_recipes(index, k)
+        return None if similar is None else tuple(similar)
+
+    @requires_permission("view_all")
+    def get_shopping_list(self, indices: List[int], multipliers: Optional[List[float]] = None,
+                          user_role: str = "guest") -> Tuple[bool, List[Dict] | str]:
+        """Составляет список покупок для выбранных рецептов"""
+        recipes = []
+        for index in indices:
+            recipe = self.model.get_recipe_by_index(index)
+            if recipe is None:
+                return False, f"Рецепт #{index} не найден"
+            recipes.append(recipe)
+        if multipliers is not None and len(multipliers) != len(recipes):
+            return False, "Количество множителей порций не совпадает с количеством рецептов"
+        return True, self.model.shopping_list(recipes, multipliers)
+
     # ========== Статистика и аналитика ==========
 
+    @requires_permission("stats", "Доступ запрещен: недостаточно прав для просмотра статистики")
     def get_statistics(self, user_role: str = "guest") -> Tuple[bool, Dict | str]:
         """Получает статистику по рецептам"""
-        if user_role not in ["admin", "editor"]:
-            return False, "Доступ запрещен: недостаточно прав для просмотра статистики"
-
         stats = self.model.get_statistics()
         return True, stats
 
-    def get_all_authors(self) -> List[str]:
+    @requires_permission("view_all")
+    def get_all_authors(self, user_role: str = "guest") -> Tuple[bool, List[str] | str]:
         """Получает список всех авторов"""
-        return self.model.get_all_authors()
+        return True, self.model.get_all_authors()
 
-    def get_all_cuisines(self) -> List[str]:
+    @requires_permission("view_all")
+    def get_all_cuisines(self, user_role: str = "guest") -> Tuple[bool, List[str] | str]:
         """Получает список всех кухонь"""
-        return self.model.get_all_cuisines()
+        return True, self.model.get_all_cuisines()
 
     # ========== Экспорт данных ==========
 
+    @requires_permission("export", "Доступ запрещен: только администратор может экспортировать данные")
+    def export_recipes(self, user_role: str = "guest") -> Tuple[bool, Iterator[Dict] | str]:
+        """Возвращает итератор по словарям всех рецептов для потоковой выгрузки"""
+        # Снимок ссылок на рецепты: словари строятся по одному при чтении итератора
+        recipes = tuple(self.model.recipes)
+        return True, (recipe.to_dict() for recipe in recipes)
+
+    @requires_permission("export", "Доступ запрещен: только администратор может экспортировать данные")
     def export_recipes_to_text(self, filename: str, user_role: str = "guest") -> Tuple[bool, str]:
         """Экспортирует рецепты в текстовый файл"""
-        if user_role != "admin":
-            return False, "Доступ запрещен: только администратор может экспортировать данные"
-
         try:
             with open(filename, 'w', encoding='utf-8') as file:
                 file.write("=" * 50 + "\n")
@@ -191,4 +355,46 @@ class RecipeController:
             return True, f"Рецепты успешно экспортированы в файл '{filename}'"
 
         except Exception as e:
-            return False, f"Ошибка при экспорте: {str(e)}"
\ No newline at end of file
+            return False, f"Ошибка при экспорте: {str(e)}"
+    # ========== История версий ==========
+
+    HISTORY_DISABLED_MESSAGE = "История версий не включена"
+
+    @requires_permission("edit", "Доступ запрещен: недостаточно прав для просмотра истории")
+    def get_versions(self, limit: Optional[int] = 20,
+                     user_role: str = "guest") -> "Tuple[bool, List[VersionInfo] | str]":
+        """Возвращает последние версии коллекции (от новых к старым)"""
+        if self.model.history is None:
+            return False, self.HISTORY_DISABLED_MESSAGE
+        return True, self.model.history.versions(limit)
+
+    @requires_permission("edit", "Доступ запрещен: недостаточно прав для просмотра истории")
+    def get_recipes_at(self, version: Optional[int] = None, timestamp: Optional[float] = None,
+                       user_role: str = "guest") -> Tuple[bool, Tuple[Recipe, ...] | str]:
+        """Возвращает рецепты коллекции в версии version или в момент timestamp"""
+        history = self.model.history
+        if history is None:
+            return False, self.HISTORY_DISABLED_MESSAGE
+        if version is None:
+            if timestamp is None:
+                return False, "Укажите версию или момент времени"
+            version = history.version_at(timestamp)
+            if version is None:
+                return False, "На этот момент в истории нет версий"
+        try:
+            return True, history.snapshot(version)
+        except ValueError as e:
+            return False, str(e)
+
+    @requires_permission("delete", "Доступ запрещен: только администратор может восстанавливать версии")
+    def restore_version(self, version: int, user_role: str = "guest") -> Tuple[bool, str]:
+        """Делает версию коллекции текущей (записывается новой версией истории)"""
+        if self.model.history is None:
+            return False, self.HISTORY_DISABLED_MESSAGE
+        try:
+            new_version = self.model.history.restore(version)
+        except ValueError as e:
+            return False, str(e)
+        if new_version is None:
+            return True, f"Коллекция уже совпадает с версией {version}"
+        return True, f"Коллекция восстановлена из версии {version} (новая версия {new_version})"
@@ -0,0 +1,321 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from events import ChangeEvent, ChangeKind
+from json_codec import JsonCodec
+
+# Размер хеша содержимого рецепта: по нему рецепт хранится в истории один раз
+DIGEST_SIZE = 16
+
+# Контрольная точка (полный список хешей) пишется каждые CHECKPOINT_INTERVAL версий
+# или после CHECKPOINT_DELTA_ROWS изменений, поэтому чтение любой версии
+# повторяет не больше этого числа изменений
+CHECKPOINT_INTERVAL = 50
+CHECKPOINT_DELTA_ROWS = 10_000
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+# Компактный JSON без сжатия: у orjson и стандартного json он совпадает для полей рецепта
+_codec = JsonCodec(compact=True)
+
+
+def encode_record(record: Dict) -> bytes:
+    """Каноническое представление рецепта (порядок ключей задан Recipe.to_dict)"""
+    return _codec.dumps(record)
+
+
+def content_hash(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=DIGEST_SIZE).digest()
+
+
+@dataclass(frozen=True)
+class VersionInfo:
+    """Версия коллекции: номер, время создания, описание и число изменений"""
+    version: int
+    created: float
+    label: str
+    changes: int
+
+
+class RecipeHistory:
+    """История версий коллекции рецептов в SQLite рядом с файлом данных.
+
+    Модель подписывает apply_events на свои события (RecipeModel.enable_history).
+    Версия - это одна доставка событий модели (одиночное изменение или
+    весь пакет batch_changes). Рецепты хранятся по хешу содержимого один
+    раз на все версии, поэтому неизмененные рецепты общие для всех версий,
+    а версия стоит столько, сколько в ней изменений. Версия записывается
+    как список изменений (добавление, удаление, замена со ссылкой на хеш),
+    а периодические контрольные точки хранят список хешей коллекции.
+    Чтение версии находит ближайшую контрольную точку поиском по
+    B-дереву (O(log versions)) и повторяет не больше CHECKPOINT_INTERVAL
+    версий изменений. Рецепты, которые есть в текущей коллекции, берутся
+    из нее, а не читаются заново.
+
+    Политика хранения (keep_versions, max_age_days) удаляет старые версии
+    после каждой контрольной точки; рецепты, на которые больше не ссылается
+    ни одна версия, удаляются вместе с ними.
+    """
+
+    def __init__(self, model, filename: Optional[str] = None,
+                 checkpoint_interval: int = CHECKPOINT_INTERVAL,
+                 keep_versions: Optional[int] = None, max_age_days: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        self.model = model
+        self.filename = filename or f"{model.filename}.history.db"
+        self.checkpoint_interval = checkpoint_interval
+        self.keep_versions = keep_versions
+        self.max_age_days = max_age_days
+        self.clock = clock
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        # Хеши и рецепты текущей коллекции по позициям (рецепты - те же объекты, что в модели)
+        self._hashes: List[bytes] = []
+        self._recipes: List = []
+        self._versions_since_checkpoint = 0
+        self._deltas_since_checkpoint = 0
+        self.sync()
+
+    def _create_schema(self) -> None:
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS versions (
+                    version INTEGER PRIMARY KEY,
+                    created REAL NOT NULL,
+                    label TEXT NOT NULL,
+                    changes INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_versions_created ON versions(created);
+                CREATE TABLE IF NOT EXISTS recipes (
+                    hash BLOB PRIMARY KEY,
+                    record BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS deltas (
+                    version INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    hash BLOB,
+                    PRIMARY KEY (version, seq)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    version INTEGER PRIMARY KEY,
+                    hashes BLOB NOT NULL
+                );
+            """)
+
+    def close(self) -> None:
+        """Закрывает базу истории"""
+        with self._lock:
+            self.connection.close()
+
+    # ========== Запись версий ==========
+
+    def sync(self, label: str = "загрузка") -> Optional[int]:
+        """Сверяет историю с коллекцией модели.
+
+        Если коллекция изменилась в обход событий (загрузка файла, замена
+        коллекции, восстановление версии), она записывается новой версией с
+        контрольной точкой. Возвращает номер новой версии или None.
+        """
+        with self._lock:
+            recipes = list(self.model.recipes)
+            payloads = [encode_record(recipe.to_dict()) for recipe in recipes]
+            hashes = [content_hash(payload) for payload in payloads]
+            self._hashes, self._recipes = hashes, recipes
+            head = self.head
+            if head is not None and self._hashes_at(head) == hashes:
+                self._versions_since_checkpoint, self._deltas_since_checkpoint = self.connection.execute(
+                    "SELECT COUNT(DISTINCT version), COUNT(*) FROM deltas "
+                    "WHERE version > (SELECT MAX(version) FROM checkpoints)").fetchone()
+                return None
+            with self.connection:
+                version = self._new_version(label, len(hashes))
+                self._store_recipes(zip(hashes, payloads))
+                self._checkpoint(version)
+            return version
+
+    def apply_events(self, events: List[ChangeEvent]) -> None:
+        """Обработчик событий модели: записывает их одной версией"""
+        with self._lock:
+            blobs = []
+            rows = []
+            with self.connection:
+                version = self._new_version("изменение", len(events))
+                for seq, event in enumerate(events):
+                    if event.kind == ChangeKind.REMOVED:
+                        del self._hashes[event.index]
+                        del self._recipes[event.index]
+                        rows.append((version, seq, event.kind.value, event.index, None))
+                        continue
+                    payload = encode_record(event.new.to_dict())
+                    digest = content_hash(payload)
+                    blobs.append((digest, payload))
+                    if event.kind == ChangeKind.ADDED:
+                        self._hashes.insert(event.index, digest)
+                        self._recipes.insert(event.index, event.new)
+                    else:
+                        self._hashes[event.index] = digest
+                        self._recipes[event.index] = event.new
+                    rows.append((version, seq, event.kind.value, event.index, digest))
+                self._store_recipes(blobs)
+                self.connection.executemany(
+                    "INSERT INTO deltas (version, seq, kind, position, hash) VALUES (?, ?, ?, ?, ?)", rows)
+
+                self._versions_since_checkpoint += 1
+                self._deltas_since_checkpoint += len(rows)
+                checkpoint = (self._versions_since_checkpoint >= self.checkpoint_interval
+                              or self._deltas_since_checkpoint >= CHECKPOINT_DELTA_ROWS)
+                if checkpoint:
+                    self._checkpoint(version)
+            if checkpoint:
+                self.collect_garbage()
+
+    def _new_version(self, label: str, changes: int) -> int:
+        cursor = self.connection.execute(
+            "INSERT INTO versions (created, label, changes) VALUES (?, ?, ?)",
+            (self.clock(), label, changes))
+        return cursor.lastrowid
+
+    def _store_recipes(self, blobs: Iterable[Tuple[bytes, bytes]]) -> None:
+        # Рецепт с тем же содержимым уже хранится: у версий он общий
+        self.connection.executemany("INSERT OR IGNORE INTO recipes (hash, record) VALUES (?, ?)", blobs)
+
+    def _checkpoint(self, version: int, hashes: Optional[List[bytes]] = None) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO checkpoints (version, hashes) VALUES (?, ?)",
+            (version, b"".join(self._hashes if hashes is None else hashes)))
+        if hashes is None:
+            self._versions_since_checkpoint = 0
+            self._deltas_since_checkpoint = 0
+
+    # ========== Чтение версий ==========
+
+    @property
+    def head(self) -> Optional[int]:
+        """Номер последней версии (None, если история пуста)"""
+        with self._lock:
+            return self.connection.execute("SELECT MAX(version) FROM versions").fetchone()[0]
+
+    def versions(self, limit: Optional[int] = None) -> List[VersionInfo]:
+        """Версии от новых к старым"""
+        # Соединение общее с apply_events из других потоков: чтение тоже идет под блокировкой
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT version, created, label, changes FROM versions ORDER BY version DESC LIMIT ?",
+                (-1 if limit is None else limit,)).fetchall()
+        return [VersionInfo(*row) for row in rows]
+
+    def version_at(self, timestamp: float) -> Optional[int]:
+        """Версия, действовавшая в момент timestamp (поиск по индексу времени)"""
+        with self._lock:
+            return self.connection.execute(
+                "SELECT MAX(version) FROM versions WHERE created <= ?", (timestamp,)).fetchone()[0]
+
+    def _hashes_at(self, version: int) -> List[bytes]:
+        """Хеши рецептов версии: ближайшая контрольная точка и изменения после нее"""
+        if self.connection.execute("SELECT 1 FROM versions WHERE version = ?", (version,)).fetchone() is None:
+            raise ValueError(f"Версия {version} не найдена")
+        checkpoint, packed = self.connection.execute(
+            "SELECT version, hashes FROM checkpoints WHERE version <= ? ORDER BY version DESC LIMIT 1",
+            (version,)).fetchone()
+        hashes = [packed[i:i + DIGEST_SIZE] for i in range(0, len(packed), DIGEST_SIZE)]
+        deltas = self.connection.execute(
+            "SELECT kind, position, hash FROM deltas WHERE version > ? AND version <= ? "
+            "ORDER BY version, seq", (checkpoint, version))
+        for kind, position, digest in deltas:
+            if kind == ChangeKind.ADDED.value:
+                hashes.insert(position, digest)
+            elif kind == ChangeKind.REMOVED.value:
+                del hashes[position]
+            else:
+                hashes[position] = digest
+        return hashes
+
+    def snapshot(self, version: int) -> Tuple:
+        """Рецепты коллекции в версии version (ValueError, если версии нет)"""
+        with self._lock:
+            hashes = self._hashes_at(version)
+            # Рецепты текущей коллекции общие с версией: из базы читаются только отличающиеся
+            known: Dict[bytes, object] = dict(zip(self._hashes, self._recipes))
+            missing = list({digest for digest in hashes if digest not in known})
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT hash, record FROM recipes WHERE hash IN ({', '.join('?' * len(batch))})", batch)
+                digests, records = zip(*rows)
+                known.update(zip(digests, self.model.load_many(_codec.loads(record) for record in records)))
+            return tuple(known[digest] for digest in hashes)
+
+    def restore(self, version: int) -> Optional[int]:
+        """Делает версию version текущей коллекцией.
+
+        История не переписывается: восстановленное состояние записывается
+        новой версией. Возвращает ее номер (None, если коллекция не изменилась).
+        """
+        with self._lock:
+            recipes = self.snapshot(version)
+            return self.model.replace_recipes(recipes, f"восстановление версии {version}")
+
+    # ========== Политика хранения ==========
+
+    def _oldest_kept(self) -> Optional[int]:
+        """Самая старая версия, которую оставляет политика хранения"""
+        candidates = []
+        if self.keep_versions is not None:
+            row = self.connection.execute(
+                "SELECT version FROM versions ORDER BY version DESC LIMIT 1 OFFSET ?",
+                (max(self.keep_versions, 1) - 1,)).fetchone()
+            if row is not None:
+                candidates.append(row[0])
+        if self.max_age_days is not None:
+            cutoff = self.clock() - self.max_age_days * SECONDS_PER_DAY
+            # Последняя версия сохраняется всегда, даже если она старше срока
+            row = self.connection.execute(
+                "SELECT COALESCE(MIN(version), (SELECT MAX(version) FROM versions)) "
+                "FROM versions WHERE created >= ?", (cutoff,)).fetchone()
+            if row[0] is not None:
+                candidates.append(row[0])
+        return max(candidates) if candidates else None
+
+    def collect_garbage(self) -> int:
+        """Удаляет версии вне политики хранения и рецепты, на которые ссылались только они.
+
+        Возвращает число удаленных версий.
+        """
+        with self._lock:
+            oldest = self._oldest_kept()
+            if oldest is None:
+                return 0
+            removed = self.connection.execute(
+                "SELECT COUNT(*) FROM versions WHERE version < ?", (oldest,)).fetchone()[0]
+            if not removed:
+                return 0
+            with self.connection:
+                # Самая старая оставшаяся версия становится контрольной точкой: ее
+                # изменения и более ранние версии больше не нужны для чтения
+                self._checkpoint(oldest, self._hashes_at(oldest))
+                self.connection.execute("DELETE FROM deltas WHERE version <= ?", (oldest,))
+                self.connection.execute("DELETE FROM checkpoints WHERE version < ?", (oldest,))
+                self.connection.execute("DELETE FROM versions WHERE version < ?", (oldest,))
+
+                live = set()
+                for (packed,) in self.connection.execute("SELECT hashes FROM checkpoints"):
+                    live.update(packed[i:i + DIGEST_SIZE] for i in range(0, len(packed), DIGEST_SIZE))
+                live.update(digest for (digest,) in self.connection.execute(
+                    "SELECT hash FROM deltas WHERE hash IS NOT NULL"))
+                self.connection.execute("CREATE TEMP TABLE live (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+                try:
+                    self.connection.executemany("INSERT INTO live (hash) VALUES (?)",
+                                                ((digest,) for digest in live))
+                    self.connection.execute("DELETE FROM recipes WHERE hash NOT IN (SELECT hash FROM live)")
+                finally:
+                    self.connection.execute("DROP TABLE live")
+            return removed
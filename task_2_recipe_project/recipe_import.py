@@ -0,0 +1,277 @@
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from json_codec import DECODE_ERRORS, JsonCodec
+from recipe_model import CUISINES_BY_VALUE, RECIPE_TYPES_BY_VALUE, validate_recipe_fields
+
+# Записи отправляются на проверку пачками: одна задача пула на CHUNK_SIZE записей
+CHUNK_SIZE = 1000
+
+# Сколько пачек на процесс может ждать проверки: файл читается не быстрее,
+# чем идет проверка, поэтому в памяти не оказывается весь непроверенный файл
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+FORMATS_BY_EXTENSION = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# Колонки CSV; ингредиенты записываются в одной колонке как в карточке рецепта:
+# "Свекла - 2 шт; Сметана - 100 г; Зелень - по вкусу (по желанию)"
+CSV_COLUMNS = ("name", "author", "recipe_type", "description", "ingredients", "cuisine",
+               "cooking_time", "difficulty", "youtube_url", "google_url")
+REQUIRED_CSV_COLUMNS = ("name", "author", "recipe_type", "description", "ingredients", "cuisine")
+INGREDIENT_SEPARATOR = ";"
+QUANTITY_SEPARATOR = " - "
+OPTIONAL_SUFFIX = "(по желанию)"
+
+_codec = JsonCodec()
+
+
+@dataclass
+class ImportReport:
+    """Итог импорта: счетчики, ошибки и дубликаты с номерами строк, скорость"""
+    total: int = 0
+    added: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    duplicates: List[Tuple[int, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else 0.0
+
+    def summary(self, limit: int = 20) -> str:
+        """Текстовый отчет; из ошибок и дубликатов показываются первые limit"""
+        lines = [
+            f"Прочитано записей: {self.total}, добавлено: {self.added}, "
+            f"дубликатов: {len(self.duplicates)}, ошибок: {len(self.errors)}",
+            f"Время: {self.seconds:.2f} с ({self.records_per_second:.0f} записей/с)",
+        ]
+        for title, entries in (("Ошибки:", self.errors), ("Дубликаты:", self.duplicates)):
+            if entries:
+                lines.append(title)
+                lines.extend(f"  строка {number}: {message}" for number, message in entries[:limit])
+                if len(entries) > limit:
+                    lines.append(f"  ... и еще {len(entries) - limit}")
+        return "\n".join(lines)
+
+
+# ========== Чтение файла ==========
+
+def detect_format(filename: str) -> str:
+    """Формат файла по расширению (csv или jsonl)"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in FORMATS_BY_EXTENSION:
+        raise ValueError(f"Неизвестный формат файла {filename}: ожидается .csv или .jsonl")
+    return FORMATS_BY_EXTENSION[extension]
+
+
+def read_records(filename: str, file_format: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """Построчно читает файл импорта и выдает пары (номер строки, запись).
+
+    Строки JSONL выдаются как есть (байты) и разбираются уже при проверке,
+    в процессах пула; строки CSV - словарями колонок.
+    """
+    file_format = file_format or detect_format(filename)
+    if file_format == "jsonl":
+        with open(filename, "rb") as file:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    yield number, line
+    elif file_format == "csv":
+        with open(filename, encoding="utf-8-sig", newline="") as file:
+            reader = csv.DictReader(file)
+            missing = [column for column in REQUIRED_CSV_COLUMNS if column not in (reader.fieldnames or ())]
+            if missing:
+                raise ValueError(f"В CSV нет колонок: {', '.join(missing)}")
+            for row in reader:
+                yield reader.line_num, row
+    else:
+        raise ValueError(f"Неизвестный формат: {file_format}")
+
+
+# ========== Проверка записей (выполняется в процессах пула) ==========
+
+def _text(data: Dict, name: str) -> Optional[str]:
+    value = data.get(name)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"Поле {name} должно быть строкой")
+    return value.strip() or None
+
+
+def _parse_ingredients(text: str) -> List[Dict]:
+    """Разбирает колонку ингредиентов CSV ("Свекла - 2 шт; Соль - по вкусу (по желанию)")"""
+    ingredients = []
+    for item in text.split(INGREDIENT_SEPARATOR):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, quantity = item.partition(QUANTITY_SEPARATOR)
+        if not separator:
+            raise ValueError(f"Ингредиент '{item}' должен быть в виде 'название - количество'")
+        quantity = quantity.strip()
+        optional = quantity.endswith(OPTIONAL_SUFFIX)
+        if optional:
+            quantity = quantity[:-len(OPTIONAL_SUFFIX)].rstrip()
+        ingredients.append({"name": name.strip(), "quantity": quantity, "optional": optional})
+    return ingredients
+
+
+def _normalize_ingredients(ingredients: Any) -> List[Dict]:
+    if not isinstance(ingredients, list):
+        raise ValueError("Ингредиенты должны быть списком")
+    normalized = []
+    for ingredient in ingredients:
+        if not isinstance(ingredient, dict):
+            raise ValueError("Ингредиент должен быть объектом с полями name и quantity")
+        name, quantity = _text(ingredient, "name"), _text(ingredient, "quantity")
+        if not name or not quantity:
+            raise ValueError("У ингредиента должны быть название и количество")
+        normalized.append({"name": name, "quantity": quantity,
+                           "optional": bool(ingredient.get("optional", False))})
+    return normalized
+
+
+def _cooking_time(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    # int() отбросил бы дробную часть 1.5 и принял бы True за 1 - такие значения считаются ошибкой
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"Время приготовления должно быть целым числом минут: {value!r}")
+    try:
+        cooking_time = int(value)
+    except ValueError:
+        raise ValueError(f"Время приготовления должно быть целым числом минут: {value!r}") from None
+    if cooking_time < 0:
+        raise ValueError("Время приготовления не может быть отрицательным")
+    return cooking_time or None
+
+
+def normalize_record(raw: Any) -> Dict:
+    """Проверяет запись импорта и приводит ее к формату Recipe.to_dict().
+
+    Правила те же, что при добавлении рецепта через контроллер
+    (validate_recipe_fields), плюс проверка типа блюда, кухни, времени и
+    ингредиентов. При ошибке вызывает ValueError с понятным сообщением.
+    """
+    if isinstance(raw, bytes):
+        try:
+            data = _codec.loads(raw)
+        except DECODE_ERRORS:
+            raise ValueError("Некорректный JSON") from None
+        if not isinstance(data, dict):
+            raise ValueError("Ожидается JSON-объект рецепта")
+        ingredients = _normalize_ingredients(data.get("ingredients") or [])
+    else:
+        data = raw
+        ingredients = _normalize_ingredients(_parse_ingredients(data.get("ingredients") or ""))
+
+    name, author, description = _text(data, "name"), _text(data, "author"), _text(data, "description")
+    error = validate_recipe_fields(name, author, description, ingredients)
+    if error:
+        raise ValueError(error)
+    recipe_type, cuisine = data.get("recipe_type"), data.get("cuisine")
+    # Список или объект вместо строки не ищется в словаре (TypeError), а считается ошибкой записи
+    if not isinstance(recipe_type, str) or recipe_type not in RECIPE_TYPES_BY_VALUE:
+        raise ValueError(f"Неизвестный тип блюда: {recipe_type!r}")
+    if not isinstance(cuisine, str) or cuisine not in CUISINES_BY_VALUE:
+        raise ValueError(f"Неизвестная кухня: {cuisine!r}")
+
+    return {
+        "name": name,
+        "author": author,
+        "recipe_type": recipe_type,
+        "description": description,
+        "ingredients": ingredients,
+        "cuisine": cuisine,
+        "youtube_url": _text(data, "youtube_url"),
+        "google_url": _text(data, "google_url"),
+        "cooking_time": _cooking_time(data.get("cooking_time")),
+        "difficulty": _text(data, "difficulty"),
+    }
+
+
+def validate_chunk(chunk: List[Tuple[int, Any]]) -> List[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Проверяет пачку записей: (номер строки, рецепт или None, ошибка или None)"""
+    results = []
+    for number, raw in chunk:
+        try:
+            results.append((number, normalize_record(raw), None))
+        except ValueError as e:
+            results.append((number, None, str(e)))
+        except TypeError as e:
+            # Непредусмотренный тип значения: ошибка одной записи не должна прерывать импорт
+            results.append((number, None, f"Некорректный тип значения: {e}"))
+    return results
+
+
+def validate_records(records: Iterable[Tuple[int, Any]],
+                     workers: int) -> Iterator[List[Tuple[int, Optional[Dict], Optional[str]]]]:
+    """Проверяет записи пачками в пуле процессов, сохраняя порядок файла.
+
+    Файл, который помещается в одну пачку, проверяется в текущем процессе:
+    запуск пула обошелся бы дороже самой проверки.
+    """
+    records = iter(records)
+    chunks = iter(lambda: list(islice(records, CHUNK_SIZE)), [])
+    first = next(chunks, None)
+    if first is None:
+        return
+    if workers <= 1 or len(first) < CHUNK_SIZE:
+        yield validate_chunk(first)
+        for chunk in chunks:
+            yield validate_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque([pool.submit(validate_chunk, first)])
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ========== Импорт ==========
+
+def import_recipes(model, filename: str, file_format: Optional[str] = None,
+                   workers: Optional[int] = None) -> ImportReport:
+    """Импортирует рецепты из CSV или JSONL в модель одной транзакцией.
+
+    Файл читается потоком и проверяется в пуле из workers процессов (по
+    умолчанию - по числу ядер). Прошедшие проверку рецепты добавляются
+    через RecipeModel.add_recipes: дубликаты по названию и автору
+    отсеиваются по множеству ключей, а изменения сохраняются один раз.
+    Ошибки отдельных записей не прерывают импорт и попадают в отчет;
+    ошибка чтения файла (нет файла, нет колонок CSV) вызывает исключение
+    до изменения модели.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    report = ImportReport()
+    numbers: List[int] = []
+    records: List[Dict] = []
+    for results in validate_records(read_records(filename, file_format), workers):
+        for number, record, error in results:
+            report.total += 1
+            if error is None:
+                numbers.append(number)
+                records.append(record)
+            else:
+                report.errors.append((number, error))
+
+    recipes = model.load_many(records)
+    duplicates = model.add_recipes(recipes)
+    report.duplicates = [(numbers[i], f"{recipes[i].name} ({recipes[i].author}) уже есть в книге")
+                         for i in duplicates]
+    report.added = len(recipes) - len(duplicates)
+    report.seconds = time.perf_counter() - started
+    return report
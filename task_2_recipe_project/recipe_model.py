@@ -1,7 +1,21 @@
-import json
-from typing import List, Dict, Optional
+import atexit
+import gc
+import sys
+import threading
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from itertools import repeat
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Sequence, Tuple
 from enum import Enum
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
+from events import ChangeEvent, ChangeKind, EventBus
+from index_cache import BackgroundLoader, IndexCache, records_checksum
+from quantities import UNIT_LABELS, Quantity, format_number, parse_quantity
+from json_codec import JsonCodec
+from record_view import LazyPositions, RecordView
+from recipe_storage import RecipeStorage, create_storage
+from sort_index import OrderIndex, collation_key
 
 
 class RecipeType(Enum):
@@ -29,35 +43,77 @@ class CuisineType(Enum):
     MEDITERRANEAN = "средиземноморская"
 
 
-@dataclass
+class PersistencePolicy(Enum):
+    """Политики сохранения рецептов в файл"""
+    IMMEDIATE = "immediate"  # Сохранение после каждого изменения
+    DEBOUNCED = "debounced"  # Отложенное сохранение пачкой изменений
+    MANUAL = "manual"  # Сохранение только по явному вызову flush()
+
+
+# Модели с отложенным сохранением: сохраняются одним обработчиком atexit на весь процесс
+_deferred_models: "weakref.WeakSet[RecipeModel]" = weakref.WeakSet()
+
+
+def _flush_deferred_models() -> None:
+    for model in list(_deferred_models):
+        model.flush()
+
+
+atexit.register(_flush_deferred_models)
+
+
+@dataclass(slots=True)
 class Ingredient:
     """Ингредиент рецепта"""
     name: str
     quantity: str  # Например: "200 г", "1 шт", "по вкусу"
     optional: bool = False
+    # Разобранное количество хранится в слоте ингредиента и живет столько же, сколько он
+    _parsed_quantity: Optional[Quantity] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Названия и количества сильно повторяются, интернирование хранит одну копию строки
+        self.name = sys.intern(self.name)
+        self.quantity = sys.intern(self.quantity)
+        self._parsed_quantity = parse_quantity(self.quantity)
+
+    @property
+    def parsed_quantity(self) -> Quantity:
+        """Количество в виде (число, код единицы), разобранное при создании ингредиента"""
+        parsed = self._parsed_quantity
+        if parsed is None:
+            parsed = self._parsed_quantity = parse_quantity(self.quantity)
+        return parsed
 
     def to_dict(self) -> Dict:
-        return asdict(self)
+        # Явный словарь в несколько раз быстрее dataclasses.asdict, а рецептов в файле сотни тысяч
+        return {"name": self.name, "quantity": self.quantity, "optional": self.optional}
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'Ingredient':
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class Recipe:
     """Модель рецепта"""
     name: str
     author: str
     recipe_type: RecipeType
     description: str
-    ingredients: List[Ingredient]
+    ingredients: Sequence[Ingredient]  # Хранится как кортеж
     cuisine: CuisineType
     youtube_url: Optional[str] = None
     google_url: Optional[str] = None
     cooking_time: Optional[int] = None  # В минутах
     difficulty: Optional[str] = None  # Легкий, Средний, Сложный
 
+    def __post_init__(self):
+        self.ingredients = tuple(self.ingredients)
+        self.author = sys.intern(self.author)
+        if self.difficulty is not None:
+            self.difficulty = sys.intern(self.difficulty)
+
     def to_dict(self) -> Dict:
         """Преобразует объект рецепта в словарь"""
         return {
@@ -81,7 +137,7 @@ class Recipe:
             author=data["author"],
             recipe_type=RecipeType(data["recipe_type"]),
             description=data["description"],
-            ingredients=[Ingredient.from_dict(ing) for ing in data["ingredients"]],
+            ingredients=tuple(Ingredient.from_dict(ing) for ing in data["ingredients"]),
             cuisine=CuisineType(data["cuisine"]),
             youtube_url=data.get("youtube_url"),
             google_url=data.get("google_url"),
@@ -105,54 +161,335 @@ class Recipe:
                 f"⏱️ Время готовки: {self.cooking_time or 'Не указано'} мин\n"
                 f"⚡ Сложность: {self.difficulty or 'Не указана'}")
 
+# Таблицы значение -> элемент перечисления для быстрого разбора при загрузке
+RECIPE_TYPES_BY_VALUE = {recipe_type.value: recipe_type for recipe_type in RecipeType}
+CUISINES_BY_VALUE = {cuisine.value: cuisine for cuisine in CuisineType}
+
+# Интервалы времени приготовления для фасетов: (верхняя граница в минутах, подпись)
+COOKING_TIME_BUCKETS = ((15, "до 15 мин"), (30, "15-30 мин"), (60, "30-60 мин"), (None, "больше часа"))
+NO_COOKING_TIME = "не указано"
+NO_DIFFICULTY = "не указана"
+
+
+def validate_recipe_fields(name: str, author: str, description: str,
+                           ingredients: Sequence) -> Optional[str]:
+    """Проверяет обязательные поля рецепта; возвращает текст ошибки или None"""
+    if not name or not author or not description:
+        return "Название, автор и описание обязательны"
+    if not ingredients:
+        return "Добавьте хотя бы один ингредиент"
+    return None
+
+
+def recipe_key(name: str, author: str) -> Tuple[str, str]:
+    """Ключ уникальности рецепта: название и автор без учета регистра"""
+    return name.lower(), author.lower()
+
+
+def cooking_time_bucket(cooking_time: Optional[int]) -> str:
+    """Возвращает подпись интервала для времени приготовления"""
+    if not cooking_time:
+        return NO_COOKING_TIME
+    for upper, label in COOKING_TIME_BUCKETS:
+        if upper is None or cooking_time <= upper:
+            return label
+    return NO_COOKING_TIME
+
+
+# Ключи сортировки рецептов: вычисляются один раз для каждого рецепта (см. OrderIndex).
+# Рецепты без времени приготовления идут после остальных
+SORT_KEYS = {
+    "cooking_time": lambda recipe: (not recipe.cooking_time, recipe.cooking_time or 0),
+    "name": lambda recipe: collation_key(recipe.name),
+    "author": lambda recipe: collation_key(recipe.author),
+}
+
+
 class RecipeModel:
     """Модель для работы с коллекцией рецептов"""
 
-    def __init__(self, filename: str = "recipes_data.json"):
-        self.filename = filename
+    def __init__(self, filename: str = "recipes_data.json",
+                 persistence: PersistencePolicy = PersistencePolicy.IMMEDIATE,
+                 debounce_ms: int = 500, max_pending: int = 20,
+                 storage: Optional[RecipeStorage] = None, codec: Optional[JsonCodec] = None,
+                 background: bool = False, persist_indexes: bool = False):
+        self.storage = storage if storage is not None else create_storage(filename, codec)
+        self.filename = self.storage.filename
         self.recipes: List[Recipe] = []
-        self.load_from_file()
+        self.persistence = persistence
+        self.debounce_ms = debounce_ms  # Пауза без изменений перед сохранением
+        self.max_pending = max_pending  # Число изменений, после которого сохраняем сразу
+        self._pending_changes = 0
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.RLock()
+        self.sharded_search = None
+        self._unsubscribe_search = None
+        self.history = None
+        self._unsubscribe_history = None
+        # Индексы поиска строятся при первом запросе (модули импортируются тогда же)
+        self._fuzzy_index = None
+        self._unsubscribe_fuzzy = None
+        self._similarity_index = None
+        self._unsubscribe_similarity = None
+        self._order_indexes: Dict[str, Tuple[OrderIndex, Callable[[], None]]] = {}
+        # Список, по которому построены индексы (замена self.recipes напрямую их сбрасывает)
+        self._indexed_recipes = self.recipes
+        self.events = EventBus()
+        self._batch_depth = 0
+        # Поколение данных: увеличивается при каждом изменении коллекции
+        self.generation = 0
+        # Построенные индексы сохраняются рядом с файлом данных для теплого старта
+        self.index_cache = IndexCache(self.filename) if persist_indexes else None
+        self._data_checksum: Optional[str] = None
+        self._loaded_generation = 0
+        self.loader: Optional[BackgroundLoader] = None
+        if background:
+            # Меню показывается сразу, а данные и индексы готовятся в фоновом потоке
+            self.loader = BackgroundLoader(self.load_from_file, "recipe-loader",
+                                           then=self.warm_indexes).start()
+        else:
+            self.load_from_file()
+
+        if self.persistence != PersistencePolicy.IMMEDIATE:
+            # Несохраненные изменения записываются при завершении интерпретатора
+            _deferred_models.add(self)
 
     def load_from_file(self) -> None:
-        """Загружает рецепты из файла"""
+        """Загружает рецепты из хранилища"""
+        self.recipes = self.load_many(self.storage.load())
+        if self.index_cache is not None:
+            self._data_checksum = records_checksum(self.recipes)
+        self.generation += 1
+        self._loaded_generation = self.generation
+        self._drop_indexes()
+        if self.history is not None:
+            self.history.sync()
+
+    @staticmethod
+    def load_many(records: Iterable[Dict]) -> List[Recipe]:
+        """Пакетно создает рецепты из словарей формата Recipe.to_dict().
+
+        Результат совпадает с Recipe.from_dict, но объекты собираются без
+        вызова __init__ и разбора именованных аргументов, а перечисления
+        берутся из заранее построенных таблиц. Количества ингредиентов
+        разбираются сразу (см. quantities.parse_quantity), одинаковые строки - один
+        раз за загрузку. Сборщик мусора на время
+        загрузки отключается: создаваемые объекты не образуют циклов.
+        """
+        new = object.__new__
+        intern = sys.intern
+        parse = parse_quantity
+        parsed_quantities: Dict[str, Quantity] = {}
+        recipe_types = RECIPE_TYPES_BY_VALUE
+        cuisines = CUISINES_BY_VALUE
+        recipes = []
+        append = recipes.append
+
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
         try:
-            with open(self.filename, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                self.recipes = [Recipe.from_dict(recipe_data) for recipe_data in data]
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.recipes = []
+            for data in records:
+                ingredients = []
+                for ingredient_data in data["ingredients"]:
+                    ingredient = new(Ingredient)
+                    ingredient.name = intern(ingredient_data["name"])
+                    ingredient.quantity = quantity = intern(ingredient_data["quantity"])
+                    parsed = parsed_quantities.get(quantity)
+                    if parsed is None:
+                        parsed = parsed_quantities[quantity] = parse(quantity)
+                    ingredient._parsed_quantity = parsed
+                    ingredient.optional = ingredient_data.get("optional", False)
+                    ingredients.append(ingredient)
+
+                try:
+                    recipe_type = recipe_types[data["recipe_type"]]
+                    cuisine = cuisines[data["cuisine"]]
+                except KeyError as e:
+                    raise ValueError(f"Неизвестное значение {e} в рецепте '{data['name']}'") from None
+
+                difficulty = data.get("difficulty")
+                recipe = new(Recipe)
+                recipe.name = data["name"]
+                recipe.author = intern(data["author"])
+                recipe.recipe_type = recipe_type
+                recipe.description = data["description"]
+                recipe.ingredients = tuple(ingredients)
+                recipe.cuisine = cuisine
+                recipe.youtube_url = data.get("youtube_url")
+                recipe.google_url = data.get("google_url")
+                recipe.cooking_time = data.get("cooking_time")
+                recipe.difficulty = intern(difficulty) if difficulty is not None else None
+                append(recipe)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        return recipes
 
     def save_to_file(self) -> None:
-        """Сохраняет рецепты в файл"""
-        recipes_data = [recipe.to_dict() for recipe in self.recipes]
-        with open(self.filename, 'w', encoding='utf-8') as file:
-            json.dump(recipes_data, file, ensure_ascii=False, indent=2)
+        """Полностью сохраняет рецепты в хранилище"""
+        with self._save_lock:
+            replaced = self.recipes is not self._indexed_recipes
+            if replaced:
+                # Коллекцию заменили напрямую (model.recipes = ...): индексы построены по старому списку
+                self._drop_indexes()
+            self.storage.save_all([recipe.to_dict() for recipe in self.recipes])
+            self._pending_changes = 0
+            self.generation += 1
+            if replaced and self.history is not None:
+                self.history.sync("замена коллекции")
+
+    def flush(self) -> None:
+        """Принудительно сохраняет накопленные изменения"""
+        with self._save_lock:
+            self._cancel_save_timer()
+            if self._pending_changes:
+                self._persist()
+
+    def _persist(self) -> None:
+        """Сохраняет изменения способом, который поддерживает хранилище"""
+        if self.storage.incremental:
+            self.storage.commit()
+            self._pending_changes = 0
+        else:
+            self.save_to_file()
+
+    def has_pending_changes(self) -> bool:
+        """Проверяет, есть ли несохраненные изменения"""
+        return self._pending_changes > 0
+
+    def _mark_changed(self) -> None:
+        """Регистрирует изменение и сохраняет его согласно политике"""
+        with self._save_lock:
+            self._pending_changes += 1
+            self.generation += 1
+            if not self._batch_depth:
+                self._apply_persistence_policy()
+
+    def _apply_persistence_policy(self) -> None:
+        """Сохраняет накопленные изменения согласно политике"""
+        if self.persistence == PersistencePolicy.IMMEDIATE:
+            self._persist()
+        elif self.persistence == PersistencePolicy.DEBOUNCED:
+            if self._pending_changes >= self.max_pending:
+                self.flush()
+            else:
+                self._restart_save_timer()
+
+    def _publish(self, kind: ChangeKind, index: int, old: Optional[Recipe], new: Optional[Recipe]) -> None:
+        """Отправляет событие изменения, если на модель кто-то подписан"""
+        if self.events.has_subscribers:
+            self.events.publish(ChangeEvent(kind, index, old, new))
+
+    @contextmanager
+    def batch_changes(self):
+        """Группирует изменения: одно сохранение и одна рассылка событий на весь блок"""
+        with self._save_lock:
+            self._batch_depth += 1
+            try:
+                with self.events.batch():
+                    yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._pending_changes:
+                    self._apply_persistence_policy()
+
+    def _restart_save_timer(self) -> None:
+        """Перезапускает таймер отложенного сохранения"""
+        self._cancel_save_timer()
+        self._save_timer = threading.Timer(self.debounce_ms / 1000, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _cancel_save_timer(self) -> None:
+        """Отменяет запланированное сохранение"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
 
     def add_recipe(self, recipe: Recipe) -> bool:
         """Добавляет новый рецепт"""
-        # Проверяем, нет ли рецепта с таким же названием и автором
+        # Проверяем, нет ли рецепта с таким же названием и автором (то же правило, что в add_recipes)
+        key = recipe_key(recipe.name, recipe.author)
         for existing_recipe in self.recipes:
-            if (existing_recipe.name.lower() == recipe.name.lower() and
-                    existing_recipe.author.lower() == recipe.author.lower()):
+            if recipe_key(existing_recipe.name, existing_recipe.author) == key:
                 return False
 
-        self.recipes.append(recipe)
-        self.save_to_file()
+        with self._save_lock:
+            self._append(recipe)
         return True
 
+    def _append(self, recipe: Recipe) -> None:
+        self.recipes.append(recipe)
+        if self.storage.incremental:
+            # Файловое хранилище перезаписывается целиком, словарь рецепта ему не нужен
+            self.storage.on_added(len(self.recipes) - 1, recipe.to_dict())
+        self._mark_changed()
+        self._publish(ChangeKind.ADDED, len(self.recipes) - 1, None, recipe)
+
+    def add_recipes(self, recipes: Iterable[Recipe]) -> List[int]:
+        """Добавляет рецепты одной транзакцией: одно сохранение и одна рассылка событий.
+
+        Дубликаты (то же название и автор, см. recipe_key) ищутся по множеству
+        ключей, построенному один раз, а не перебором коллекции для каждого
+        рецепта. Возвращает номера рецептов из recipes, пропущенных как дубликаты.
+        """
+        duplicates = []
+        with self.batch_changes():
+            keys = {recipe_key(recipe.name, recipe.author) for recipe in self.recipes}
+            for number, recipe in enumerate(recipes):
+                key = recipe_key(recipe.name, recipe.author)
+                if key in keys:
+                    duplicates.append(number)
+                    continue
+                keys.add(key)
+                self._append(recipe)
+        return duplicates
+
+    def import_file(self, filename: str, file_format: Optional[str] = None,
+                    workers: Optional[int] = None):
+        """Массовый импорт рецептов из CSV или JSONL (см. recipe_import.import_recipes)"""
+        from recipe_import import import_recipes
+
+        return import_recipes(self, filename, file_format, workers)
+
+    def replace_recipes(self, recipes: Iterable[Recipe], reason: str = "замена коллекции") -> Optional[int]:
+        """Заменяет всю коллекцию (например, версией из истории) и сохраняет ее.
+
+        События по отдельным рецептам не рассылаются: индексы перестраиваются
+        заново, а история записывает новое состояние одной версией с
+        описанием reason. Возвращает номер этой версии (None без истории
+        или если коллекция не изменилась).
+        """
+        with self._save_lock:
+            self._cancel_save_timer()
+            self.recipes = list(recipes)
+            self._drop_indexes()
+            self.save_to_file()
+            if self.history is not None:
+                return self.history.sync(reason)
+        return None
+
     def remove_recipe(self, index: int) -> Optional[Recipe]:
         """Удаляет рецепт по индексу"""
         if 0 <= index < len(self.recipes):
-            removed_recipe = self.recipes.pop(index)
-            self.save_to_file()
+            with self._save_lock:
+                removed_recipe = self.recipes.pop(index)
+                self.storage.on_removed(index)
+                self._mark_changed()
+                self._publish(ChangeKind.REMOVED, index, removed_recipe, None)
             return removed_recipe
         return None
 
     def update_recipe(self, index: int, recipe: Recipe) -> bool:
         """Обновляет рецепт по индексу"""
         if 0 <= index < len(self.recipes):
-            self.recipes[index] = recipe
-            self.save_to_file()
+            with self._save_lock:
+                old_recipe = self.recipes[index]
+                self.recipes[index] = recipe
+                self.storage.on_updated(index, recipe.to_dict())
+                self._mark_changed()
+                self._publish(ChangeKind.UPDATED, index, old_recipe, recipe)
             return True
         return False
 
@@ -162,56 +499,230 @@ class RecipeModel:
             return self.recipes[index]
         return None
 
-    def search_recipes(self, query: str) -> List[Recipe]:
-        """Поиск рецептов по названию или ингредиентам"""
+    def _at_positions(self, positions: List[int]) -> List[Recipe]:
+        """Возвращает рецепты по позициям, найденным хранилищем"""
+        recipes = self.recipes
+        return [recipes[position] for position in positions]
+
+    def enable_sharded_search(self, shards: Optional[int] = None) -> None:
+        """Включает поиск, распределенный по пулу процессов (для больших коллекций)"""
+        from sharded_search import ShardedSearch
+
+        self.disable_sharded_search()
+        self.sharded_search = ShardedSearch(self.recipes, shards)
+        self._unsubscribe_search = self.events.subscribe(self.sharded_search.apply_events)
+
+    def disable_sharded_search(self) -> None:
+        """Выключает распределенный поиск и останавливает процессы"""
+        if self.sharded_search is not None:
+            self._unsubscribe_search()
+            self.sharded_search.close()
+            self.sharded_search = None
+
+    def enable_history(self, filename: Optional[str] = None, **options) -> None:
+        """Включает историю версий коллекции (см. recipe_history.RecipeHistory)"""
+        from recipe_history import RecipeHistory
+
+        # История сверяется с коллекцией, поэтому данные должны быть загружены
+        self.wait_until_ready()
+        self.disable_history()
+        self.history = RecipeHistory(self, filename, **options)
+        self._unsubscribe_history = self.events.subscribe(self.history.apply_events,
+                                                          immediate=False)
+
+    def disable_history(self) -> None:
+        """Выключает историю версий (записанные версии остаются в файле истории)"""
+        if self.history is not None:
+            self._unsubscribe_history()
+            self.history.close()
+            self.history = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Загружены ли данные (без фоновой загрузки - всегда)"""
+        return self.loader is None or self.loader.is_ready
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Ждет окончания фоновой загрузки; False, если не дождались за timeout"""
+        return self.loader is None or self.loader.wait(timeout)
+
+    def _build_index(self, name: str, factory):
+        """Берет индекс из файла (если данные не менялись с загрузки) или строит его.
+
+        Возвращает индекс и функцию отписки от событий модели.
+        """
+        index = None
+        unchanged = self.index_cache is not None and self.generation == self._loaded_generation
+        if unchanged:
+            index = self.index_cache.load(name, self._data_checksum)
+            if index is not None and not index.attach(self.recipes):
+                index = None
+        if index is None:
+            index = factory(self.recipes)
+            if unchanged:
+                self.index_cache.save(name, self._data_checksum, index)
+        return index, self.events.subscribe(index.apply_events)
+
+    def _fuzzy(self):
+        if self._fuzzy_index is None:
+            from fuzzy_index import TrigramIndex
+
+            self._fuzzy_index, self._unsubscribe_fuzzy = self._build_index("fuzzy", TrigramIndex)
+        return self._fuzzy_index
+
+    def _similarity(self):
+        if self._similarity_index is None:
+            from similarity_index import SimilarityIndex
+
+            self._similarity_index, self._unsubscribe_similarity = self._build_index(
+                "similarity", SimilarityIndex)
+        return self._similarity_index
+
+    def warm_indexes(self) -> None:
+        """Заранее готовит индексы поиска, чтобы первый запрос не ждал построения"""
+        with self._save_lock:
+            self._fuzzy()
+        # Блокировка отпускается между индексами, чтобы изменения не ждали оба построения
+        with self._save_lock:
+            self._similarity()
+
+    def _drop_fuzzy_index(self) -> None:
+        """Сбрасывает триграммный индекс (он будет построен заново при поиске)"""
+        if self._fuzzy_index is not None:
+            self._unsubscribe_fuzzy()
+            self._fuzzy_index = None
+
+    def fuzzy_search(self, query: str, limit: int = 10,
+                     threshold: float = 0.3) -> List[Tuple[Recipe, float]]:
+        """Нечеткий поиск по названиям рецептов и ингредиентов с учетом опечаток.
+
+        Возвращает пары (рецепт, сходство от 0 до 1) по убыванию сходства.
+        Индекс строится при первом запросе и дальше обновляется по событиям модели.
+        """
+        with self._save_lock:
+            return self._fuzzy().search(query, limit, threshold)
+
+    def _drop_similarity_index(self) -> None:
+        """Сбрасывает индекс похожих рецептов (он будет построен заново при запросе)"""
+        if self._similarity_index is not None:
+            self._unsubscribe_similarity()
+            self._similarity_index = None
+
+    def similar_recipes(self, index: int, k: int = 5) -> Optional[List[Tuple[Recipe, float]]]:
+        """Рецепты, похожие на рецепт с индексом index, по ингредиентам, кухне и типу.
+
+        Возвращает до k пар (рецепт, сходство от 0 до 1) по убыванию сходства
+        или None, если рецепта нет. Индекс строится при первом запросе и
+        дальше обновляется по событиям модели.
+        """
+        with self._save_lock:
+            if not 0 <= index < len(self.recipes):
+                return None
+            return self._similarity().similar(index, k)
+
+    def _order_index(self, sort_by: str) -> OrderIndex:
+        """Упорядочение по ключу sort_by: строится при первой сортировке и обновляется по событиям"""
+        entry = self._order_indexes.get(sort_by)
+        if entry is None:
+            with self._save_lock:
+                entry = self._order_indexes.get(sort_by)
+                if entry is None:
+                    index = OrderIndex(self.recipes, SORT_KEYS[sort_by])
+                    entry = self._order_indexes[sort_by] = (
+                        index, self.events.subscribe(index.apply_events))
+        return entry[0]
+
+    def _drop_indexes(self) -> None:
+        """Сбрасывает индексы и перезапускает распределенный поиск после замены списка рецептов"""
+        self._indexed_recipes = self.recipes
+        self._drop_fuzzy_index()
+        self._drop_similarity_index()
+        self._drop_order_indexes()
+        if self.sharded_search is not None:
+            self.enable_sharded_search(self.sharded_search.shards)
+
+    def _drop_order_indexes(self) -> None:
+        """Сбрасывает упорядочения (они будут построены заново при сортировке)"""
+        for _, unsubscribe in self._order_indexes.values():
+            unsubscribe()
+        self._order_indexes.clear()
+
+    def sorted_recipes(self, sort_by: str = "name", descending: bool = False, **filters) -> RecordView:
+        """Рецепты, отсортированные по ключу из SORT_KEYS, с необязательными фильтрами facet_search.
+
+        Возвращает представление: без фильтров страница - это срез готового
+        упорядочения, с фильтрами рецепты проверяются в порядке сортировки
+        по мере чтения, поэтому первая страница не требует полного прохода.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Неизвестный ключ сортировки: {sort_by}")
+        order = self._order_index(sort_by)
+        if all(value is None for value in filters.values()):
+            return RecordView(self.recipes, order.positions(descending), self)
+        matches = self._recipe_filter(**filters)
+        recipes = self.recipes
+        positions = order.select(lambda position: matches(recipes[position]), descending)
+        return RecordView(recipes, LazyPositions(positions), self)
+
+    def search_recipes(self, query: str, limit: Optional[int] = None) -> List[Recipe]:
+        """Поиск рецептов по названию или ингредиентам (не больше limit первых совпадений)"""
+        if self.sharded_search is not None:
+            # Каждый шард отдает не больше limit совпадений, их слияние обрезается до limit
+            return self.sharded_search.search(query, limit)
+
+        if self.storage.supports_queries:
+            positions = self.storage.search(query)
+            if positions is not None:
+                return self._at_positions(positions[:limit])
+
         query = query.lower()
         results = []
 
         for recipe in self.recipes:
-            # Поиск по названию
-            if query in recipe.name.lower():
+            # Рецепт попадает в результат один раз, даже если совпало несколько полей (как в FTS)
+            if (query in recipe.name.lower()
+                    or query in recipe.author.lower()
+                    or any(query in ingredient.name.lower() for ingredient in recipe.ingredients)
+                    or query in recipe.description.lower()):
                 results.append(recipe)
-                continue
-
-            # Поиск по автору
-            if query in recipe.author.lower():
-                results.append(recipe)
-                continue
-
-            # Поиск по ингредиентам
-            for ingredient in recipe.ingredients:
-                if query in ingredient.name.lower():
-                    results.append(recipe)
+                if limit is not None and len(results) >= limit:
                     break
 
-            # Поиск по описанию
-            if query in recipe.description.lower():
-                results.append(recipe)
-
         return results
 
     def filter_by_cuisine(self, cuisine: CuisineType) -> List[Recipe]:
         """Фильтрует рецепты по кухне"""
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_by_cuisine(cuisine.value))
         return [recipe for recipe in self.recipes if recipe.cuisine == cuisine]
 
     def filter_by_type(self, recipe_type: RecipeType) -> List[Recipe]:
         """Фильтрует рецепты по типу"""
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_by_type(recipe_type.value))
         return [recipe for recipe in self.recipes if recipe.recipe_type == recipe_type]
 
     def filter_by_author(self, author: str) -> List[Recipe]:
         """Фильтрует рецепты по автору"""
+        if self.storage.supports_queries:
+            positions = self.storage.search(author, column="author")
+            if positions is not None:
+                return self._at_positions(positions)
+
         author = author.lower()
         return [recipe for recipe in self.recipes if author in recipe.author.lower()]
 
     def filter_by_cooking_time(self, max_time: int) -> List[Recipe]:
         """Фильтрует рецепты по времени приготовления"""
+        if self.storage.supports_queries:
+            return self._at_positions(self.storage.find_by_max_cooking_time(max_time))
         return [recipe for recipe in self.recipes
                 if recipe.cooking_time and recipe.cooking_time <= max_time]
 
     def get_all_authors(self) -> List[str]:
         """Получает список всех авторов"""
         authors = set(recipe.author for recipe in self.recipes)
-        return sorted(authors)
+        return sorted(authors, key=collation_key)
 
     def get_all_cuisines(self) -> List[str]:
         """Получает список всех кухонь"""
@@ -246,6 +757,111 @@ class RecipeModel:
             "unique_authors": len(set(recipe.author for recipe in self.recipes))
         }
 
+    @staticmethod
+    def _recipe_filter(cuisine: Optional[CuisineType] = None,
+                       recipe_type: Optional[RecipeType] = None, difficulty: Optional[str] = None,
+                       max_cooking_time: Optional[int] = None,
+                       author: Optional[str] = None) -> Callable[[Recipe], bool]:
+        """Проверка рецепта на соответствие всем заданным фильтрам"""
+        author = author.lower() if author else None
+        difficulty = difficulty.lower() if difficulty else None
+
+        def matches(recipe: Recipe) -> bool:
+            if cuisine is not None and recipe.cuisine != cuisine:
+                return False
+            if recipe_type is not None and recipe.recipe_type != recipe_type:
+                return False
+            if difficulty is not None and (recipe.difficulty or "").lower() != difficulty:
+                return False
+            if max_cooking_time is not None and not (
+                    recipe.cooking_time and recipe.cooking_time <= max_cooking_time):
+                return False
+            return author is None or author in recipe.author.lower()
+
+        return matches
+
+    def view_all(self) -> RecordView:
+        """Живое представление всех рецептов только для чтения"""
+        return RecordView(self.recipes)
+
+    def select_recipes(self, **filters) -> RecordView:
+        """Ленивая выборка рецептов по фильтрам facet_search.
+
+        Рецепты проверяются по мере чтения представления, поэтому первая
+        страница или проверка "есть ли хоть один" не проходят всю коллекцию.
+        """
+        matches = self._recipe_filter(**filters)
+        return RecordView(self.recipes, LazyPositions(self._positions_where(matches)), self)
+
+    def _positions_where(self, matches: Callable[[Recipe], bool]) -> Iterator[int]:
+        for position, recipe in enumerate(self.recipes):
+            if matches(recipe):
+                yield position
+
+    def facet_search(self, **filters) -> Tuple[List[Recipe], Dict[str, Dict[str, int]]]:
+        """Фильтрует рецепты и считает фасеты отфильтрованного набора за один проход.
+
+        Фильтры: cuisine, recipe_type, difficulty, max_cooking_time, author.
+        Возвращает подходящие рецепты и количество по кухням, типам,
+        сложности и интервалам времени приготовления.
+        """
+        matches_filters = self._recipe_filter(**filters)
+        cuisines, types, difficulties, times = Counter(), Counter(), Counter(), Counter()
+        matches = []
+
+        for recipe in self.recipes:
+            if not matches_filters(recipe):
+                continue
+
+            matches.append(recipe)
+            cuisines[recipe.cuisine.value] += 1
+            types[recipe.recipe_type.value] += 1
+            # Ключ приведен к нижнему регистру, как в фильтре: "Средний" и "средний" - одна сложность
+            difficulties[(recipe.difficulty or "").lower() or NO_DIFFICULTY] += 1
+            times[cooking_time_bucket(recipe.cooking_time)] += 1
+
+        return matches, {
+            "cuisine": dict(cuisines),
+            "recipe_type": dict(types),
+            "difficulty": dict(difficulties),
+            "cooking_time": dict(times),
+        }
+
+    @staticmethod
+    def shopping_list(recipes: Sequence[Recipe],
+                      multipliers: Optional[Sequence[float]] = None) -> List[Dict]:
+        """Суммирует ингредиенты выбранных рецептов по названию и единице измерения.
+
+        multipliers - множитель порций для каждого рецепта (по умолчанию 1).
+        Количества уже разобраны при загрузке, поэтому строки здесь не разбираются.
+        """
+        totals: Dict[tuple, list] = {}
+        for recipe, multiplier in zip(recipes, multipliers or repeat(1.0)):
+            for ingredient in recipe.ingredients:
+                value, unit = ingredient.parsed_quantity
+                key = (ingredient.name.lower().replace("ё", "е"), unit)
+                entry = totals.get(key)
+                if entry is None:
+                    # [название, количество, число рецептов, только по желанию]
+                    entry = totals[key] = [ingredient.name, 0.0, 0, True]
+                if value is not None:
+                    entry[1] += value * multiplier
+                entry[2] += 1
+                entry[3] = entry[3] and ingredient.optional
+
+        items = []
+        ordered = sorted(totals.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        for (_, unit), (name, amount, recipe_count, optional) in ordered:
+            items.append({
+                "name": name,
+                "amount": round(amount, 2) if unit is not None else None,
+                "unit": UNIT_LABELS.get(unit, unit),
+                "quantity": f"{format_number(amount)} {UNIT_LABELS.get(unit, unit)}" if unit else "по вкусу",
+                "recipes": recipe_count,
+                "optional": optional,
+            })
+        return items
+
     def get_total_count(self) -> int:
         """Возвращает общее количество рецептов"""
         return len(self.recipes)
\ No newline at end of file
@@ -0,0 +1,288 @@
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from json_codec import JsonCodec, DECODE_ERRORS
+
+
+# Маска прав процесса (читается один раз: os.umask меняет ее для всех потоков)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(filename: str) -> int:
+    """Права для файла, заменяющего filename: как у него, а для нового - как у open()"""
+    # mkstemp создает временный файл с правами 0600, и замена не должна их менять
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _row_bytes(values: tuple) -> int:
+    """Объем данных строки SQLite: текст в UTF-8, числа по 8 байт (без служебных страниц)"""
+    return sum(len(value.encode("utf-8")) if isinstance(value, str) else 8
+               for value in values if value is not None)
+
+
+class RecipeStorage(ABC):
+    """Базовый интерфейс хранилища рецептов.
+
+    Хранилище работает со словарями в формате Recipe.to_dict(), поэтому не
+    зависит от классов модели. Позиция записи совпадает с индексом рецепта
+    в RecipeModel.recipes.
+    """
+
+    # Умеет ли хранилище отвечать на запросы фильтрации и поиска само
+    supports_queries = False
+    # Применяет ли хранилище изменения построчно (иначе - полная перезапись)
+    incremental = False
+    # Сколько байт данных записало хранилище (для метрик, см. metrics.instrument_model)
+    bytes_written = 0
+
+    @abstractmethod
+    def load(self) -> List[Dict]:
+        """Загружает все рецепты"""
+
+    @abstractmethod
+    def save_all(self, records: List[Dict]) -> None:
+        """Полностью перезаписывает хранилище"""
+
+    def on_added(self, position: int, record: Dict) -> None:
+        """Вызывается после добавления рецепта в модель"""
+
+    def on_removed(self, position: int) -> None:
+        """Вызывается после удаления рецепта из модели"""
+
+    def on_updated(self, position: int, record: Dict) -> None:
+        """Вызывается после изменения рецепта в модели"""
+
+    def commit(self) -> None:
+        """Фиксирует построчные изменения (для инкрементальных хранилищ)"""
+
+    def close(self) -> None:
+        """Освобождает ресурсы хранилища"""
+
+
+class JsonRecipeStorage(RecipeStorage):
+    """Хранилище рецептов в одном JSON-файле (по умолчанию)"""
+
+    def __init__(self, filename: str, codec: Optional[JsonCodec] = None):
+        self.filename = filename
+        self.codec = codec if codec is not None else JsonCodec.for_filename(filename, indent=2)
+
+    def load(self) -> List[Dict]:
+        try:
+            with open(self.filename, 'rb') as file:
+                return self.codec.loads(file.read())
+        except (FileNotFoundError,) + DECODE_ERRORS:
+            return []
+
+    def save_all(self, records: List[Dict]) -> None:
+        """Сохраняет рецепты через временный файл и атомарную замену"""
+        payload = self.codec.dumps(records)
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".recipes_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, _file_mode(self.filename))
+            os.replace(tmp_path, self.filename)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.bytes_written += len(payload)
+
+
+class SqliteRecipeStorage(RecipeStorage):
+    """Хранилище рецептов в SQLite (WAL, индексы, полнотекстовый поиск FTS5).
+
+    Строка хранит позицию рецепта в модели, чтобы запросы возвращали
+    позиции без пересчета. Поэтому удаление сдвигает позиции всех
+    следующих строк: O(n) записей на удаление (кроме последнего рецепта).
+    Добавление и изменение затрагивают одну строку.
+    """
+
+    supports_queries = True
+    incremental = True
+
+    # Поиск через триграммный индекс FTS5 работает для запросов от 3 символов
+    MIN_FTS_QUERY = 3
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Создает таблицы и индексы, если их еще нет"""
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS recipes (
+                    id INTEGER PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    recipe_type TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    ingredients TEXT NOT NULL,
+                    cuisine TEXT NOT NULL,
+                    youtube_url TEXT,
+                    google_url TEXT,
+                    cooking_time INTEGER,
+                    difficulty TEXT
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_recipes_position ON recipes(position);
+                CREATE INDEX IF NOT EXISTS idx_recipes_cuisine ON recipes(cuisine, position);
+                CREATE INDEX IF NOT EXISTS idx_recipes_type ON recipes(recipe_type, position);
+                CREATE INDEX IF NOT EXISTS idx_recipes_author ON recipes(author);
+                CREATE INDEX IF NOT EXISTS idx_recipes_cooking_time ON recipes(cooking_time);
+            """)
+        try:
+            with self.connection:
+                self.connection.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+                        name, author, ingredients, description, tokenize='trigram'
+                    )
+                """)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # Сборка SQLite без FTS5 или без триграммного токенизатора
+            self.has_fts = False
+
+    def load(self) -> List[Dict]:
+        rows = self.connection.execute("""
+            SELECT name, author, recipe_type, description, ingredients, cuisine,
+                   youtube_url, google_url, cooking_time, difficulty
+            FROM recipes ORDER BY position
+        """)
+        return [
+            {
+                "name": row[0],
+                "author": row[1],
+                "recipe_type": row[2],
+                "description": row[3],
+                "ingredients": json.loads(row[4]),
+                "cuisine": row[5],
+                "youtube_url": row[6],
+                "google_url": row[7],
+                "cooking_time": row[8],
+                "difficulty": row[9],
+            }
+            for row in rows
+        ]
+
+    def save_all(self, records: List[Dict]) -> None:
+        with self.connection:
+            self.connection.execute("DELETE FROM recipes")
+            if self.has_fts:
+                self.connection.execute("DELETE FROM recipes_fts")
+            for position, record in enumerate(records):
+                self._insert(position, record)
+
+    def on_added(self, position: int, record: Dict) -> None:
+        self._insert(position, record)
+
+    def on_removed(self, position: int) -> None:
+        row = self.connection.execute(
+            "SELECT id FROM recipes WHERE position = ?", (position,)).fetchone()
+        if row is None:
+            return
+        self.connection.execute("DELETE FROM recipes WHERE id = ?", row)
+        if self.has_fts:
+            self.connection.execute("DELETE FROM recipes_fts WHERE rowid = ?", row)
+        # Сдвиг в два шага, чтобы не нарушить уникальный индекс по позиции
+        self.connection.execute(
+            "UPDATE recipes SET position = -position WHERE position > ?", (position,))
+        self.connection.execute(
+            "UPDATE recipes SET position = -position - 1 WHERE position < 0")
+
+    def on_updated(self, position: int, record: Dict) -> None:
+        row = self.connection.execute(
+            "SELECT id FROM recipes WHERE position = ?", (position,)).fetchone()
+        if row is None:
+            return
+        self.connection.execute("DELETE FROM recipes WHERE id = ?", row)
+        if self.has_fts:
+            self.connection.execute("DELETE FROM recipes_fts WHERE rowid = ?", row)
+        self._insert(position, record)
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+
+    def _insert(self, position: int, record: Dict) -> None:
+        """Вставляет запись рецепта и ее полнотекстовый индекс"""
+        ingredients_json = json.dumps(record["ingredients"], ensure_ascii=False)
+        row = (position, record["name"], record["author"], record["recipe_type"],
+               record["description"], ingredients_json, record["cuisine"],
+               record.get("youtube_url"), record.get("google_url"),
+               record.get("cooking_time"), record.get("difficulty"))
+        cursor = self.connection.execute("""
+            INSERT INTO recipes (position, name, author, recipe_type, description, ingredients,
+                                 cuisine, youtube_url, google_url, cooking_time, difficulty)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, row)
+        self.bytes_written += _row_bytes(row)
+        if self.has_fts:
+            ingredient_names = " ".join(ing["name"] for ing in record["ingredients"])
+            fts_row = (cursor.lastrowid, record["name"], record["author"], ingredient_names,
+                       record["description"])
+            self.connection.execute(
+                "INSERT INTO recipes_fts (rowid, name, author, ingredients, description) "
+                "VALUES (?, ?, ?, ?, ?)", fts_row)
+            self.bytes_written += _row_bytes(fts_row)
+
+    # ========== Запросы ==========
+
+    def _positions(self, sql: str, params: tuple) -> List[int]:
+        return [row[0] for row in self.connection.execute(sql, params)]
+
+    def find_by_cuisine(self, cuisine: str) -> List[int]:
+        """Позиции рецептов указанной кухни"""
+        return self._positions(
+            "SELECT position FROM recipes WHERE cuisine = ? ORDER BY position", (cuisine,))
+
+    def find_by_type(self, recipe_type: str) -> List[int]:
+        """Позиции рецептов указанного типа"""
+        return self._positions(
+            "SELECT position FROM recipes WHERE recipe_type = ? ORDER BY position", (recipe_type,))
+
+    def find_by_max_cooking_time(self, max_time: int) -> List[int]:
+        """Позиции рецептов, которые готовятся не дольше max_time минут"""
+        return self._positions(
+            "SELECT position FROM recipes WHERE cooking_time > 0 AND cooking_time <= ? "
+            "ORDER BY position", (max_time,))
+
+    def search(self, query: str, column: Optional[str] = None) -> Optional[List[int]]:
+        """Позиции рецептов, содержащих подстроку (None - индекс не применим)"""
+        if not self.has_fts or len(query) < self.MIN_FTS_QUERY:
+            return None
+        match = '"' + query.replace('"', '""') + '"'
+        if column is not None:
+            match = f"{column} : {match}"
+        return self._positions(
+            "SELECT position FROM recipes WHERE id IN "
+            "(SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ?) ORDER BY position",
+            (match,))
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def create_storage(filename: str, codec: Optional[JsonCodec] = None) -> RecipeStorage:
+    """Выбирает хранилище по расширению файла (JSON по умолчанию)"""
+    if filename.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteRecipeStorage(filename)
+    return JsonRecipeStorage(filename, codec)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Sequence
 from recipe_controller import RecipeController
 from recipe_model import Recipe, RecipeType, CuisineType, Ingredient
 
@@ -12,7 +12,7 @@ class RecipeView:
 
     def set_user_role(self, role: str):
         """Устанавливает роль текущего пользователя"""
-        valid_roles = ["admin", "editor", "viewer", "guest"]
+        valid_roles = list(self.controller.USER_ROLES)
         if role in valid_roles:
             self.current_user_role = role
             print(f"✅ Роль пользователя установлена: {role}")
@@ -25,6 +25,8 @@ class RecipeView:
         print("📚 КУЛИНАРНАЯ КНИГА - Управление рецептами")
         print("=" * 60)
         print(f"👤 Текущая роль: {self.current_user_role}")
+        if not self.controller.is_ready():
+            print("⏳ Данные загружаются в фоне...")
 
     # ========== Основные операции ==========
 
@@ -34,7 +36,14 @@ class RecipeView:
         print("📋 ВСЕ РЕЦЕПТЫ")
         print("-" * 60)
 
-        success, result = self.controller.get_all_recipes(self.current_user_role)
+        print("Порядок: 1. Как добавлены  2. По названию  3. По времени приготовления  4. По автору")
+        sort_by = {"2": "name", "3": "cooking_time", "4": "author"}.get(
+            input("Выберите порядок (Enter - как добавлены): ").strip())
+        if sort_by is None:
+            success, result = self.controller.get_all_recipes(self.current_user_role)
+        else:
+            # Порядок берется из индекса модели, рецепты не пересортировываются при каждом показе
+            success, result = self.controller.get_sorted_recipes(sort_by, user_role=self.current_user_role)
 
         if not success:
             print(f"❌ Ошибка: {result}")
@@ -51,7 +60,7 @@ class RecipeView:
 
     def display_recipe_details(self, index: int):
         """Отображает детальную информацию о рецепте"""
-        success, result = self.controller.get_recipe_details(index - 1)  # Для пользователя индексы с 1
+        success, result = self.controller.get_recipe_details(index - 1, self.current_user_role)  # Для пользователя индексы с 1
 
         if not success:
             print(f"❌ {result}")
@@ -84,6 +93,12 @@ class RecipeView:
         if recipe.google_url:
             print(f"🔗 Дополнительно: {recipe.google_url}")
 
+        success, similar = self.controller.similar_recipes(index - 1, 5, self.current_user_role)
+        if success and similar:
+            print(f"\n🍽️ Похожие рецепты:")
+            for similar_recipe, score in similar:
+                print(f"  • {similar_recipe.name} ({similar_recipe.cuisine.value}, сходство {score:.0%})")
+
         print("=" * 60)
 
     def display_add_recipe_form(self):
@@ -204,7 +219,10 @@ class RecipeView:
             print("❌ Введите поисковый запрос")
             return
 
-        recipes = self.controller.search_recipes(query)
+        success, recipes = self.controller.search_recipes(query, self.current_user_role)
+        if not success:
+            print(f"❌ {recipes}")
+            return
 
         if recipes:
             print(f"\n✅ Найдено {len(recipes)} рецептов:")
@@ -212,9 +230,18 @@ class RecipeView:
                 print(f"{i}. {recipe.name} (автор: {recipe.author}, кухня: {recipe.cuisine.value})")
         else:
             print("❌ Рецепты по вашему запросу не найдены")
+            success, suggestions = self.controller.fuzzy_search_recipes(query, 5, self.current_user_role)
+            if success and suggestions:
+                print("\n💡 Возможно, вы имели в виду:")
+                for i, (recipe, score) in enumerate(suggestions, 1):
+                    print(f"{i}. {recipe.name} (автор: {recipe.author}, сходство: {score:.0%})")
 
     def display_filter_menu(self):
         """Отображает меню фильтрации"""
+        if not self.controller.has_permission(self.current_user_role, "filter"):
+            print("❌ Доступ запрещен: недостаточно прав для фильтрации")
+            return
+
         while True:
             print("\n" + "=" * 60)
             print("🎯 ФИЛЬТРАЦИЯ РЕЦЕПТОВ")
@@ -242,7 +269,10 @@ class RecipeView:
 
     def display_filter_by_cuisine(self):
         """Фильтрует рецепты по кухне"""
-        cuisines = self.controller.get_all_cuisines()
+        success, cuisines = self.controller.get_all_cuisines(self.current_user_role)
+        if not success:
+            print(f"❌ {cuisines}")
+            return
 
         if not cuisines:
             print("❌ В базе нет рецептов")
@@ -263,7 +293,10 @@ class RecipeView:
                         break
 
                 if cuisine_enum:
-                    recipes = self.controller.filter_by_cuisine(cuisine_enum)
+                    success, recipes = self.controller.filter_by_cuisine(cuisine_enum, self.current_user_role)
+                    if not success:
+                        print(f"❌ {recipes}")
+                        return
                     self._display_filtered_recipes(recipes, f"кухня: {cuisines[choice]}")
                 else:
                     print("❌ Ошибка при выборе кухни")
@@ -282,7 +315,10 @@ class RecipeView:
             choice = int(input("Выберите тип: ")) - 1
             if 0 <= choice < len(RecipeType):
                 recipe_type = list(RecipeType)[choice]
-                recipes = self.controller.filter_by_type(recipe_type)
+                success, recipes = self.controller.filter_by_type(recipe_type, self.current_user_role)
+                if not success:
+                    print(f"❌ {recipes}")
+                    return
                 self._display_filtered_recipes(recipes, f"тип: {recipe_type.value}")
             else:
                 print("❌ Неверный выбор")
@@ -291,7 +327,10 @@ class RecipeView:
 
     def display_filter_by_author(self):
         """Фильтрует рецепты по автору"""
-        authors = self.controller.get_all_authors()
+        success, authors = self.controller.get_all_authors(self.current_user_role)
+        if not success:
+            print(f"❌ {authors}")
+            return
 
         if not authors:
             print("❌ В базе нет рецептов")
@@ -304,7 +343,10 @@ class RecipeView:
         try:
             choice = int(input("Выберите автора: ")) - 1
             if 0 <= choice < len(authors):
-                recipes = self.controller.filter_by_author(authors[choice])
+                success, recipes = self.controller.filter_by_author(authors[choice], self.current_user_role)
+                if not success:
+                    print(f"❌ {recipes}")
+                    return
                 self._display_filtered_recipes(recipes, f"автор: {authors[choice]}")
             else:
                 print("❌ Неверный выбор")
@@ -315,12 +357,15 @@ class RecipeView:
         """Фильтрует рецепты по времени приготовления"""
         try:
             max_time = int(input("\nМаксимальное время приготовления (в минутах): "))
-            recipes = self.controller.filter_by_cooking_time(max_time)
+            success, recipes = self.controller.filter_by_cooking_time(max_time, self.current_user_role)
+            if not success:
+                print(f"❌ {recipes}")
+                return
             self._display_filtered_recipes(recipes, f"время до {max_time} минут")
         except ValueError:
             print("❌ Введите число")
 
-    def _display_filtered_recipes(self, recipes: List[Recipe], filter_name: str):
+    def _display_filtered_recipes(self, recipes: Sequence[Recipe], filter_name: str):
         """Отображает отфильтрованные рецепты"""
         if recipes:
             print(f"\n✅ Найдено {len(recipes)} рецептов (фильтр: {filter_name}):")
@@ -412,12 +457,18 @@ class RecipeView:
             print("3. 🎯 Фильтровать рецепты")
             print("4. 📖 Просмотреть детали рецепта")
 
-            if self.current_user_role in ["admin", "editor"]:
+            can_add = self.controller.has_permission(self.current_user_role, "add")
+            can_view_stats = self.controller.has_permission(self.current_user_role, "stats")
+            can_delete = self.controller.has_permission(self.current_user_role, "delete")
+            can_export = self.controller.has_permission(self.current_user_role, "export")
+
+            if can_add:
                 print("5. ➕ Добавить новый рецепт")
+            if can_view_stats:
                 print("6. 📊 Просмотреть статистику")
-
-            if self.current_user_role == "admin":
+            if can_delete:
                 print("7. 🗑️ Удалить рецепт")
+            if can_export:
                 print("8. 💾 Экспортировать рецепты")
 
             print("9. 👤 Сменить роль пользователя")
@@ -437,13 +488,13 @@ class RecipeView:
                     self.display_recipe_details(index)
                 except ValueError:
                     print("❌ Введите число")
-            elif choice == "5" and self.current_user_role in ["admin", "editor"]:
+            elif choice == "5" and can_add:
                 self.display_add_recipe_form()
-            elif choice == "6" and self.current_user_role in ["admin", "editor"]:
+            elif choice == "6" and can_view_stats:
                 self.display_statistics()
-            elif choice == "7" and self.current_user_role == "admin":
+            elif choice == "7" and can_delete:
                 self.display_remove_recipe()
-            elif choice == "8" and self.current_user_role == "admin":
+            elif choice == "8" and can_export:
                 self.display_export_recipes()
             elif choice == "9":
                 self._display_change_role()
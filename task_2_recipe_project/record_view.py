@@ -0,0 +1,117 @@
+from collections.abc import Sequence
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+STALE_VIEW_MESSAGE = "Коллекция изменилась после запроса: повторите запрос"
+
+
+class LazyPositions(Sequence):
+    """Позиции, которые вычисляются по мере обращения.
+
+    Итератор позиций читается ровно настолько, насколько нужно: перебор
+    с ранним выходом и срез с начала не проходят коллекцию целиком.
+    Отрицательные индексы дочитывают итератор до конца, как и len(),
+    если количество не известно заранее (length, например из индекса).
+    """
+
+    __slots__ = ("_source", "_positions", "_length")
+
+    def __init__(self, positions: Iterable[int], length: Optional[int] = None):
+        self._source: Optional[Iterator[int]] = iter(positions)
+        self._positions: List[int] = []
+        self._length = length
+
+    def _fill(self, count: Optional[int] = None) -> None:
+        """Дочитывает итератор до count позиций (None - до конца)"""
+        if self._source is None:
+            return
+        if count is None:
+            self._positions.extend(self._source)
+            self._source = None
+            return
+        missing = count - len(self._positions)
+        if missing > 0:
+            self._positions.extend(islice(self._source, missing))
+            if len(self._positions) < count:
+                self._source = None
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._fill()
+            self._length = len(self._positions)
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.start, index.stop, index.step
+            if (step is None or step > 0) and (start is None or start >= 0) and stop is not None and stop >= 0:
+                self._fill(stop)
+            else:
+                self._fill()
+            return self._positions[index]
+        self._fill(index + 1 if index >= 0 else None)
+        return self._positions[index]
+
+    def __iter__(self) -> Iterator[int]:
+        position = 0
+        while True:
+            if position < len(self._positions):
+                yield self._positions[position]
+                position += 1
+            elif self._source is not None:
+                self._fill(position + 1)
+            else:
+                return
+
+
+class RecordView(Sequence):
+    """Представление записей модели только для чтения, без копирования.
+
+    Без positions это живое представление всей коллекции: длина и
+    элементы всегда текущие. С positions (список, range или ленивая
+    последовательность позиций из индекса) это результат запроса:
+    len() берется у позиций, срез возвращает новое представление, а
+    записи достаются из коллекции только при обращении. Если после
+    запроса коллекция изменилась, позиции уже не соответствуют записям,
+    и обращение к такому представлению вызывает RuntimeError.
+    """
+
+    __slots__ = ("_items", "_positions", "_model", "_generation")
+
+    def __init__(self, items: List, positions: Optional[Sequence] = None, model: Any = None):
+        self._items = items
+        self._positions = positions
+        self._model = model
+        self._generation = model.generation if model is not None else None
+
+    def _check(self) -> None:
+        # Живое представление всегда актуально, а позиции результата запроса могут устареть
+        if (self._positions is not None and self._model is not None
+                and self._model.generation != self._generation):
+            raise RuntimeError(STALE_VIEW_MESSAGE)
+
+    def __len__(self) -> int:
+        if self._positions is None:
+            return len(self._items)
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        self._check()
+        if isinstance(index, slice):
+            positions = self._positions if self._positions is not None else range(len(self._items))
+            return RecordView(self._items, positions[index], self._model)
+        if self._positions is None:
+            return self._items[index]
+        return self._items[self._positions[index]]
+
+    def __iter__(self) -> Iterator:
+        if self._positions is None:
+            yield from self._items
+            return
+        items = self._items
+        for position in self._positions:
+            self._check()
+            yield items[position]
+
+    def __repr__(self) -> str:
+        return f"<RecordView: {len(self)} записей>"
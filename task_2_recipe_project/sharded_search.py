@@ -0,0 +1,202 @@
+import atexit
+import heapq
+import multiprocessing
+import os
+import threading
+import weakref
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from events import ChangeEvent, ChangeKind
+
+# Разделитель полей в поисковом тексте: не встречается в запросах пользователей
+FIELD_SEPARATOR = "\x00"
+
+# Открытые пулы шардов: закрываются одним обработчиком atexit на весь процесс
+_open_searches: "weakref.WeakSet[ShardedSearch]" = weakref.WeakSet()
+
+
+def _close_open_searches() -> None:
+    for search in list(_open_searches):
+        search.close()
+
+
+atexit.register(_close_open_searches)
+
+
+def search_text(recipe) -> str:
+    """Строит поисковый текст рецепта: название, автор, ингредиенты, описание"""
+    parts = [recipe.name, recipe.author]
+    parts.extend(ingredient.name for ingredient in recipe.ingredients)
+    parts.append(recipe.description)
+    return FIELD_SEPARATOR.join(parts).lower()
+
+
+def _shard_worker(connection, documents: Dict[int, str]) -> None:
+    """Цикл процесса-шарда: хранит свою часть индекса и отвечает на команды"""
+    while True:
+        command, *args = connection.recv()
+        if command == "search":
+            query, limit = args
+            # Словарь упорядочен по возрастанию id, поэтому совпадения идут в порядке рецептов
+            matches = (doc_id for doc_id, text in documents.items() if query in text)
+            connection.send(list(islice(matches, limit)))
+        elif command == "put":
+            doc_id, text = args
+            documents[doc_id] = text
+        elif command == "remove":
+            documents.pop(args[0], None)
+        elif command == "stop":
+            connection.close()
+            return
+
+
+class ShardedSearch:
+    """Поиск по подстроке, распределенный по пулу процессов.
+
+    Коллекция делится на шарды по id документа, каждый процесс держит
+    свой шард в памяти. Запрос рассылается всем шардам, а их первые k
+    совпадений сливаются в общий результат. id выдаются по возрастанию,
+    поэтому их порядок совпадает с порядком рецептов в модели.
+
+    Рецепты всех шардов остаются и в родительском процессе, поэтому
+    завершившийся процесс шарда перезапускается с актуальными документами,
+    а запрос, на который он не ответил, выполняется в текущем процессе.
+    """
+
+    def __init__(self, recipes: List, shards: Optional[int] = None):
+        self.shards = shards or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._ids: List[int] = []  # id рецепта на каждой позиции модели
+        self._recipes: Dict[int, object] = {}
+
+        documents: List[Dict[int, str]] = [{} for _ in range(self.shards)]
+        for recipe in recipes:
+            doc_id = self._register(recipe)
+            documents[doc_id % self.shards][doc_id] = search_text(recipe)
+
+        self._connections = [None] * self.shards
+        self._processes = [None] * self.shards
+        for shard, shard_documents in enumerate(documents):
+            self._spawn(shard, shard_documents)
+        _open_searches.add(self)
+
+    def _spawn(self, shard: int, documents: Dict[int, str]) -> None:
+        """Запускает процесс шарда с его частью документов"""
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_shard_worker, args=(child, documents), daemon=True)
+        process.start()
+        child.close()
+        self._connections[shard] = parent
+        self._processes[shard] = process
+
+    def _documents(self, shard: int) -> Dict[int, str]:
+        """Документы шарда по рецептам родительского процесса (по возрастанию id)"""
+        return {doc_id: search_text(recipe) for doc_id, recipe in sorted(self._recipes.items())
+                if doc_id % self.shards == shard}
+
+    def _restart(self, shard: int) -> None:
+        """Заменяет завершившийся процесс шарда новым с текущими документами"""
+        try:
+            self._connections[shard].close()
+        except OSError:
+            pass
+        process = self._processes[shard]
+        if process.is_alive():
+            process.kill()
+        process.join(timeout=1)
+        self._spawn(shard, self._documents(shard))
+
+    def _send(self, shard: int, message: tuple) -> bool:
+        """Отправляет команду шарду; False, если процесс шарда пришлось перезапустить"""
+        try:
+            self._connections[shard].send(message)
+            return True
+        except (OSError, ValueError):
+            # Новый процесс получает документы с уже примененным изменением, повтор не нужен
+            self._restart(shard)
+            return False
+
+    def _receive(self, shard: int) -> Optional[List[int]]:
+        """Ответ шарда; None, если процесс шарда завершился и был перезапущен"""
+        try:
+            return self._connections[shard].recv()
+        except (EOFError, OSError):
+            self._restart(shard)
+            return None
+
+    def _register(self, recipe) -> int:
+        """Выдает новый id рецепту, добавленному в конец модели"""
+        doc_id = self._next_id
+        self._next_id += 1
+        self._ids.append(doc_id)
+        self._recipes[doc_id] = recipe
+        return doc_id
+
+    def search(self, query: str, limit: Optional[int] = None) -> List:
+        """Возвращает рецепты, содержащие подстроку, в порядке модели"""
+        query = query.lower()
+        with self._lock:
+            sent = [self._send(shard, ("search", query, limit)) for shard in range(self.shards)]
+            shard_results = [self._receive(shard) if ok else None for shard, ok in enumerate(sent)]
+            for shard, result in enumerate(shard_results):
+                if result is None:
+                    # Упавший шард отвечает из текущего процесса, следующие запросы идут новому
+                    matches = (doc_id for doc_id, text in self._documents(shard).items() if query in text)
+                    shard_results[shard] = list(islice(matches, limit))
+            merged = heapq.merge(*shard_results)
+            return [self._recipes[doc_id] for doc_id in islice(merged, limit)]
+
+    # ========== Инкрементальное обновление шардов ==========
+
+    def apply_events(self, events: List[ChangeEvent]) -> None:
+        """Обработчик событий модели (см. RecipeModel.events)"""
+        for event in events:
+            if event.kind == ChangeKind.ADDED:
+                self.on_added(event.new)
+            elif event.kind == ChangeKind.REMOVED:
+                self.on_removed(event.index)
+            else:
+                self.on_updated(event.index, event.new)
+
+    def on_added(self, recipe) -> None:
+        """Добавляет рецепт, добавленный в конец модели"""
+        with self._lock:
+            doc_id = self._register(recipe)
+            self._send(doc_id % self.shards, ("put", doc_id, search_text(recipe)))
+
+    def on_removed(self, position: int) -> None:
+        """Удаляет рецепт, стоявший на позиции position"""
+        with self._lock:
+            doc_id = self._ids.pop(position)
+            del self._recipes[doc_id]
+            self._send(doc_id % self.shards, ("remove", doc_id))
+
+    def on_updated(self, position: int, recipe) -> None:
+        """Обновляет рецепт на позиции position"""
+        with self._lock:
+            doc_id = self._ids[position]
+            self._recipes[doc_id] = recipe
+            self._send(doc_id % self.shards, ("put", doc_id, search_text(recipe)))
+
+    def close(self) -> None:
+        """Останавливает процессы-шарды"""
+        with self._lock:
+            for connection in self._connections:
+                try:
+                    connection.send(("stop",))
+                    connection.close()
+                except (OSError, ValueError):
+                    pass
+            for process in self._processes:
+                process.join(timeout=1)
+            self._connections = []
+            self._processes = []
+        _open_searches.discard(self)
+
+    def shard_sizes(self) -> Tuple[int, ...]:
+        """Количество документов в каждом шарде"""
+        sizes = [0] * self.shards
+        for doc_id in self._ids:
+            sizes[doc_id % self.shards] += 1
+        return tuple(sizes)
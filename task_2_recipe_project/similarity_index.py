@@ -0,0 +1,247 @@
+import hashlib
+import heapq
+import math
+import random
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from events import ChangeEvent, ChangeKind
+from fuzzy_index import WORD_RE, normalize
+
+# Число хеш-функций MinHash и разбиение сигнатуры на полосы LSH (NUM_HASHES = BANDS * ROWS).
+# Пара рецептов с коэффициентом Жаккара s попадает в общую корзину хотя бы
+# одной полосы с вероятностью 1 - (1 - s^ROWS)^BANDS: ~0.2 при s = 0.3, ~0.98 при s = 0.6
+BANDS = 16
+ROWS = 4
+NUM_HASHES = BANDS * ROWS
+
+# Коллекции не больше этого размера сравниваются целиком, если LSH дал мало кандидатов
+EXACT_SEARCH_LIMIT = 2000
+
+# Сколько кандидатов на один запрошенный рецепт точно сравнивается по косинусу;
+# остальные отсеиваются по числу совпавших полос (оценка коэффициента Жаккара)
+CANDIDATES_PER_RESULT = 40
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # Фиксированное зерно: сигнатуры не зависят от запуска
+_PERMUTATIONS = tuple((_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(_MERSENNE_PRIME))
+                      for _ in range(NUM_HASHES))
+
+
+# Названия ингредиентов сильно повторяются, поэтому каждое нормализуется один раз
+_key_cache: Dict[str, str] = {}
+
+
+def ingredient_key(name: str) -> str:
+    """Нормализованное название ингредиента ("Лук  Репчатый" -> "лук репчатый")"""
+    key = _key_cache.get(name)
+    if key is None:
+        key = _key_cache[name] = " ".join(WORD_RE.findall(normalize(name)))
+    return key
+
+
+def recipe_features(recipe) -> FrozenSet[str]:
+    """Признаки рецепта: названия ингредиентов, кухня и тип блюда"""
+    features = {ingredient_key(ingredient.name) for ingredient in recipe.ingredients}
+    features.discard("")
+    features.add(f"cuisine:{recipe.cuisine.value}")
+    features.add(f"type:{recipe.recipe_type.value}")
+    return frozenset(features)
+
+
+class SimilarityIndex:
+    """Индекс похожих рецептов ("еще похожие").
+
+    Рецепт представлен разреженным вектором TF-IDF над признаками
+    recipe_features (каждый признак встречается в рецепте один раз, поэтому
+    вес признака равен его IDF). Кандидаты в соседи ищутся через MinHash и
+    LSH: сигнатура из NUM_HASHES минимумов делится на BANDS полос, и
+    рецепты с совпадающей полосой попадают в одну корзину. Кандидаты
+    ранжируются по косинусному сходству векторов TF-IDF. Частоты признаков
+    и корзины обновляются по событиям модели, так что при добавлении или
+    удалении рецепта пересчитывается только его сигнатура.
+
+    IDF признака f - это log(1 + N) + 1 - log(1 + df(f)): при изменении
+    меняется только слагаемое с числом рецептов N и логарифмы частот
+    признаков самого рецепта. Логарифмы частот обновляются по событиям,
+    слагаемое с N вычисляется один раз на запрос, а нормы векторов
+    пересчитываются лениво - только у рецептов, которые попали в запрос
+    после изменения.
+    """
+
+    def __init__(self, recipes: Iterable = ()):
+        self._next_doc_id = 0
+        self._doc_ids: List[int] = []  # id документа на каждой позиции модели
+        self._recipes: Dict[int, object] = {}
+        self._features: Dict[int, FrozenSet[str]] = {}
+        self._band_keys: Dict[int, Tuple[int, ...]] = {}
+        self._document_frequency: Dict[str, int] = {}
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(BANDS)]
+        # Признаки сильно повторяются, поэтому хеши каждого считаются один раз
+        self._feature_hashes: Dict[str, Tuple[int, ...]] = {}
+        # log(1 + df) каждого признака: при изменении обновляется только у признаков рецепта
+        self._log_frequency: Dict[str, float] = {}
+        # Номер изменения индекса и нормы векторов с номером, при котором они посчитаны
+        self._version = 0
+        self._norms: Dict[int, Tuple[int, float]] = {}
+        for recipe in recipes:
+            self.on_added(recipe)
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def __getstate__(self) -> Dict:
+        # Рецепты не сохраняются в файл индекса: после чтения индекс привязывается к модели (attach)
+        state = self.__dict__.copy()
+        state["_recipes"] = {}
+        state["_norms"] = {}
+        return state
+
+    def attach(self, recipes: List) -> bool:
+        """Привязывает прочитанный с диска индекс к рецептам модели (False, если он им не соответствует).
+
+        Содержимое уже сверено IndexCache по контрольной сумме рецептов,
+        здесь остается проверка числа записей.
+        """
+        if len(recipes) != len(self._doc_ids):
+            return False
+        self._recipes = dict(zip(self._doc_ids, recipes))
+        return True
+
+    # ========== Обновление индекса ==========
+
+    def apply_events(self, events: List[ChangeEvent]) -> None:
+        """Обработчик событий модели (см. RecipeModel.events)"""
+        for event in events:
+            if event.kind == ChangeKind.ADDED:
+                self.on_added(event.new)
+            elif event.kind == ChangeKind.REMOVED:
+                self.on_removed(event.index)
+            else:
+                self.on_updated(event.index, event.new)
+
+    def on_added(self, recipe) -> None:
+        """Индексирует рецепт, добавленный в конец модели"""
+        doc_id = self._next_doc_id
+        self._next_doc_id += 1
+        self._doc_ids.append(doc_id)
+        self._index_document(doc_id, recipe)
+
+    def on_removed(self, position: int) -> None:
+        """Удаляет из индекса рецепт, стоявший на позиции position"""
+        doc_id = self._doc_ids.pop(position)
+        self._unindex_document(doc_id)
+
+    def on_updated(self, position: int, recipe) -> None:
+        """Переиндексирует рецепт на позиции position"""
+        doc_id = self._doc_ids[position]
+        self._unindex_document(doc_id)
+        self._index_document(doc_id, recipe)
+
+    def _hashes(self, feature: str) -> Tuple[int, ...]:
+        hashes = self._feature_hashes.get(feature)
+        if hashes is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            hashes = self._feature_hashes[feature] = tuple(
+                (a * value + b) % _MERSENNE_PRIME for a, b in _PERMUTATIONS)
+        return hashes
+
+    def _signature(self, features: FrozenSet[str]) -> Tuple[int, ...]:
+        """MinHash-сигнатура: поэлементный минимум хешей признаков"""
+        return tuple(map(min, *(self._hashes(feature) for feature in features)))
+
+    @staticmethod
+    def _bands(signature: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Ключи корзин LSH: хеш каждой полосы сигнатуры.
+
+        Хеш кортежа целых чисел не зависит от запуска, а его редкие
+        совпадения дают лишь лишних кандидатов, поэтому хранятся только ключи.
+        """
+        return tuple(hash(signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS))
+
+    def _index_document(self, doc_id: int, recipe) -> None:
+        self._version += 1
+        features = recipe_features(recipe)
+        band_keys = self._bands(self._signature(features))
+        self._recipes[doc_id] = recipe
+        self._features[doc_id] = features
+        self._band_keys[doc_id] = band_keys
+        frequency = self._document_frequency
+        log_frequency = self._log_frequency
+        for feature in features:
+            count = frequency[feature] = frequency.get(feature, 0) + 1
+            log_frequency[feature] = math.log1p(count)
+        for buckets, key in zip(self._buckets, band_keys):
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = set()
+            bucket.add(doc_id)
+
+    def _unindex_document(self, doc_id: int) -> None:
+        self._version += 1
+        del self._recipes[doc_id]
+        self._norms.pop(doc_id, None)
+        frequency = self._document_frequency
+        log_frequency = self._log_frequency
+        for feature in self._features.pop(doc_id):
+            count = frequency[feature] - 1
+            if count:
+                frequency[feature] = count
+                log_frequency[feature] = math.log1p(count)
+            else:
+                del frequency[feature]
+                del log_frequency[feature]
+        for buckets, key in zip(self._buckets, self._band_keys.pop(doc_id)):
+            bucket = buckets[key]
+            bucket.discard(doc_id)
+            if not bucket:
+                del buckets[key]
+
+    # ========== Поиск ==========
+
+    def _idf_offset(self) -> float:
+        """Общее для всех признаков слагаемое IDF: log(1 + N) + 1.
+
+        Сглаженный IDF, как в scikit-learn: признак из всех рецептов все равно имеет вес 1.
+        """
+        return math.log1p(len(self._doc_ids)) + 1
+
+    def _norm(self, doc_id: int, offset: float) -> float:
+        cached = self._norms.get(doc_id)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        log_frequency = self._log_frequency
+        norm = math.sqrt(sum((offset - log_frequency[feature]) ** 2 for feature in self._features[doc_id]))
+        self._norms[doc_id] = (self._version, norm)
+        return norm
+
+    def _candidates(self, doc_id: int, k: int) -> List[int]:
+        collisions: Counter = Counter()
+        for buckets, key in zip(self._buckets, self._band_keys[doc_id]):
+            collisions.update(buckets[key])
+        del collisions[doc_id]
+        if len(collisions) < k and len(self._doc_ids) <= EXACT_SEARCH_LIMIT:
+            # В маленькой коллекции корзины почти пусты, а полный перебор дешев
+            return [candidate for candidate in self._recipes if candidate != doc_id]
+        limit = k * CANDIDATES_PER_RESULT
+        if len(collisions) <= limit:
+            return list(collisions)
+        return [candidate for candidate, _ in collisions.most_common(limit)]
+
+    def similar(self, position: int, k: int = 5) -> List[Tuple[object, float]]:
+        """До k рецептов, похожих на рецепт на позиции position, с косинусным сходством"""
+        doc_id = self._doc_ids[position]
+        features = self._features[doc_id]
+        offset = self._idf_offset()
+        # Квадраты весов признаков запроса: у общих признаков вес тот же, что и в кандидате
+        weights = {feature: (offset - self._log_frequency[feature]) ** 2 for feature in features}
+        norm = self._norm(doc_id, offset)
+
+        scored = []
+        for candidate in self._candidates(doc_id, k):
+            dot = sum(weights[feature] for feature in features & self._features[candidate])
+            if dot:
+                scored.append((-dot / (norm * self._norm(candidate, offset)), candidate))
+        # id документов растут в порядке модели, поэтому при равенстве выше идут ранние рецепты
+        return [(self._recipes[candidate], round(-score, 3))
+                for score, candidate in heapq.nsmallest(k, scored)]
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from main_recipe import initialize_sample_recipes
+from metrics import MetricsRegistry, instrument_controller, instrument_model
+from recipe_controller import RecipeController
+from recipe_model import CuisineType, Ingredient, Recipe, RecipeModel, RecipeType
+
+
+@pytest.mark.parametrize("extension", ["json", "db"])
+def test_model_metrics_count_saves_and_commits(tmp_path, extension):
+    model = RecipeModel(str(tmp_path / f"recipes.{extension}"))
+    initialize_sample_recipes(model)
+    registry = MetricsRegistry()
+    instrument_model(model, registry)
+
+    model.add_recipe(Recipe("Окрошка", "Иван", RecipeType.SOUP, "Холодный суп на квасе",
+                            [Ingredient("Квас", "1 л")], CuisineType.RUSSIAN, cooking_time=20))
+    metrics = registry.to_dict()
+    if extension == "db":
+        # Построчное хранилище фиксирует изменения без полной перезаписи файла
+        commit = metrics["RecipeModel.commit"]
+        assert commit["calls"] == 1 and 0 < commit["bytes_written"] < os.path.getsize(model.filename)
+        assert "RecipeModel.save_to_file" not in metrics
+    else:
+        save = metrics["RecipeModel.save_to_file"]
+        assert (save["calls"], save["bytes_written"]) == (1, os.path.getsize(model.filename))
+    model.storage.close()
+
+
+def test_controller_metrics_count_record_views(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    initialize_sample_recipes(model)
+    controller = RecipeController(model)
+    registry = MetricsRegistry()
+    instrument_controller(controller, registry)
+
+    ok, recipes = controller.get_all_recipes()
+    assert ok and len(recipes) == 5
+    assert registry.to_dict()["RecipeController.get_all_recipes"]["result_items"] == 5
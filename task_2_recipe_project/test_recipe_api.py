@@ -0,0 +1,88 @@
+import http.client
+import json
+import threading
+from urllib.parse import quote
+
+import pytest
+
+from main_recipe import initialize_sample_recipes
+from recipe_api import create_server
+from recipe_controller import RecipeController
+from recipe_model import RecipeModel
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    initialize_sample_recipes(model)
+    server = create_server(RecipeController(model), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.query_pool.shutdown()
+    server.stream_pool.shutdown()
+
+
+def _request(server, method, path, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    connection.request(method, path, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, response.headers, data
+
+
+def _json(server, method, path, headers=None):
+    status, _, data = _request(server, method, path, headers)
+    return status, json.loads(data)
+
+
+def test_recipe_list_is_streamed_as_json_lines(server):
+    status, headers, data = _request(server, "GET", "/recipes?sort=name")
+    assert status == 200
+    assert headers["Transfer-Encoding"] == "chunked"
+    rows = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    names = [row["name"] for row in rows]
+    assert len(rows) == 5 and names == sorted(names)
+
+    status, _, data = _request(server, "GET", "/recipes?q=" + quote("Свекла"))
+    rows = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    assert status == 200 and [row["name"] for row in rows] == ["Борщ украинский"]
+
+
+def test_recipe_details_and_similar(server):
+    status, recipe = _json(server, "GET", "/recipes/1")
+    assert status == 200 and recipe["name"] == "Паста Карбонара"
+    status, similar = _json(server, "GET", "/recipes/1/similar?k=2")
+    assert status == 200 and 0 < len(similar) <= 2
+    assert all(row["name"] != recipe["name"] and "score" in row for row in similar)
+
+
+def test_error_statuses(server):
+    assert _json(server, "GET", "/recipes/999")[0] == 404
+    assert _json(server, "GET", "/recipes/999/similar")[0] == 404
+    # Неверный параметр - ошибка запроса, а не отсутствующий рецепт
+    assert _json(server, "GET", "/recipes/0/similar?k=0")[0] == 400
+    assert _json(server, "GET", "/recipes/0/similar?k=abc")[0] == 400
+    assert _json(server, "GET", "/recipes?sort=name&q=" + quote("суп"))[0] == 400
+    assert _json(server, "GET", "/export")[0] == 403
+    assert _json(server, "GET", "/nowhere")[0] == 404
+    assert _json(server, "POST", "/recipes")[0] == 405
+
+
+def test_export_is_available_to_admin(server):
+    status, _, data = _request(server, "GET", "/export", {"X-User-Role": "admin"})
+    assert status == 200 and len(data.decode("utf-8").splitlines()) == 5
+
+
+def test_invalid_content_length_is_rejected(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    connection.putrequest("GET", "/statistics")
+    connection.putheader("Content-Length", "abc")
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    assert "error" in json.loads(response.read())
+    connection.close()
@@ -0,0 +1,23 @@
+from main_recipe import initialize_sample_recipes
+from recipe_controller import RecipeController
+from recipe_model import RecipeModel
+
+
+def test_search_cache_ignores_letter_case(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    initialize_sample_recipes(model)
+    controller = RecipeController(model)
+    queries = []
+    search_recipes = model.search_recipes
+    model.search_recipes = lambda query, limit=None: queries.append(query) or search_recipes(query, limit)
+
+    ok, first = controller.search_recipes("Свекла")
+    assert ok and [recipe.name for recipe in first] == ["Борщ украинский"]
+    assert controller.search_recipes("СВЕКЛА") == (True, first)
+    # В модель уходит исходный запрос, а повторы в другом регистре берутся из кэша
+    assert queries == ["Свекла"]
+
+    ok, by_author = controller.filter_by_author("баба галя")
+    assert ok and controller.filter_by_author("Баба Галя") == (True, by_author) and len(by_author) == 1
+    stats = controller.query_cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
@@ -0,0 +1,105 @@
+import pytest
+
+from main_recipe import initialize_sample_recipes
+from recipe_history import SECONDS_PER_DAY
+from recipe_model import CuisineType, Ingredient, Recipe, RecipeModel, RecipeType
+
+
+def _recipe(name, cooking_time=30):
+    return Recipe(name, "Тест", RecipeType.SOUP, f"Описание {name}",
+                  [Ingredient("Вода", "1 л")], CuisineType.RUSSIAN, cooking_time=cooking_time)
+
+
+def _model(tmp_path, **options):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    initialize_sample_recipes(model)
+    model.enable_history(**options)
+    return model
+
+
+def _rows(recipes):
+    return [recipe.to_dict() for recipe in recipes]
+
+
+def test_restore_records_a_new_version(tmp_path):
+    model = _model(tmp_path)
+    history = model.history
+    original = _rows(model.recipes)
+    first = history.head
+
+    model.add_recipe(_recipe("Уха"))
+    model.remove_recipe(0)
+    with model.batch_changes():
+        model.add_recipe(_recipe("Щи"))
+        model.update_recipe(0, _recipe("Солянка"))
+    assert history.head == first + 3
+    assert [info.changes for info in history.versions(3)] == [2, 1, 1]
+
+    assert _rows(history.snapshot(first)) == original
+    restored = history.restore(first)
+    assert restored == history.head and _rows(model.recipes) == original
+    assert history.versions(1)[0].label == f"восстановление версии {first}"
+    # Промежуточные версии не переписываются
+    assert [recipe.name for recipe in history.snapshot(first + 1)][-1] == "Уха"
+    assert history.restore(restored) is None
+
+    with pytest.raises(ValueError):
+        history.snapshot(restored + 1)
+
+
+def test_retention_drops_old_versions_and_their_recipes(tmp_path):
+    model = _model(tmp_path, checkpoint_interval=100, keep_versions=3)
+    history = model.history
+    for minutes in range(1, 6):
+        model.update_recipe(0, _recipe("Уха", cooking_time=minutes))
+    head = history.head
+    expected = _rows(history.snapshot(head - 2))
+
+    assert history.collect_garbage() == 3
+    assert [info.version for info in history.versions()] == [head, head - 1, head - 2]
+    assert _rows(history.snapshot(head - 2)) == expected
+    with pytest.raises(ValueError):
+        history.snapshot(head - 3)
+    # Варианты рецепта из удаленных версий больше не хранятся
+    stored = history.connection.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+    assert stored == len(model.recipes) + 2
+    assert history.collect_garbage() == 0
+
+
+def test_retention_by_age_keeps_the_latest_version(tmp_path):
+    now = [1_000_000.0]
+    model = _model(tmp_path, max_age_days=1, clock=lambda: now[0])
+    history = model.history
+    model.add_recipe(_recipe("Уха"))
+    now[0] += 2 * SECONDS_PER_DAY
+    model.add_recipe(_recipe("Щи"))
+    assert history.version_at(now[0] - SECONDS_PER_DAY) == history.head - 1
+
+    assert history.collect_garbage() == 2
+    assert [info.version for info in history.versions()] == [history.head]
+    now[0] += 2 * SECONDS_PER_DAY
+    assert history.collect_garbage() == 0
+    assert _rows(history.snapshot(history.head)) == _rows(model.recipes)
+
+
+def test_history_survives_reload(tmp_path):
+    model = _model(tmp_path)
+    first = model.history.head
+    model.add_recipe(_recipe("Уха"))
+    versions = model.history.versions()
+    model.disable_history()
+
+    reloaded = RecipeModel(model.filename)
+    reloaded.enable_history()
+    # Коллекция совпадает с последней версией: новая версия не записывается
+    assert reloaded.history.versions() == versions
+    assert len(reloaded.history.snapshot(first)) == len(reloaded.recipes) - 1
+
+    reloaded.disable_history()
+    reloaded.remove_recipe(0)
+    reloaded.enable_history()
+    # Изменение без истории записывается версией при следующей сверке
+    assert reloaded.history.head == versions[0].version + 1
+    assert reloaded.history.versions(1)[0].label == "загрузка"
+    assert _rows(reloaded.history.snapshot(reloaded.history.head)) == _rows(reloaded.recipes)
+    reloaded.disable_history()
@@ -0,0 +1,98 @@
+import csv
+import json
+
+import pytest
+
+from main_recipe import initialize_sample_recipes
+from recipe_import import CHUNK_SIZE, CSV_COLUMNS, normalize_record
+from recipe_model import RecipeModel
+
+
+def _record(name, **fields):
+    record = {"name": name, "author": "Тест", "recipe_type": "суп", "description": "Описание",
+              "ingredients": [{"name": "Вода", "quantity": "1 л"}], "cuisine": "русская"}
+    record.update(fields)
+    return record
+
+
+def _model(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    initialize_sample_recipes(model)
+    return model
+
+
+def test_normalize_record_checks_fields():
+    record = normalize_record(json.dumps(_record("  Уха ", cooking_time=2.0)).encode("utf-8"))
+    assert record["name"] == "Уха" and record["cooking_time"] == 2
+    assert record["ingredients"] == [{"name": "Вода", "quantity": "1 л", "optional": False}]
+    assert normalize_record(json.dumps(_record("Уха", cooking_time=0)).encode("utf-8"))["cooking_time"] is None
+
+    for raw, message in ((b"{not json", "JSON"),
+                         (b"[1, 2]", "объект"),
+                         (_record("", author="Тест"), "обязательны"),
+                         (_record("Уха", ingredients=[]), "ингредиент"),
+                         (_record("Уха", recipe_type="Десерт?"), "тип блюда"),
+                         (_record("Уха", cuisine=["русская"]), "кухня"),
+                         (_record("Уха", cooking_time=1.5), "целым"),
+                         (_record("Уха", cooking_time=True), "целым"),
+                         (_record("Уха", cooking_time="1.5"), "целым"),
+                         (_record("Уха", cooking_time=-5), "отрицательным")):
+        if isinstance(raw, dict):
+            raw = json.dumps(raw).encode("utf-8")
+        with pytest.raises(ValueError, match=message):
+            normalize_record(raw)
+
+
+def test_normalize_record_parses_csv_ingredients():
+    row = dict(_record("Борщ"), ingredients="Свекла - 2 шт; Сметана - 100 г (по желанию);  ;",
+               cooking_time="90")
+    record = normalize_record(row)
+    assert record["ingredients"] == [
+        {"name": "Свекла", "quantity": "2 шт", "optional": False},
+        {"name": "Сметана", "quantity": "100 г", "optional": True},
+    ]
+    assert record["cooking_time"] == 90
+    with pytest.raises(ValueError, match="название - количество"):
+        normalize_record(dict(row, ingredients="Свекла 2 шт"))
+
+
+def test_csv_import_reports_errors_and_duplicates(tmp_path):
+    model = _model(tmp_path)
+    filename = tmp_path / "import.csv"
+    with open(filename, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, CSV_COLUMNS)
+        writer.writeheader()
+        row = dict(_record("Уха"), ingredients="Рыба - 500 г; Укроп - пучок (по желанию)")
+        writer.writerow(row)
+        writer.writerow(dict(row, cooking_time="1.5"))
+        writer.writerow(dict(row, name="уха"))
+        writer.writerow(dict(row, name="Борщ украинский", author="Баба Галя"))
+        writer.writerow(dict(row, name="Щи", cooking_time="40"))
+
+    report = model.import_file(str(filename))
+    assert (report.total, report.added) == (5, 2)
+    assert [number for number, _ in report.errors] == [3]
+    assert [number for number, _ in report.duplicates] == [4, 5]
+    assert [recipe.name for recipe in model.recipes[-2:]] == ["Уха", "Щи"]
+    assert model.recipes[-2].ingredients[1].optional
+    assert len(RecipeModel(model.filename).recipes) == 7
+
+
+def test_jsonl_import_in_process_pool_keeps_file_order(tmp_path):
+    model = _model(tmp_path)
+    filename = tmp_path / "import.jsonl"
+    count = CHUNK_SIZE + 50
+    with open(filename, "w", encoding="utf-8") as file:
+        for number in range(count):
+            if number == CHUNK_SIZE + 10:
+                file.write("{broken\n")
+            file.write(json.dumps(_record(f"Рецепт {number}", cooking_time=number % 90),
+                                  ensure_ascii=False) + "\n")
+        file.write("\n")
+        file.write(json.dumps(_record("Рецепт 0"), ensure_ascii=False) + "\n")
+
+    report = model.import_file(str(filename), workers=2)
+    assert report.total == count + 2 and report.added == count
+    assert report.errors == [(CHUNK_SIZE + 11, "Некорректный JSON")]
+    assert [number for number, _ in report.duplicates] == [count + 3]
+    assert [recipe.name for recipe in model.recipes[5:]] == [f"Рецепт {number}" for number in range(count)]
@@ -0,0 +1,116 @@
+import gc
+import os
+import stat
+import weakref
+
+import recipe_model
+import recipe_storage
+from main_recipe import initialize_sample_recipes
+from recipe_model import CuisineType, Ingredient, PersistencePolicy, Recipe, RecipeModel, RecipeType
+
+
+def _model(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    model.add_recipe(Recipe("Окрошка", "Иван", RecipeType.SOUP, "Холодный суп на квасе",
+                            [Ingredient("Квас", "1 л")], CuisineType.RUSSIAN, cooking_time=20))
+    return model
+
+
+def test_sample_recipes_replace_built_indexes(tmp_path):
+    model = _model(tmp_path)
+    # Индексы построены по старой коллекции до замены
+    assert len(model.sorted_recipes("name")) == 1
+    assert model.fuzzy_search("окрошка")
+    assert model.similar_recipes(0) == []
+
+    initialize_sample_recipes(model)
+
+    names = [recipe.name for recipe in model.sorted_recipes("name")]
+    assert len(names) == len(model.recipes) == 5
+    assert not model.fuzzy_search("окрошка")
+    assert model.fuzzy_search("тирамису")
+    assert len(model.similar_recipes(1)) > 0
+    assert len(RecipeModel(model.filename).recipes) == 5
+
+
+def test_direct_assignment_is_detected_on_save(tmp_path):
+    model = _model(tmp_path)
+    assert len(model.sorted_recipes("cooking_time")) == 1
+
+    model.recipes = []
+    model.save_to_file()
+
+    assert len(model.sorted_recipes("cooking_time")) == 0
+    assert not model.fuzzy_search("окрошка")
+
+
+
+def test_persisted_index_is_checked_against_content(tmp_path):
+    filename = str(tmp_path / "recipes.db")
+    RecipeModel(filename).add_recipe(Recipe("Окрошка", "Иван", RecipeType.SOUP, "Холодный суп на квасе",
+                                            [Ingredient("Квас", "1 л")], CuisineType.RUSSIAN, cooking_time=20))
+    model = RecipeModel(filename, persist_indexes=True)
+    model.warm_indexes()
+
+    # Изменение того же размера остается в журнале -wal, пока соединение открыто
+    writer = RecipeModel(filename)
+    writer.update_recipe(0, Recipe("Солянка", "Иван", RecipeType.SOUP, "Густой суп",
+                                   [Ingredient("Оливки", "50 г")], CuisineType.RUSSIAN, cooking_time=60))
+
+    reloaded = RecipeModel(filename, persist_indexes=True)
+    assert not reloaded.fuzzy_search("окрошка")
+    assert reloaded.fuzzy_search("солянка")
+
+
+def test_deferred_models_are_flushed_at_exit_without_being_kept_alive(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"), persistence=PersistencePolicy.MANUAL)
+    initialize_sample_recipes(model)
+    model.remove_recipe(0)
+    assert model.has_pending_changes()
+
+    recipe_model._flush_deferred_models()
+    assert len(RecipeModel(model.filename).recipes) == 4
+
+    reference = weakref.ref(model)
+    del model
+    gc.collect()
+    assert reference() is None
+
+
+def test_json_save_keeps_file_mode(tmp_path):
+    model = _model(tmp_path)
+    # Новый файл получает права как при обычном open(), а не 0600 временного файла
+    assert stat.S_IMODE(os.stat(model.filename).st_mode) == 0o666 & ~recipe_storage._UMASK
+
+    os.chmod(model.filename, 0o640)
+    initialize_sample_recipes(model)
+    assert stat.S_IMODE(os.stat(model.filename).st_mode) == 0o640
+
+
+def test_search_returns_each_recipe_once_on_both_backends(tmp_path):
+    json_model = RecipeModel(str(tmp_path / "recipes.json"))
+    sqlite_model = RecipeModel(str(tmp_path / "recipes.db"))
+    initialize_sample_recipes(json_model)
+    initialize_sample_recipes(sqlite_model)
+    assert sqlite_model.storage.has_fts
+
+    # "Свек" есть и в ингредиентах, и в описании борща
+    for query in ("Свек", "свекла", "СМЕТАН", "Баба", "паста", "суп", "ов", "нет такого"):
+        expected = [recipe.name for recipe in json_model.search_recipes(query)]
+        assert len(expected) == len(set(expected))
+        assert [recipe.name for recipe in sqlite_model.search_recipes(query)] == expected, query
+        assert [recipe.name for recipe in json_model.search_recipes(query, limit=1)] == expected[:1]
+    assert [recipe.name for recipe in json_model.search_recipes("Свек")] == ["Борщ украинский"]
+    sqlite_model.storage.close()
+
+
+def test_difficulty_facet_matches_case_insensitive_filter(tmp_path):
+    model = _model(tmp_path)
+    for number, difficulty in enumerate(("Средний", "средний", "Легкий", None)):
+        model.add_recipe(Recipe(f"Суп {number}", "Иван", RecipeType.SOUP, "Суп",
+                                [Ingredient("Вода", "1 л")], CuisineType.RUSSIAN, difficulty=difficulty))
+
+    _, facets = model.facet_search()
+    assert facets["difficulty"] == {"средний": 2, "легкий": 1, "не указана": 2}
+    matches, facets = model.facet_search(difficulty="СРЕДНИЙ")
+    assert len(matches) == 2 and facets["difficulty"] == {"средний": 2}
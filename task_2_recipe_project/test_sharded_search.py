@@ -0,0 +1,40 @@
+from main_recipe import initialize_sample_recipes
+from recipe_model import CuisineType, Ingredient, Recipe, RecipeModel, RecipeType
+
+
+def _names(recipes):
+    return [recipe.name for recipe in recipes]
+
+
+def _kill(search, shard):
+    process = search._processes[shard]
+    process.kill()
+    process.join()
+
+
+def test_dead_shard_is_restarted(tmp_path):
+    model = RecipeModel(str(tmp_path / "recipes.json"))
+    initialize_sample_recipes(model)
+    model.enable_sharded_search(shards=2)
+    search = model.sharded_search
+    try:
+        expected = _names(model.search_recipes("а"))
+        assert len(expected) > 1
+
+        # Шард умер до запроса: ответ на этот запрос считается в текущем процессе
+        _kill(search, 0)
+        assert _names(model.search_recipes("а")) == expected
+        assert search._processes[0].is_alive()
+        assert _names(model.search_recipes("а")) == expected
+
+        # Шард умер до изменения: новый процесс получает документы с этим изменением
+        _kill(search, 1)
+        model.add_recipe(Recipe("Окрошка", "Иван", RecipeType.SOUP, "Холодный суп на квасе",
+                                [Ingredient("Квас", "1 л")], CuisineType.RUSSIAN, cooking_time=20))
+        _kill(search, 0)
+        model.remove_recipe(0)
+        assert all(process.is_alive() for process in search._processes)
+        assert _names(model.search_recipes("квас")) == ["Окрошка"]
+        assert _names(model.search_recipes("а")) == expected[1:] + ["Окрошка"]
+    finally:
+        model.disable_sharded_search()